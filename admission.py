@@ -0,0 +1,319 @@
+"""
+Admission control for the prediction endpoints
+Requests to /chat, /predict and /predict/batch pass through a controller before
+any model work starts. Each client first draws from its own token bucket; a
+client over its rate gets 429. The request then needs one of a fixed number of
+concurrent slots. When none is free it waits in a bounded queue for up to a
+timeout, and a full queue or an expired wait gets 503. Both rejections carry
+Retry-After and cost microseconds, so a burst is turned away early instead of
+slowing every request in flight.
+
+Settings come from the environment (create_admission_controller):
+    ADMISSION_MAX_CONCURRENT  requests doing model work at once (default 16; 0 disables)
+    ADMISSION_MAX_QUEUE       requests waiting for a slot (default 64)
+    ADMISSION_QUEUE_TIMEOUT   seconds a request may wait (default 2)
+    RATE_LIMIT                requests per second per client (default off)
+    RATE_BURST                bucket size per client (default twice RATE_LIMIT)
+    RATE_LIMIT_CLIENTS        per-client overrides, 'client=rate:burst,client=rate:burst'
+    TRUSTED_PROXY_HOPS        reverse proxies in front of the app whose X-Forwarded-For is trusted (default 0)
+
+Clients are told apart by address. The X-Client-Id header is only taken for ids
+listed in RATE_LIMIT_CLIENTS; any other id is ignored, so a caller can't escape
+its address's bucket (or flood the bucket table) by sending a fresh id each time.
+Behind a load balancer every request comes from the proxy, so TRUSTED_PROXY_HOPS
+takes the address that many hops back in X-Forwarded-For instead; leave it at 0
+when clients reach the app directly, or they can pick their own address.
+"""
+
+import asyncio
+import collections
+import contextlib
+import math
+import os
+import threading
+import time
+
+# Header naming a configured client; others are told apart by address
+CLIENT_HEADER = "X-Client-Id"
+FORWARDED_FOR_HEADER = "X-Forwarded-For"
+REJECTION_REASONS = ("rate_limited", "queue_full", "queue_timeout")
+
+
+class Rejected(Exception):
+    """A request turned away; status is 429 or 503 and retry_after is in whole seconds"""
+
+    def __init__(self, status, reason, retry_after):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def __str__(self):
+        if self.reason == "rate_limited":
+            return "Too many requests from this client"
+        return "Server busy, try again shortly"
+
+    @property
+    def headers(self):
+        return {"Retry-After": str(self.retry_after)}
+
+    def to_dict(self):
+        return {"error": str(self), "reason": self.reason, "retry_after": self.retry_after}
+
+
+class TokenBucket:
+    """rate tokens per second, up to burst; each request takes one"""
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, now):
+        """0 when a token was taken, else seconds until one is available"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else math.inf
+
+
+def parse_client_limits(spec=""):
+    """Client -> (rate, burst) from 'client=rate:burst,client=rate'"""
+    limits = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        client, separator, limit = entry.partition("=")
+        rate, _, burst = limit.partition(":")
+        try:
+            rate = float(rate)
+            burst = float(burst) if burst else max(1.0, 2 * rate)
+        except ValueError:
+            rate = None
+        if not separator or not client.strip() or rate is None:
+            raise ValueError(f"Expected client=rate:burst in RATE_LIMIT_CLIENTS, got {entry!r}")
+        limits[client.strip()] = (rate, burst)
+    return limits
+
+
+def trusted_proxy_hops():
+    """Number of proxies whose X-Forwarded-For entries are trusted, from TRUSTED_PROXY_HOPS"""
+    return int(os.environ.get("TRUSTED_PROXY_HOPS", 0))
+
+
+def forwarded_address(forwarded_for, address, hops):
+    """The client address hops proxies back, read the way werkzeug's ProxyFix(x_for=hops) does"""
+    if hops <= 0 or not forwarded_for:
+        return address
+    values = [value.strip() for value in forwarded_for.split(",")]
+    # Fewer entries than trusted proxies means the request skipped one; keep the peer address
+    return values[-hops] if len(values) >= hops else address
+
+
+class ClientLimits:
+    """A token bucket per client; buckets of clients not seen lately are dropped past max_clients"""
+
+    def __init__(self, rate=None, burst=None, overrides=None, max_clients=10000):
+        self.rate = rate
+        self.burst = burst if burst is not None else (max(1.0, 2 * rate) if rate else None)
+        self.overrides = dict(overrides or {})
+        self.max_clients = max_clients
+        self._buckets = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def identify(self, claimed, address):
+        """Bucket key of a request: a configured client id it claims, else its address"""
+        return claimed if claimed and claimed in self.overrides else address
+
+    def limit_for(self, client):
+        """(rate, burst) of a client, or None when it is not limited"""
+        if client in self.overrides:
+            return self.overrides[client]
+        return (self.rate, self.burst) if self.rate else None
+
+    def check(self, client):
+        """0 when the client may proceed, else seconds until it may"""
+        limit = self.limit_for(client)
+        if limit is None:
+            return 0.0
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(*limit)
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+            return bucket.take(time.monotonic())
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class AdmissionController:
+    """A concurrency limit with a bounded, timed wait queue, behind per-client rate limits"""
+
+    def __init__(self, max_concurrent=16, max_queue=64, queue_timeout=2.0, limits=None):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.limits = limits if limits is not None else ClientLimits()
+        self.active = 0
+        self.admitted = 0
+        self.rejections = dict.fromkeys(REJECTION_REASONS, 0)
+        self._waiting = 0
+        self._lock = threading.Lock()
+        self._slot_free = threading.Condition(self._lock)
+
+    @property
+    def enabled(self):
+        return bool(self.max_concurrent)
+
+    @property
+    def waiting(self):
+        return self._waiting
+
+    def _reject(self, reason):
+        self.rejections[reason] += 1
+        # A queued request would have waited this long; ask the client to back off as much
+        return Rejected(503, reason, max(1, math.ceil(self.queue_timeout)))
+
+    def client(self, claimed, address):
+        """Bucket key of a request from address claiming the client id claimed (or None)"""
+        return self.limits.identify(claimed, address)
+
+    def check_rate(self, client):
+        wait = self.limits.check(client)
+        if wait:
+            with self._lock:
+                self.rejections["rate_limited"] += 1
+            raise Rejected(429, "rate_limited", max(1, math.ceil(wait)) if wait != math.inf else 60)
+
+    def acquire(self, client=None):
+        """Take a slot, waiting in the queue if needed; raises Rejected"""
+        self.check_rate(client)
+        if not self.enabled:
+            with self._lock:
+                self.admitted += 1
+            return
+        with self._lock:
+            if self.active >= self.max_concurrent or self._waiting:
+                if self._waiting >= self.max_queue:
+                    raise self._reject("queue_full")
+                self._waiting += 1
+                try:
+                    deadline = time.monotonic() + self.queue_timeout
+                    while self.active >= self.max_concurrent:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise self._reject("queue_timeout")
+                        self._slot_free.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            self.active += 1
+            self.admitted += 1
+
+    def release(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.active -= 1
+            self._slot_free.notify()
+
+    @contextlib.contextmanager
+    def admit(self, client=None):
+        """Hold a slot for the length of a request; raises Rejected"""
+        self.acquire(client)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def status(self):
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejections": dict(self.rejections),
+            "clients": len(self.limits),
+        }
+
+
+class AsyncAdmissionController(AdmissionController):
+    """The same limits for coroutines on one event loop; a queued request holds no thread"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._waiters = collections.deque()
+
+    @property
+    def waiting(self):
+        return len(self._waiters)
+
+    async def acquire(self, client=None):
+        self.check_rate(client)
+        if self.enabled:
+            if self.active >= self.max_concurrent or self._waiters:
+                await self._wait_for_slot()
+            else:
+                self.active += 1
+        self.admitted += 1
+
+    async def _wait_for_slot(self):
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("queue_full")
+        # release() hands its slot straight to the first waiter, so active never drops in between
+        slot = asyncio.get_running_loop().create_future()
+        self._waiters.append(slot)
+        try:
+            await asyncio.wait_for(slot, self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not (slot.done() and not slot.cancelled()):
+                raise self._reject("queue_timeout")
+        except asyncio.CancelledError:
+            # The request went away; pass on a slot it was handed meanwhile
+            if slot.done() and not slot.cancelled():
+                self.release()
+            raise
+        finally:
+            if slot in self._waiters:
+                self._waiters.remove(slot)
+
+    def release(self):
+        if not self.enabled:
+            return
+        while self._waiters:
+            slot = self._waiters.popleft()
+            if not slot.done():
+                slot.set_result(None)
+                return
+        self.active -= 1
+
+    @contextlib.asynccontextmanager
+    async def admit(self, client=None):
+        await self.acquire(client)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+def create_admission_controller(cls=AdmissionController):
+    """Build a controller from the ADMISSION_* and RATE_* environment variables"""
+    rate = float(os.environ["RATE_LIMIT"]) if os.environ.get("RATE_LIMIT") else None
+    burst = float(os.environ["RATE_BURST"]) if os.environ.get("RATE_BURST") else None
+    limits = ClientLimits(rate, burst, parse_client_limits(os.environ.get("RATE_LIMIT_CLIENTS", "")))
+    return cls(
+        max_concurrent=int(os.environ.get("ADMISSION_MAX_CONCURRENT", 16)),
+        max_queue=int(os.environ.get("ADMISSION_MAX_QUEUE", 64)),
+        queue_timeout=float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", 2.0)),
+        limits=limits,
+    )
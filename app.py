@@ -1,17 +1,196 @@
-from flask import Flask, render_template, request, jsonify, session
-from candidate_elimination import load_cases, predict_legal_issue
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
+from werkzeug.middleware.proxy_fix import ProxyFix
+from admission import CLIENT_HEADER, Rejected, create_admission_controller, trusted_proxy_hops
+from candidate_elimination import load_case_index, predict_legal_issue, get_model, model_registry
+from metrics import REGISTRY, observe_stage, profiler
+from model_registry import ModelRegistry
+from session_store import create_session_store
+from tenants import DEFAULT_TENANT, Tenant, TenantPool, UnknownDataset, parse_datasets
+import gc
+import json
 import os
+import secrets
+import time
 
 app = Flask(__name__)
-app.secret_key = os.urandom(24)
+# Shared across workers when set; a per-process key only suits a single worker
+app.secret_key = os.environ.get("SECRET_KEY") or os.urandom(24)
 
-# Load CSV dataset at startup
-dataset = load_cases("minimal_legal_cases.csv")
+# The CSV dataset is streamed into the lookup index on first use, so requests don't scan
+# the table and processes that only serve static pages never load it
+CASES_PATH = os.environ.get("CASES_PATH") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "minimal_legal_cases.csv")
+# Replacing the CSV swaps in a freshly built index (see /admin/reload)
+case_registry = ModelRegistry("case index", lambda previous: load_case_index(CASES_PATH), [CASES_PATH])
+
+def get_case_index():
+    """The lookup index over CASES_PATH, built once on first use"""
+    return case_registry.get()
+
+REGISTRIES = {"model": model_registry, "cases": case_registry}
+
+# Poll the dataset and snapshot files and reload when they change (seconds; off by default)
+WATCH_INTERVAL = float(os.environ.get("MODEL_WATCH_INTERVAL", 0))
+# Process whose watcher threads are running
+watching_pid = None
+
+# Further datasets (one per jurisdiction) served beside CASES_PATH, which is "default":
+# DATASETS="delhi=/data/delhi.csv,mumbai=/data/mumbai.cases" and/or a DATASETS_DIR of CSVs or case stores.
+# A request picks one with the X-Dataset header or a /datasets/<name>/ route prefix; each
+# loads on first use and idle ones are evicted past TENANT_MAX_LOADED or TENANT_MEMORY_MB
+DATASET_HEADER = "X-Dataset"
+default_tenant = Tenant(DEFAULT_TENANT, CASES_PATH, case_registry, model_registry)
+tenant_pool = TenantPool(
+    parse_datasets(os.environ.get("DATASETS", ""), os.environ.get("DATASETS_DIR")),
+    max_loaded=int(os.environ.get("TENANT_MAX_LOADED", 16)),
+    max_bytes=int(float(os.environ["TENANT_MEMORY_MB"]) * 2**20) if os.environ.get("TENANT_MEMORY_MB") else None,
+    pinned=[default_tenant],
+    watch_interval=WATCH_INTERVAL,
+)
+
+def request_dataset(dataset=None):
+    """Dataset named by the route or the X-Dataset header, else the default; raises UnknownDataset"""
+    name = dataset or request.headers.get(DATASET_HEADER) or DEFAULT_TENANT
+    if name not in tenant_pool:
+        raise UnknownDataset(name)
+    return name
+
+def start_watchers():
+    """Start the file watchers once per process; threads don't survive a pre-fork server's fork"""
+    global watching_pid
+    if WATCH_INTERVAL > 0 and watching_pid != os.getpid():
+        watching_pid = os.getpid()
+        for registry in REGISTRIES.values():
+            registry.watch(WATCH_INTERVAL)
+
+def preload():
+    """Build the index and load the model now, e.g. in a pre-fork server master
+    
+    Workers forked afterwards share the loaded pages copy-on-write; freezing the
+    collector keeps it from touching (and so copying) those objects in every worker.
+    """
+    get_case_index()
+    get_model()
+    gc.freeze()
+
+# Concurrency, wait-queue and per-client rate limits in front of the prediction routes;
+# see admission.py for the ADMISSION_* and RATE_* settings
+admission = create_admission_controller()
+ADMITTED_ENDPOINTS = {"chat", "predict", "predict_batch"}
+# Controllers reported under /metrics; the ASGI entry point adds its own
+admission_controllers = [admission]
+# Behind a load balancer, remote_addr is the client address from X-Forwarded-For (see admission.py)
+TRUSTED_PROXY_HOPS = trusted_proxy_hops()
+if TRUSTED_PROXY_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS, x_proto=0)
+
+# Admin endpoints are disabled unless a token is configured
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+CHAT_QUESTIONS = [
+    ("case_type", "What type of case is this? (Civil, Criminal, Family, Consumer, etc.)"),
+    ("sub_type", "Can you specify the issue? (Eviction, Dowry, Divorce, etc.)"),
+    ("value", "What is the value involved? (<10k, 10k-50k, >50k, N/A)"),
+    ("agreement", "Did you sign any agreement? (Yes/No)"),
+    ("notice", "Did you give a legal notice? (Yes/No)"),
+    ("consumer", "Is this a consumer complaint? (Yes/No)"),
+    ("matrimonial", "Is this related to a matrimonial issue? (Yes/No)")
+]
+
+# Conversation state lives server-side; the cookie only carries an opaque id
+CONVERSATION_COOKIE = "conversation_id"
+session_store = create_session_store()
+
+# Request metrics, scraped from /metrics
+REQUEST_SECONDS = REGISTRY.histogram("http_request_duration_seconds", "Request latency by route", ("method", "route"))
+REQUESTS_TOTAL = REGISTRY.counter("http_requests_total", "Requests by route and status", ("method", "route", "status"))
+CACHE_LOOKUPS = REGISTRY.counter("legal_prediction_cache_lookups_total", "Prediction cache lookups by result", ("result",))
+CACHE_ENTRIES = REGISTRY.gauge("legal_prediction_cache_entries", "Entries held in the prediction cache")
+G_BOUNDARY = REGISTRY.gauge("legal_general_boundary", "G-boundary size and training telemetry", ("field",))
+CASE_INDEX_ROWS = REGISTRY.gauge("legal_case_index_rows", "Rows in the case lookup index")
+TENANTS_LOADED = REGISTRY.gauge("legal_datasets_loaded", "Datasets held in memory, the default included")
+TENANT_BYTES = REGISTRY.gauge("legal_datasets_approximate_bytes", "Approximate memory held by loaded datasets")
+TENANT_EVENTS = REGISTRY.counter("legal_dataset_events_total", "Dataset loads and idle evictions", ("event",))
+
+def collect_model_metrics():
+    """Copy the model's cache and boundary counters into their gauges"""
+    model = model_registry.current
+    cache = model.prediction_cache
+    if cache is not None:
+        CACHE_LOOKUPS.set(cache.hits, "hit")
+        CACHE_LOOKUPS.set(cache.misses, "miss")
+        CACHE_ENTRIES.set(len(cache))
+    G_BOUNDARY.set(len(model._general or ()), "size")
+    for field, value in model.boundary_stats.items():
+        if field != "size":
+            G_BOUNDARY.set(value, field)
+    index = case_registry.current
+    CASE_INDEX_ROWS.set(len(index) if index is not None else 0)
+
+def collect_tenant_metrics():
+    loaded = tenant_pool.loaded()
+    TENANTS_LOADED.set(len(loaded))
+    TENANT_BYTES.set(sum(tenant.approximate_bytes() for tenant in loaded))
+    TENANT_EVENTS.set(tenant_pool.loads, "load")
+    TENANT_EVENTS.set(tenant_pool.evictions, "eviction")
+
+ADMISSION_ACTIVE = REGISTRY.gauge("legal_admission_active", "Prediction requests holding a slot")
+ADMISSION_QUEUE = REGISTRY.gauge("legal_admission_queue_depth", "Prediction requests waiting for a slot")
+ADMISSION_REQUESTS = REGISTRY.counter("legal_admission_requests_total",
+                                      "Prediction requests admitted or rejected, by outcome", ("outcome",))
+
+def collect_admission_metrics():
+    ADMISSION_ACTIVE.set(sum(c.active for c in admission_controllers))
+    ADMISSION_QUEUE.set(sum(c.waiting for c in admission_controllers))
+    ADMISSION_REQUESTS.set(sum(c.admitted for c in admission_controllers), "admitted")
+    for reason in admission.rejections:
+        ADMISSION_REQUESTS.set(sum(c.rejections[reason] for c in admission_controllers), reason)
+
+REGISTRY.add_collector(collect_model_metrics)
+REGISTRY.add_collector(collect_tenant_metrics)
+REGISTRY.add_collector(collect_admission_metrics)
+
+@app.before_request
+def start_timer():
+    request.environ["app.started"] = time.perf_counter()
+    start_watchers()
+
+@app.before_request
+def admit_request():
+    """Hold an admission slot for a prediction request, or turn it away with 429/503"""
+    if request.endpoint in ADMITTED_ENDPOINTS:
+        admission.acquire(admission.client(request.headers.get(CLIENT_HEADER), request.remote_addr))
+        request.environ["app.admitted"] = True
+
+@app.teardown_request
+def release_admission(error=None):
+    # Streamed batch responses keep their slot until the last line is sent
+    if request.environ.pop("app.admitted", False):
+        admission.release()
+
+@app.after_request
+def record_request(response):
+    # Streamed responses are timed up to the first byte
+    started = request.environ.get("app.started")
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        REQUEST_SECONDS.observe(time.perf_counter() - started, request.method, route)
+        REQUESTS_TOTAL.inc(request.method, route, str(response.status_code))
+    return response
+
+def conversation_reply(payload, conversation_id=None):
+    """JSON reply that (re)issues the conversation cookie when an id is given"""
+    response = jsonify(payload)
+    if conversation_id is not None:
+        response.set_cookie(CONVERSATION_COOKIE, conversation_id, max_age=int(session_store.ttl),
+                            httponly=True, samesite="Lax")
+    return response
 
 # Reset session
 @app.route('/reset', methods=['GET'])
 def reset():
-    session.clear()
+    conversation_id = request.cookies.get(CONVERSATION_COOKIE)
+    if conversation_id:
+        session_store.delete(conversation_id)
     return jsonify({"message": "Session reset."})
 
 @app.route('/')
@@ -26,76 +205,237 @@ def chatbot():
 def legal_assistant():
     return render_template('legal_form.html')
 
+@app.errorhandler(UnknownDataset)
+def unknown_dataset(error):
+    return jsonify({"error": str(error)}), 404
+
+@app.errorhandler(Rejected)
+def rejected(error):
+    return jsonify(error.to_dict()), error.status, error.headers
+
 @app.route('/chat', methods=['POST'])
-def chat():
-    user_input = request.json.get("message")
-    step = session.get("step", 0)
-    context = session.get("context", {})
-    
-    questions = [
-        ("case_type", "What type of case is this? (Civil, Criminal, Family, Consumer, etc.)"),
-        ("sub_type", "Can you specify the issue? (Eviction, Dowry, Divorce, etc.)"),
-        ("value", "What is the value involved? (<10k, 10k-50k, >50k, N/A)"),
-        ("agreement", "Did you sign any agreement? (Yes/No)"),
-        ("notice", "Did you give a legal notice? (Yes/No)"),
-        ("consumer", "Is this a consumer complaint? (Yes/No)"),
-        ("matrimonial", "Is this related to a matrimonial issue? (Yes/No)")
-    ]
+@app.route('/datasets/<dataset>/chat', methods=['POST'])
+def chat(dataset=None):
+    dataset = request_dataset(dataset)
+    payload, conversation_id = chat_turn(request.cookies.get(CONVERSATION_COOKIE), request.json.get("message"), dataset)
+    return conversation_reply(payload, conversation_id)
+
+def chat_turn(conversation_id, user_input, dataset=DEFAULT_TENANT):
+    """Advance a conversation by one message; returns (reply payload, id to set in the cookie or None)"""
+    record = session_store.load(conversation_id) if conversation_id else None
+    step, answers = record if record is not None else (0, [])
+    questions = CHAT_QUESTIONS
     
     # If this is the first message or "start", begin the conversation
     if step == 0 and (user_input.lower() == "start" or user_input.lower() == "hello"):
-        session["step"] = 1
-        session["context"] = {}
-        return jsonify({"reply": questions[0][1]})
+        # Only ids the store issued are reused; a client-chosen id could be planted by someone else
+        if record is None:
+            conversation_id = secrets.token_urlsafe(16)
+        session_store.save(conversation_id, 1, [])
+        return {"reply": questions[0][1]}, conversation_id
     
     # If we're in the middle of questions
     if 1 <= step <= len(questions):
         # Store the answer for the current question
-        current_key = questions[step - 1][0]
-        context[current_key] = user_input
-        session["context"] = context
+        answers.append(user_input)
         
         # Check if we have more questions
         if step < len(questions):
-            session["step"] = step + 1
+            session_store.save(conversation_id, step + 1, answers)
             next_question = questions[step][1]
-            return jsonify({"reply": next_question})
+            return {"reply": next_question}, conversation_id
         else:
             # All questions answered, make prediction
-            prediction, guidance = predict_legal_issue(context, dataset)
-            session.clear()
-            return jsonify({
+            context = {key: answer for (key, _), answer in zip(questions, answers)}
+            with tenant_pool.use(dataset) as tenant:
+                prediction, guidance = predict_legal_issue(context, tenant.get_case_index())
+            session_store.delete(conversation_id)
+            return {
                 "reply": f"✅ Legal Issue: {prediction}\n📘 Guidance: {guidance}\n\n📋 Case Summary:\n" + 
                         "\n".join([f"• {k.replace('_', ' ').title()}: {v}" for k, v in context.items()])
-            })
+            }, None
     
     # If no step is set or invalid state, prompt to start
-    return jsonify({"reply": "Hi! I'm your Legal Assistant. Type 'start' to begin analyzing your legal case."})
+    return {"reply": "Hi! I'm your Legal Assistant. Type 'start' to begin analyzing your legal case."}, None
 
 @app.route('/predict', methods=['POST'])
-def predict():
+@app.route('/datasets/<dataset>/predict', methods=['POST'])
+def predict(dataset=None):
     """Handle form-based prediction requests"""
+    dataset = request_dataset(dataset)
     try:
         # Get JSON data from form
+        started = time.perf_counter()
         if request.is_json:
             form_data = request.get_json()
         else:
             # Handle form data if needed
             form_data = request.form.to_dict()
-        
-        # Make prediction using the same function as chat
-        prediction, guidance = predict_legal_issue(form_data, dataset)
+        observe_stage("request.parse", started)
         
         # Return JSON response for form
-        return jsonify({
-            "prediction": prediction,
-            "confidence": "Medium",  # You can enhance this based on your algorithm
-            "guidance": guidance,
-            "case_summary": form_data
-        })
+        return jsonify(prediction_result(form_data, dataset))
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def prediction_result(form_data, dataset=DEFAULT_TENANT):
+    """Build the /predict response body for one case"""
+    # Make prediction using the same function as chat
+    started = time.perf_counter()
+    with tenant_pool.use(dataset) as tenant:
+        result = predict_legal_issue(form_data, tenant.get_case_index())
+    observe_stage("predict.lookup", started)
+    return result.to_dict(case_summary=form_data)
+
+def iter_ndjson_cases(stream):
+    """Yield (case, error) pairs from an NDJSON stream, one line at a time"""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line), None
+        except ValueError as e:
+            yield None, str(e)
+
+@app.route('/predict/batch', methods=['POST'])
+@app.route('/datasets/<dataset>/predict/batch', methods=['POST'])
+def predict_batch(dataset=None):
+    """Handle bulk prediction requests, streaming one NDJSON result per case"""
+    dataset = request_dataset(dataset)
+    if request.mimetype == 'application/json':
+        # A JSON array has to be parsed whole; NDJSON bodies are read incrementally
+        cases = request.get_json(silent=True)
+        if not isinstance(cases, list):
+            return jsonify({"error": "Expected a JSON array or NDJSON body of cases"}), 400
+        cases = ((case, None) for case in cases)
+    else:
+        cases = iter_ndjson_cases(request.stream)
+    
+    def generate():
+        for index, (form_data, error) in enumerate(cases):
+            yield batch_result_line(index, form_data, error, dataset)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def batch_result_line(index, form_data, error=None, dataset=DEFAULT_TENANT):
+    """One NDJSON result line of a batch response"""
+    if error is None and not isinstance(form_data, dict):
+        error = "Expected a JSON object per case"
+    if error is None:
+        try:
+            result = prediction_result(form_data, dataset)
+        except Exception as e:
+            result = {"error": str(e)}
+    else:
+        result = {"error": error}
+    return json.dumps({"index": index, **result}) + "\n"
+
+def admin_authorized():
+    """Check the X-Admin-Token header against the configured admin token"""
+    return bool(ADMIN_TOKEN) and request.headers.get("X-Admin-Token") == ADMIN_TOKEN
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus text exposition of request, model-stage, cache and boundary metrics"""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/admin/profiler', methods=['GET', 'POST'])
+def admin_profiler():
+    """Start or stop the sampling profiler, or read its current profile"""
+    if not admin_authorized():
+        return jsonify({"error": "Forbidden"}), 403
+    
+    if request.method == 'POST':
+        options = request.get_json(silent=True) or {}
+        if options.get("enabled", True):
+            try:
+                interval = float(options.get("interval", profiler.interval))
+            except (TypeError, ValueError):
+                return jsonify({"error": "interval must be a number of seconds"}), 400
+            if interval <= 0:
+                return jsonify({"error": "interval must be positive"}), 400
+            profiler.start(interval)
+        else:
+            profiler.stop()
+    
+    if request.args.get("format") == "collapsed":
+        return Response(profiler.collapsed(), mimetype="text/plain")
+    return jsonify(profiler.report(request.args.get("limit", 50, type=int)))
+
+@app.route('/admin/cases', methods=['POST'])
+def add_cases():
+    """Incrementally learn new labelled cases without a full retrain
+    
+    The cases live only in this process's memory: they are not written to the
+    dataset or the snapshot, so a reload, an eviction or a restart drops them.
+    Add them to the CSV as well to keep them.
+    """
+    if not admin_authorized():
+        return jsonify({"error": "Forbidden"}), 403
+    
+    cases = request.get_json(silent=True)
+    if isinstance(cases, dict):
+        cases = [cases]
+    if not isinstance(cases, list) or not all(isinstance(c, dict) for c in cases):
+        return jsonify({"error": "Expected a labelled case object or a JSON array of them"}), 400
+    missing = [i for i, c in enumerate(cases) if "Legal Issue" not in c]
+    if missing:
+        return jsonify({"error": f"Cases missing 'Legal Issue': {missing}"}), 400
+    
+    # The registry locks keep a reload from swapping either out mid-update, and updates one at a time
+    with tenant_pool.use(request_dataset(request.args.get("dataset"))) as tenant, \
+            tenant.model_registry.lock, tenant.case_registry.lock:
+        model = tenant.get_model()
+        if not model.trained:
+            return jsonify({"error": "Model training failed"}), 500
+        examples = [([c.get(attr) for attr in model.attributes], c["Legal Issue"]) for c in cases]
+        # Learned on a copy and swapped in whole, so requests in flight never see half an update
+        model = model.copy()
+        positive, negative = model.update(examples)
+        tenant.model_registry.swap(model)
+        tenant.get_case_index().add_cases(cases)
+    
+    return jsonify({
+        "added": len(cases),
+        "positive": positive,
+        "negative": negative,
+        "general_hypotheses": len(model.general_hypotheses)
+    })
+
+@app.route('/admin/reload', methods=['GET', 'POST'])
+def admin_reload():
+    """Report the active model and case index versions, or reload them in the background"""
+    if not admin_authorized():
+        return jsonify({"error": "Forbidden"}), 403
+    
+    registries = tenant_pool.get(request_dataset(request.args.get("dataset"))).registries
+    if request.method == 'POST':
+        target = request.args.get("target", "all")
+        if target != "all" and target not in registries:
+            return jsonify({"error": f"Unknown reload target: {target}"}), 400
+        wait = request.args.get("wait", "").lower() in ("1", "true", "yes")
+        started = {}
+        for name, registry in registries.items():
+            if target in ("all", name):
+                started[name] = registry.reload(wait=wait)
+        status = {name: registry.status() for name, registry in registries.items()}
+        return jsonify({"started": started, **status}), 200 if wait else 202
+    
+    return jsonify({name: registry.status() for name, registry in registries.items()})
+
+@app.route('/admin/datasets', methods=['GET'])
+def admin_datasets():
+    """Configured datasets, which are loaded, and their approximate memory"""
+    if not admin_authorized():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(tenant_pool.status())
+
+# Set PRELOAD=1 with `gunicorn --preload` to load everything once in the master before forking
+PRELOAD = os.environ.get("PRELOAD", "").lower() in ("1", "true", "yes")
+if PRELOAD:
+    preload()
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -1,9 +1,13 @@
-from flask import Flask, render_template, request, jsonify, session
-from candidate_elimination import predict, train_model, get_model_info
-import uuid
+from flask import Flask, render_template, request, jsonify
+from candidate_elimination import ce_model, predict, train_model, get_model_info
+from session_store import create_session_store
+import secrets
 
 app = Flask(__name__)
-app.secret_key = 'legal_assistant_secret_key_2024'  # Change this in production
+
+# Chat state lives server-side; the cookie only carries an opaque conversation id
+CONVERSATION_COOKIE = "conversation_id"
+session_store = create_session_store()
 
 @app.after_request
 def after_request(response):
@@ -49,67 +53,72 @@ def chatbot_working():
     """Render the fully working chatbot interface"""
     return render_template("chatbot_working.html")
 
+# Define the conversation flow; kept server-side rather than copied into every session cookie
+CHAT_QUESTIONS = [
+    {
+        "id": "case_type",
+        "question": "What type of legal case do you have?",
+        "type": "dropdown",
+        "options": ["Civil", "Criminal", "Consumer", "Family", "Environmental", "PIL"]
+    },
+    {
+        "id": "sub_type",
+        "question": "What is the specific sub-type of your case?",
+        "type": "dropdown",
+        "options": ["Property Dispute", "Theft", "Non-Delivery", "Divorce", "Pollution", "RTI Delay", 
+                   "Cheque Bounce", "Domestic Violence", "False Ads", "Maintenance", "Illegal Mining",
+                   "Eviction", "Dowry Harassment", "Child Custody", "Land Violation"]
+    },
+    {
+        "id": "value",
+        "question": "What is the monetary value involved in your case?",
+        "type": "dropdown",
+        "options": ["<10k", "10k-50k", ">50k"]
+    },
+    {
+        "id": "agreement",
+        "question": "Was there any agreement or contract signed?",
+        "type": "yesno"
+    },
+    {
+        "id": "notice",
+        "question": "Was any legal notice given to the other party?",
+        "type": "yesno"
+    },
+    {
+        "id": "consumer",
+        "question": "Is this related to a consumer complaint?",
+        "type": "yesno"
+    },
+    {
+        "id": "matrimonial",
+        "question": "Is this a matrimonial (marriage-related) issue?",
+        "type": "yesno"
+    }
+]
+
+def conversation_reply(payload, conversation_id):
+    """JSON reply that (re)issues the conversation cookie"""
+    response = jsonify(payload)
+    response.set_cookie(CONVERSATION_COOKIE, conversation_id, max_age=int(session_store.ttl),
+                        httponly=True, samesite="Lax")
+    return response
+
 @app.route('/chat/start', methods=['POST'])
 def start_chat():
     """Initialize a new chat session"""
-    session_id = str(uuid.uuid4())
-    session['chat_id'] = session_id
-    session['chat_data'] = {}
-    session['current_question'] = 0
+    conversation_id = secrets.token_urlsafe(16)
+    session_store.save(conversation_id, 0, [])
     
-    # Define the conversation flow
-    questions = [
-        {
-            "id": "case_type",
-            "question": "What type of legal case do you have?",
-            "type": "dropdown",
-            "options": ["Civil", "Criminal", "Consumer", "Family", "Environmental", "PIL"]
-        },
-        {
-            "id": "sub_type",
-            "question": "What is the specific sub-type of your case?",
-            "type": "dropdown",
-            "options": ["Property Dispute", "Theft", "Non-Delivery", "Divorce", "Pollution", "RTI Delay", 
-                       "Cheque Bounce", "Domestic Violence", "False Ads", "Maintenance", "Illegal Mining",
-                       "Eviction", "Dowry Harassment", "Child Custody", "Land Violation"]
-        },
-        {
-            "id": "value",
-            "question": "What is the monetary value involved in your case?",
-            "type": "dropdown",
-            "options": ["<10k", "10k-50k", ">50k"]
-        },
-        {
-            "id": "agreement",
-            "question": "Was there any agreement or contract signed?",
-            "type": "yesno"
-        },
-        {
-            "id": "notice",
-            "question": "Was any legal notice given to the other party?",
-            "type": "yesno"
-        },
-        {
-            "id": "consumer",
-            "question": "Is this related to a consumer complaint?",
-            "type": "yesno"
-        },
-        {
-            "id": "matrimonial",
-            "question": "Is this a matrimonial (marriage-related) issue?",
-            "type": "yesno"
-        }
-    ]
-    
-    session['questions'] = questions
+    questions = CHAT_QUESTIONS
     
-    return jsonify({
+    return conversation_reply({
         "message": "Hello! I'm your Legal Assistant Bot. I'll ask you a few questions to understand your case better.",
         "question": questions[0]["question"],
         "question_type": questions[0]["type"],
         "options": questions[0].get("options", []),
         "question_id": questions[0]["id"]
-    })
+    }, conversation_id)
 
 @app.route('/chat/answer', methods=['POST'])
 def process_answer():
@@ -118,42 +127,39 @@ def process_answer():
     answer = data.get('answer')
     question_id = data.get('question_id')
     
-    # Store the answer
-    if 'chat_data' not in session:
-        session['chat_data'] = {}
-    
-    session['chat_data'][question_id] = answer
-    session['current_question'] = session.get('current_question', 0) + 1
+    # Store the answer as a [question id, answer] pair
+    conversation_id = request.cookies.get(CONVERSATION_COOKIE)
+    record = session_store.load(conversation_id) if conversation_id else None
+    if record is None:
+        conversation_id, record = secrets.token_urlsafe(16), (0, [])
+    current_q_index, answers = record
+    answers.append([question_id, answer])
+    current_q_index += 1
     
-    questions = session.get('questions', [])
-    current_q_index = session.get('current_question', 0)
+    questions = CHAT_QUESTIONS
     
     # Check if we have more questions
     if current_q_index < len(questions):
+        session_store.save(conversation_id, current_q_index, answers)
         next_question = questions[current_q_index]
-        return jsonify({
+        return conversation_reply({
             "message": f"Got it! {answer}",
             "question": next_question["question"],
             "question_type": next_question["type"],
             "options": next_question.get("options", []),
             "question_id": next_question["id"]
-        })
+        }, conversation_id)
     else:
         # All questions answered, make prediction
-        chat_data = session.get('chat_data', {})
+        session_store.delete(conversation_id)
+        chat_data = dict(answers)
         
         # Convert chat data to prediction format
-        # Map the value ranges to match the training data format
-        value_mapping = {
-            "<10k": "<10k",
-            "10k-50k": "10k-50k", 
-            ">50k": ">50k"
-        }
-        
+        # Value spellings ('10k–1L', '>1L', ...) are canonicalized by the model
         case_data = [
             chat_data.get('case_type', ''),
             chat_data.get('sub_type', ''),
-            value_mapping.get(chat_data.get('value', ''), chat_data.get('value', '')),
+            chat_data.get('value', ''),
             chat_data.get('agreement', ''),
             chat_data.get('notice', ''),
             chat_data.get('consumer', ''),
@@ -161,7 +167,7 @@ def process_answer():
         ]
         
         # Make prediction
-        result, guidance = predict(case_data)
+        result = predict(case_data)
         
         # Generate case summary
         case_summary = {
@@ -174,18 +180,18 @@ def process_answer():
             "Matrimonial Issue": chat_data.get('matrimonial', 'Not specified')
         }
         
-        return jsonify({
-            "final_result": True,
-            "prediction": result,
-            "guidance": guidance,
-            "case_summary": case_summary,
-            "message": "Thank you for providing all the information! Here's my analysis of your case:"
-        })
+        return jsonify(result.to_dict(
+            final_result=True,
+            case_summary=case_summary,
+            message="Thank you for providing all the information! Here's my analysis of your case:"
+        ))
 
 @app.route('/chat/reset', methods=['POST'])
 def reset_chat():
     """Reset the chat session"""
-    session.clear()
+    conversation_id = request.cookies.get(CONVERSATION_COOKIE)
+    if conversation_id:
+        session_store.delete(conversation_id)
     return jsonify({"message": "Chat session reset. You can start a new conversation."})
 
 @app.route('/predict', methods=['POST'])
@@ -204,32 +210,19 @@ def prediction():
             'value': json_data.get('value', '')
         }
         
-        # Map the value ranges to match the training data format
-        value_mapping = {
-            "<10k": "<10k",
-            "10k-50k": "10k-50k", 
-            ">50k": ">50k"
-        }
-        
+        # Value spellings ('10k–1L', '>1L', ...) are canonicalized by the model
         case_data = [
             form_data.get('case_type', ''),
             form_data.get('sub_type', ''),
-            value_mapping.get(form_data.get('value', ''), form_data.get('value', '')),
+            form_data.get('value', ''),
             form_data.get('agreement', ''),
             form_data.get('notice', ''),
             form_data.get('consumer', ''),
             form_data.get('matrimonial', '')
         ]
         
-        result, guidance = predict(case_data)
-        
-        # Return JSON response for chatbot
-        return jsonify({
-            "prediction": result,
-            "confidence": "Medium",  # You can enhance this based on your algorithm
-            "guidance": guidance,
-            "case_summary": form_data
-        })
+        # Return JSON response for chatbot, with the model's own confidence and scores
+        return jsonify(predict(case_data).to_dict(case_summary=form_data))
     else:
         # Form data from traditional form
         form_data = {
@@ -260,6 +253,9 @@ if __name__ == '__main__':
     print("🏛️  LEGAL ASSISTANCE BOT STARTING...")
     print("=" * 50)
     
+    # Answer every known attribute combination from memory once trained
+    ce_model.enable_prediction_cache(precompute=True)
+    
     # Train the Candidate Elimination model
     print("🎯 Training Candidate Elimination Algorithm...")
     if train_model():
@@ -0,0 +1,306 @@
+"""
+ASGI entry point for the Legal Assistant
+Serves /chat, /predict and /predict/batch (also under /datasets/<name>/) natively on asyncio, running the model
+calls on a bounded thread pool so a slow client only holds a coroutine instead of
+a worker thread. Every other route (pages, static files, admin) is passed to the
+Flask app through a small WSGI bridge on the same pool.
+
+Run with any ASGI server, for example:
+    uvicorn asgi:app --workers 4
+"""
+
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qsl
+
+from app import (
+    app as flask_app, batch_result_line, chat_turn, prediction_result, preload, session_store, start_watchers,
+    admission_controllers, tenant_pool, CONVERSATION_COOKIE, DATASET_HEADER, PRELOAD, REQUEST_SECONDS,
+    REQUESTS_TOTAL, TRUSTED_PROXY_HOPS,
+)
+from admission import (CLIENT_HEADER, FORWARDED_FOR_HEADER, AsyncAdmissionController, Rejected,
+                       create_admission_controller, forwarded_address)
+from tenants import DEFAULT_TENANT
+
+# Model calls run on at most MAX_WORKERS threads; MAX_PENDING bounds calls waiting for one
+MAX_WORKERS = int(os.environ.get("ASGI_MAX_WORKERS", 8))
+MAX_PENDING = int(os.environ.get("ASGI_MAX_PENDING", MAX_WORKERS * 4))
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="model")
+pending = asyncio.Semaphore(MAX_PENDING)
+# Same settings as the Flask app's controller; queued requests wait as coroutines
+admission = create_admission_controller(AsyncAdmissionController)
+admission_controllers.append(admission)
+
+
+async def run_model(func, *args):
+    """Run a blocking model call on the bounded executor"""
+    async with pending:
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
+def get_header(scope, name):
+    """First value of a request header, decoded, or None"""
+    name = name.encode('latin-1')
+    for key, value in scope['headers']:
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+def client_address(scope):
+    """Peer address of a request, or the forwarded one behind TRUSTED_PROXY_HOPS proxies"""
+    name = FORWARDED_FOR_HEADER.lower().encode('latin-1')
+    forwarded = ",".join(value.decode('latin-1') for key, value in scope['headers'] if key == name)
+    return forwarded_address(forwarded, (scope.get('client') or ('',))[0], TRUSTED_PROXY_HOPS)
+
+
+def get_mimetype(scope):
+    return (get_header(scope, 'content-type') or '').split(';')[0].strip().lower()
+
+
+async def read_body(receive):
+    """Read the whole request body"""
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def iter_body_lines(receive):
+    """Yield the complete lines that arrived with each chunk of the request body"""
+    buffer = b''
+    while True:
+        message = await receive()
+        buffer += message.get('body', b'')
+        more = message.get('more_body', False)
+        *lines, buffer = buffer.split(b'\n')
+        if not more and buffer:
+            lines.append(buffer)
+            buffer = b''
+        if lines:
+            yield lines
+        if not more:
+            return
+
+
+async def send_json(send, status, payload, headers=()):
+    body = json.dumps(payload, sort_keys=True).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())] + list(headers),
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def request_dataset(scope, dataset):
+    """Dataset named by the route prefix or the X-Dataset header, else the default; None if unknown"""
+    name = dataset or get_header(scope, DATASET_HEADER.lower()) or DEFAULT_TENANT
+    return name if name in tenant_pool else None
+
+
+async def chat(scope, receive, send, dataset):
+    try:
+        data = json.loads(await read_body(receive))
+        cookies = SimpleCookie(get_header(scope, 'cookie') or '')
+        conversation_id = cookies[CONVERSATION_COOKIE].value if CONVERSATION_COOKIE in cookies else None
+        payload, conversation_id = await run_model(chat_turn, conversation_id, data.get("message"), dataset)
+    except Exception as e:
+        await send_json(send, 500, {"error": str(e)})
+        return
+    headers = []
+    if conversation_id is not None:
+        cookie = (f"{CONVERSATION_COOKIE}={conversation_id}; Max-Age={int(session_store.ttl)}; "
+                  f"HttpOnly; Path=/; SameSite=Lax")
+        headers.append((b'set-cookie', cookie.encode('latin-1')))
+    await send_json(send, 200, payload, headers)
+
+
+async def predict(scope, receive, send, dataset):
+    try:
+        body = await read_body(receive)
+        if get_mimetype(scope) == 'application/json':
+            form_data = json.loads(body)
+        else:
+            form_data = dict(parse_qsl(body.decode('utf-8')))
+        result = await run_model(prediction_result, form_data, dataset)
+    except Exception as e:
+        await send_json(send, 500, {"error": str(e)})
+        return
+    await send_json(send, 200, result)
+
+
+def batch_result_lines(start, items, dataset):
+    """Result lines for a group of (case, error) items, numbered from start"""
+    return ''.join(batch_result_line(start + i, case, error, dataset) for i, (case, error) in enumerate(items))
+
+
+def parse_ndjson_lines(lines):
+    items = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            items.append((json.loads(line), None))
+        except ValueError as e:
+            items.append((None, str(e)))
+    return items
+
+
+async def predict_batch(scope, receive, send, dataset):
+    if get_mimetype(scope) == 'application/json':
+        # A JSON array has to be parsed whole; NDJSON bodies are read incrementally
+        try:
+            cases = json.loads(await read_body(receive))
+        except ValueError:
+            cases = None
+        if not isinstance(cases, list):
+            await send_json(send, 400, {"error": "Expected a JSON array or NDJSON body of cases"})
+            return
+
+        async def groups():
+            for start in range(0, len(cases), 256):
+                yield [(case, None) for case in cases[start:start + 256]]
+    else:
+        async def groups():
+            async for lines in iter_body_lines(receive):
+                items = parse_ndjson_lines(lines)
+                if items:
+                    yield items
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'application/x-ndjson')],
+    })
+    index = 0
+    async for items in groups():
+        # Each group of lines goes to the pool in one hop and streams back as soon as it is scored
+        chunk = await run_model(batch_result_lines, index, items, dataset)
+        index += len(items)
+        await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+def call_wsgi(environ):
+    """Run the Flask app for one request; returns (status, headers, body)"""
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = headers
+        return lambda data: None
+
+    result = flask_app(environ, start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return response['status'], response['headers'], body
+
+
+async def wsgi_bridge(scope, receive, send):
+    """Serve any other route through the Flask app on the executor"""
+    body = await read_body(receive)
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for key, value in scope['headers']:
+        key = key.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = 'HTTP_' + key
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+
+    status, headers, response_body = await run_model(call_wsgi, environ)
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers],
+    })
+    await send({'type': 'http.response.body', 'body': response_body})
+
+
+ROUTES = {
+    ('POST', '/chat'): chat,
+    ('POST', '/predict'): predict,
+    ('POST', '/predict/batch'): predict_batch,
+}
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # Watchers otherwise start in Flask's before_request, which the native routes never reach
+                start_watchers()
+                if PRELOAD:
+                    # Usually done when app.py was imported; repeating it is cheap
+                    await asyncio.get_running_loop().run_in_executor(executor, preload)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+    path, route, dataset = scope['path'], scope['path'], None
+    if path.startswith('/datasets/'):
+        dataset, _, rest = path[len('/datasets/'):].partition('/')
+        path, route = '/' + rest, '/datasets/<dataset>/' + rest
+    handler = ROUTES.get((scope['method'], path))
+    if handler is None or (dataset is not None and not dataset):
+        # The Flask app records its own request metrics
+        await wsgi_bridge(scope, receive, send)
+        return
+    started = time.perf_counter()
+    response = {}
+
+    async def send_and_record(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+        await send(message)
+
+    try:
+        name = request_dataset(scope, dataset)
+        if name is None:
+            await send_json(send_and_record, 404,
+                            {"error": f"Unknown dataset: {dataset or get_header(scope, DATASET_HEADER.lower())}"})
+        else:
+            client = admission.client(get_header(scope, CLIENT_HEADER.lower()), client_address(scope))
+            try:
+                async with admission.admit(client):
+                    await handler(scope, receive, send_and_record, name)
+            except Rejected as e:
+                await send_json(send_and_record, e.status, e.to_dict(), [(b'retry-after', str(e.retry_after).encode())])
+    finally:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, scope['method'], route)
+        # 499 when the client went away before a response started
+        REQUESTS_TOTAL.inc(scope['method'], route, str(response.get('status', 499)))
@@ -0,0 +1,234 @@
+"""
+Benchmark suite for the prediction and training hot paths
+Times the dataset lookup behind predict_legal_issue, CandidateElimination training
+against dataset size, single-case and batch prediction throughput, and end-to-end
+/chat and /predict requests through Flask's test client. Datasets are generated by
+synthetic_cases.py with a fixed seed, so runs are reproducible. Results are written
+as JSON; pass an earlier result file to --compare to flag regressions between commits.
+
+    python benchmark.py --sizes 1e3 1e4 1e5 -o before.json
+    python benchmark.py --sizes 1e3 1e4 1e5 -o after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCHMARKS = ('lookup', 'train', 'predict', 'http')
+
+
+def measure(func, repeat=5, number=1):
+    """Median and best seconds per call of func over repeat rounds of number calls"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return statistics.median(timings), min(timings)
+
+
+def result(name, size, seconds, best=None, ops=1, **extra):
+    """One machine-readable result record"""
+    record = {
+        "name": name,
+        "size": size,
+        "seconds": round(seconds, 9),
+        "best_seconds": round(best if best is not None else seconds, 9),
+        "ops_per_second": round(ops / seconds, 1) if seconds else None,
+    }
+    record.update(extra)
+    return record
+
+
+def sample_cases(path, count):
+    """The first count rows of a case CSV as request dicts"""
+    from ingest import iter_rows
+    rows = iter_rows(path)
+    header = next(rows)
+    cases = []
+    for row in rows:
+        cases.append({column: value for column, value in zip(header, row) if column != 'Legal Issue'})
+        if len(cases) == count:
+            break
+    return cases
+
+
+def bench_lookup(path, size, args):
+    """Index build and predict_legal_issue latency for hits and misses"""
+    from candidate_elimination import load_case_index, predict_legal_issue
+
+    build, _ = measure(lambda: load_case_index(path), repeat=1)
+    index = load_case_index(path)
+    hits = sample_cases(path, args.queries)
+    misses = [dict(case, **{'Sub-Type': 'Unseen'}) for case in hits]
+    partial = [{'Case Type': case['Case Type'], 'Value Involved': case['Value Involved']} for case in hits]
+    results = [result("lookup.build_index", size, build, rows=size)]
+    for name, cases in (("hit", hits), ("miss", misses), ("partial", partial)):
+        seconds, best = measure(lambda: [predict_legal_issue(case, index) for case in cases], args.repeat)
+        results.append(result(f"lookup.{name}", size, seconds / len(cases), best / len(cases)))
+    return results
+
+
+def bench_train(path, size, args):
+    """Full CandidateElimination training from the CSV"""
+    from candidate_elimination import CandidateElimination
+
+    model = CandidateElimination()
+    seconds, best = measure(lambda: model.train(path), repeat=args.train_repeat)
+    return [result("train", size, seconds, best, ops=size,
+                   general_hypotheses=len(model.general_hypotheses),
+                   peak_general_hypotheses=model.boundary_stats['peak_size'])]
+
+
+def bench_predict(path, size, args):
+    """Single-case predict with and without the cache, and predict_batch over the dataset"""
+    from candidate_elimination import CandidateElimination
+    from ingest import iter_rows
+    import pandas as pd
+
+    model = CandidateElimination()
+    model.train(path)
+    cases = [[case.get(attr) for attr in model.attributes] for case in sample_cases(path, args.queries)]
+
+    seconds, best = measure(lambda: [model.compute_prediction(case) for case in cases], args.repeat)
+    results = [result("predict.single", size, seconds / len(cases), best / len(cases))]
+
+    model.enable_prediction_cache()
+    [model.predict(case) for case in cases]
+    seconds, best = measure(lambda: [model.predict(case) for case in cases], args.repeat)
+    results.append(result("predict.cached", size, seconds / len(cases), best / len(cases)))
+
+    rows = iter_rows(path)
+    header = next(rows)
+    frame = pd.DataFrame(list(rows), columns=header)
+    seconds, best = measure(lambda: model.predict_batch(frame), args.repeat)
+    results.append(result("predict.batch", size, seconds, best, ops=size))
+    return results
+
+
+def bench_http(path, size, args):
+    """End-to-end /predict and full /chat conversations through the Flask test client"""
+    import app as app_module
+
+    app_module.case_registry.load = lambda previous: app_module.load_case_index(path)
+    app_module.case_registry.reload(wait=True)
+    client = app_module.app.test_client()
+    cases = sample_cases(path, args.queries)
+
+    def predict_all():
+        for case in cases:
+            response = client.post('/predict', json=case)
+            assert response.status_code == 200, response.data
+
+    def chat_all():
+        for case in cases:
+            client.delete_cookie(app_module.CONVERSATION_COOKIE)
+            client.post('/chat', json={"message": "start"})
+            for answer in case.values():
+                response = client.post('/chat', json={"message": answer or "N/A"})
+            assert response.status_code == 200, response.data
+
+    results = []
+    seconds, best = measure(predict_all, args.repeat)
+    results.append(result("http.predict", size, seconds / len(cases), best / len(cases)))
+    seconds, best = measure(chat_all, args.repeat)
+    # One conversation is eight requests: "start" plus one answer per attribute
+    results.append(result("http.chat_conversation", size, seconds / len(cases), best / len(cases),
+                          requests_per_conversation=len(cases[0]) + 1))
+    return results
+
+
+def environment():
+    """Where and on what the results were measured"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print the change against a baseline run; returns the regressed result keys"""
+    previous = {(r["name"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"{'benchmark':<28}{'size':>10}{'before':>14}{'after':>14}{'change':>10}", file=sys.stderr)
+    for r in results:
+        key = (r["name"], r["size"])
+        if key not in previous:
+            continue
+        # Best-of-rounds is less sensitive to scheduler noise than the median
+        before, after = previous[key]["best_seconds"], r["best_seconds"]
+        change = after / before - 1 if before else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  ⚠️  regression"
+            regressions.append(key)
+        print(f"{r['name']:<28}{r['size']:>10}{before:>14.6g}{after:>14.6g}{change:>+10.1%}{flag}", file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1e3, 1e4], help="dataset sizes in rows")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic datasets")
+    parser.add_argument("--queries", type=int, default=200, help="cases per latency measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="rounds per latency measurement")
+    parser.add_argument("--train-repeat", type=int, default=1, help="rounds per training measurement")
+    parser.add_argument("--data-dir", help="keep generated datasets here and reuse them between runs")
+    parser.add_argument("-o", "--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    sys.path.insert(0, BASE_DIR)
+    from synthetic_cases import generate_cases
+    import training_log
+    # Keep training's console output out of the timings and the JSON on stdout
+    training_log.set_level('silent')
+
+    runners = {'lookup': bench_lookup, 'train': bench_train, 'predict': bench_predict, 'http': bench_http}
+    results = []
+    with tempfile.TemporaryDirectory() as scratch:
+        data_dir = args.data_dir or scratch
+        os.makedirs(data_dir, exist_ok=True)
+        for size in (int(s) for s in args.sizes):
+            path = os.path.join(data_dir, f"cases_{size}_seed{args.seed}.csv")
+            if not os.path.exists(path):
+                generate_cases(path, size, seed=args.seed)
+            for name in args.only:
+                print(f"⏱️  {name} @ {size} rows", file=sys.stderr)
+                results.extend(runners[name](path, size, args))
+
+    report = {"environment": environment(), "seed": args.seed, "results": results}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
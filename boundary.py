@@ -0,0 +1,95 @@
+"""
+Subsumption-indexed general boundary for Candidate Elimination
+Keeps G free of redundant hypotheses as candidates are inserted, instead of the
+pairwise pass over the whole boundary after every negative example. A candidate h
+is redundant when another candidate is at least as specific (h.values is a subset
+of its bits); the index answers that with one AND per constrained attribute over
+posting bitsets, and finds the live hypotheses h makes redundant by enumerating
+the at most 2^7 generalizations of h.
+"""
+
+
+class GeneralBoundary:
+    """Insertion-ordered set of general hypotheses with redundancy pruning on insert"""
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        # values bitmask -> Hypothesis, for the hypotheses currently in G
+        self.live = {}
+        # value id -> bitset of candidate slots whose hypothesis constrains that id
+        self.postings = {}
+        self.num_candidates = 0
+        self.pruned = 0
+        self.capped = 0
+        self.peak_size = 0
+
+    def __len__(self):
+        return len(self.live)
+
+    def __iter__(self):
+        return iter(self.live.values())
+
+    def has_superset(self, hypothesis):
+        """True if an earlier candidate constrains every value hypothesis constrains"""
+        if not self.num_candidates:
+            return False
+        if hypothesis.values in self.live:
+            return True
+        mask = -1
+        for code in hypothesis.codes:
+            if code >= 0:
+                mask &= self.postings.get(code, 0)
+                if not mask:
+                    return False
+        return True
+
+    def add(self, hypothesis):
+        """Insert a candidate; returns True if it is kept in the boundary"""
+        slot = self.num_candidates
+        redundant = self.has_superset(hypothesis)
+
+        # Index every candidate: anything below a discarded candidate is also below
+        # whatever made it redundant, so the postings never need deleting from
+        bit = 1 << slot
+        for code in hypothesis.codes:
+            if code >= 0:
+                self.postings[code] = self.postings.get(code, 0) | bit
+        self.num_candidates += 1
+
+        if redundant:
+            self.pruned += 1
+            # An equal hypothesis already in G is redundant against this one too
+            if self.live.pop(hypothesis.values, None) is not None:
+                self.pruned += 1
+            return False
+
+        # Drop live hypotheses that are generalizations of the new one
+        values = hypothesis.values
+        sub = values
+        while True:
+            sub = (sub - 1) & values
+            if self.live.pop(sub, None) is not None:
+                self.pruned += 1
+            if not sub:
+                break
+
+        if self.max_size is not None and len(self.live) >= self.max_size:
+            self.capped += 1
+            return False
+        self.live[values] = hypothesis
+        self.peak_size = max(self.peak_size, len(self.live))
+        return True
+
+    def hypotheses(self):
+        """Boundary contents in insertion order"""
+        return list(self.live.values())
+
+    def stats(self):
+        """Telemetry for the last boundary build"""
+        return {
+            'size': len(self.live),
+            'peak_size': self.peak_size,
+            'candidates': self.num_candidates,
+            'pruned': self.pruned,
+            'capped': self.capped,
+        }
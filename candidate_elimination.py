@@ -4,40 +4,184 @@ This module implements the Candidate Elimination algorithm to learn legal case p
 from training data and make predictions about whether legal action is needed.
 """
 
-import pandas as pd
+import numpy as np
 import copy
+import itertools
+import os
+import subprocess
+import sys
+import time
+
+from case_index import CaseIndex, get_case_index
+from case_store import CaseStore, is_case_store
+from boundary import GeneralBoundary
+from hypothesis import ANY, EMPTY, Hypothesis, HypothesisSpace
+from ingest import iter_examples, iter_rows
+from metrics import observe_stage, stage_timer
+from model_registry import ModelRegistry
+from model_store import file_hash, load_snapshot, save_snapshot, snapshot_path_for
+from guidance import GUIDANCE_TEMPLATES
+from pattern_scores import PatternScores
+from prediction_cache import PredictionCache
+from prediction_result import PredictionResult
+import training_log
+from vocabulary import UNSEEN_CODE, VOCABULARY
+
+# pandas is imported only by the DataFrame entry points (load_cases, train_frame, batch
+# encoding), so workers that load a snapshot and predict never pay for it
 
 def load_cases(path):
+    if is_case_store(path):
+        return CaseStore(path).to_frame()
+    import pandas as pd
     return pd.read_csv(path)
 
+def is_frame(data):
+    """Whether data is a DataFrame, without importing pandas to find out"""
+    pd = sys.modules.get('pandas')
+    return pd is not None and isinstance(data, pd.DataFrame)
+
+def load_case_index(path):
+    """Stream a case CSV (or map a case store) straight into a CaseIndex without building a DataFrame"""
+    if is_case_store(path):
+        return CaseIndex.from_store(CaseStore(path))
+    rows = iter_rows(path)
+    header = next(rows, ())
+    return CaseIndex.from_rows(header, rows)
+
+# Nearest cases consulted when nothing matches exactly, and how similar the closest must be
+NEIGHBOR_COUNT = 5
+MIN_NEIGHBOR_SIMILARITY = 0.5
+# Dataset lookups don't grade their confidence
+LOOKUP_CONFIDENCE = "Medium"
+
 def predict_legal_issue(case_dict, dataset):
-    # Match closest row from dataset (simulate CE for now)
-    for _, row in dataset.iterrows():
-        if all(str(row.get(k, "")).lower() == v.lower() for k, v in case_dict.items() if k in row):
-            return row["Legal Issue"], get_guidance(row["Case Type"])
-    return "No", "Try mediation or informal resolution."
+    # Match first row from dataset (simulate CE for now); dataset may be a DataFrame or a CaseIndex
+    index = get_case_index(dataset)
+    match = index.lookup(case_dict)
+    if match is not None:
+        legal_issue, case_type = match
+        return PredictionResult(legal_issue, get_guidance(case_type), LOOKUP_CONFIDENCE)
+    return predict_from_neighbors(case_dict, index.nearest(case_dict, NEIGHBOR_COUNT))
+
+def predict_from_neighbors(case_dict, neighbors):
+    """Similarity-weighted vote of the nearest historical cases"""
+    neighbors = [n for n in neighbors if n["similarity"] >= MIN_NEIGHBOR_SIMILARITY]
+    if not neighbors:
+        return PredictionResult("No", "Try mediation or informal resolution.", LOOKUP_CONFIDENCE)
+    weights = [n["similarity"] * n["cases"] for n in neighbors]
+    rate = sum(w * n["legal_issue_rate"] for w, n in zip(weights, neighbors)) / sum(weights)
+    case_type = VOCABULARY.canonical("Case Type", case_dict.get("Case Type")) or neighbors[0]["case_type"]
+    num_cases = sum(n["cases"] for n in neighbors)
+    return PredictionResult(
+        "Yes" if rate >= 0.5 else "No",
+        f"{get_guidance(case_type)} (Based on {num_cases} similar past cases, {rate:.0%} needed legal action.)",
+        LOOKUP_CONFIDENCE)
+
+LOOKUP_GUIDANCE = {
+    "Civil": "Consult a civil lawyer or file a civil suit.",
+    "Criminal": "Approach the police or file an FIR.",
+    "Consumer": "File a case at your local Consumer Court.",
+    "Family": "Consult a family court advocate.",
+    "Environmental": "File a complaint with NGT.",
+    "PIL": "File a PIL in High Court or Supreme Court."
+}
 
 def get_guidance(case_type):
-    guidance_map = {
-        "Civil": "Consult a civil lawyer or file a civil suit.",
-        "Criminal": "Approach the police or file an FIR.",
-        "Consumer": "File a case at your local Consumer Court.",
-        "Family": "Consult a family court advocate.",
-        "Environmental": "File a complaint with NGT.",
-        "PIL": "File a PIL in High Court or Supreme Court."
-    }
-    return guidance_map.get(case_type, "Consult a legal expert.")
+    return LOOKUP_GUIDANCE.get(case_type, "Consult a legal expert.")
+
+# Training data shipped alongside this module
+DEFAULT_DATASET = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'minimal_legal_cases.csv')
+
+# Per-prediction stage timers, bound once so the hot path skips the label lookup
+COVERAGE_TIMER = stage_timer("predict.coverage")
+PATTERN_SCORE_TIMER = stage_timer("predict.pattern_score")
+GUIDANCE_TIMER = stage_timer("predict.guidance")
+
+# Integer codes used by the vectorized batch path
+WILDCARD_CODE = -1
+UNKNOWN_CODE = -2
 
 class CandidateElimination:
-    def __init__(self):
+    def __init__(self, max_general_hypotheses=None, cache_size=None, precompute=False, fallback_patterns=True):
         self.attributes = [
             'Case Type', 'Sub-Type', 'Value Involved', 
             'Agreement Signed', 'Notice Given', 
             'Consumer Complaint', 'Matrimonial Issue'
         ]
-        self.specific_hypothesis = None
-        self.general_hypotheses = None
+        # Every value is learned and matched in its canonical spelling
+        self.coders = [VOCABULARY.column(attribute) for attribute in self.attributes]
+        self.target_coder = VOCABULARY.column('Legal Issue')
+        self.space = HypothesisSpace(len(self.attributes))
+        self._specific = None
+        self._general = None
+        self._general_lists = None
+        self._attribute_values = None
+        self._possible_ids = None
+        self.vocabularies = None
+        # Optional LRU of (prediction, guidance) per case, cleared whenever the model changes
+        self.prediction_cache = PredictionCache(cache_size, precompute) if cache_size else None
+        # How often each attribute value needed legal action in training, for the pattern score
+        self.pattern_scores = PatternScores(self.coders)
+        self.guidance_templates = GUIDANCE_TEMPLATES
+        self.source_hash = None
+        # Optional cap on |G| and counters describing how the boundary evolved
+        self.max_general_hypotheses = max_general_hypotheses
+        self.boundary_stats = self.empty_boundary_stats()
+        # Whether a collapsed G boundary is replaced by the hand-written legal patterns
+        self.fallback_patterns = fallback_patterns
         self.trained = False
+    
+    @property
+    def specific_hypothesis(self):
+        """Specific boundary S in list form"""
+        return None if self._specific is None else self.space.decode(self._specific)
+    
+    @specific_hypothesis.setter
+    def specific_hypothesis(self, hypothesis):
+        self._specific = None if hypothesis is None else self.space.as_hypothesis(hypothesis)
+        self.invalidate_predictions()
+    
+    @property
+    def general_hypotheses(self):
+        """General boundary G in list form"""
+        if self._general is None:
+            return None
+        if self._general_lists is None:
+            self._general_lists = [self.space.decode(h) for h in self._general]
+        return self._general_lists
+    
+    @general_hypotheses.setter
+    def general_hypotheses(self, hypotheses):
+        self._general = None if hypotheses is None else [self.space.as_hypothesis(h) for h in hypotheses]
+        self._general_lists = None
+        self.invalidate_predictions()
+    
+    @property
+    def attribute_values(self):
+        """Attribute values seen in training, per attribute in first-seen order"""
+        return self._attribute_values
+    
+    @attribute_values.setter
+    def attribute_values(self, values):
+        self._attribute_values = values
+        self._possible_ids = None
+    
+    def intern_spellings(self, attribute_index, values):
+        """Add values to the shared vocabulary of an attribute; returns their canonical spellings"""
+        coder = self.coders[attribute_index]
+        return [coder.spelling(value) for value in values]
+        
+    def example_codes(self, example, add=False):
+        """Shared vocabulary codes of an example's values"""
+        try:
+            # Fast path: every value already resolved, one dictionary hit each
+            codes = [coder.raw_codes[val] for coder, val in zip(self.coders, example)]
+            if not (add and UNSEEN_CODE in codes):
+                return codes
+        except (KeyError, TypeError):
+            pass
+        return [coder.code(val, add) for coder, val in zip(self.coders, example)]
         
     def initialize_hypotheses(self, num_attributes):
         """Initialize specific and general hypotheses"""
@@ -46,20 +190,19 @@ class CandidateElimination:
         
         # General hypotheses start with most general (all '?')
         self.general_hypotheses = [['?'] * num_attributes]
+        self.boundary_stats = self.empty_boundary_stats()
+    
+    def encode_example(self, example, add=False):
+        """Encode an example; values are interned only when learning from it"""
+        return self.space.as_hypothesis(example, add)
         
     def is_consistent(self, hypothesis, example, target):
         """Check if hypothesis is consistent with example"""
-        for i, (h_val, e_val) in enumerate(zip(hypothesis, example)):
-            if h_val != '?' and h_val != '∅' and h_val != e_val:
-                return False
-        return True
+        return self.space.as_hypothesis(hypothesis).covers(self.encode_example(example))
     
     def is_more_general(self, h1, h2):
         """Check if h1 is more general than h2"""
-        for i, (v1, v2) in enumerate(zip(h1, h2)):
-            if v2 != '∅' and v1 != '?' and v1 != v2:
-                return False
-        return True
+        return self.space.as_hypothesis(h1).more_general_than(self.space.as_hypothesis(h2))
     
     def is_more_specific(self, h1, h2):
         """Check if h1 is more specific than h2"""
@@ -67,55 +210,90 @@ class CandidateElimination:
     
     def generalize_specific(self, specific, example):
         """Generalize specific hypothesis to cover positive example"""
-        new_specific = copy.deepcopy(specific)
-        for i, (s_val, e_val) in enumerate(zip(specific, example)):
-            if s_val == '∅':
-                new_specific[i] = e_val
-            elif s_val != e_val:
-                new_specific[i] = '?'
-        return new_specific
+        specific = self.space.as_hypothesis(specific)
+        example = self.encode_example(example, add=True)
+        codes = []
+        for s_code, e_code in zip(specific.codes, example.codes):
+            if s_code == EMPTY:
+                codes.append(e_code)
+            elif s_code != e_code:
+                codes.append(ANY)
+            else:
+                codes.append(s_code)
+        codes.extend(specific.codes[len(codes):])
+        return Hypothesis(codes)
     
     def specialize_general(self, general, example):
         """Specialize general hypothesis to exclude negative example"""
-        specialized = []
+        return list(self.iter_specializations(general, example))
+    
+    def iter_specializations(self, general, example):
+        """Yield the specializations of general that exclude the negative example"""
+        example = self.encode_example(example, add=True)
+        possible_ids = self.get_possible_ids()
         for hypothesis in general:
-            for i, (h_val, e_val) in enumerate(zip(hypothesis, example)):
-                if h_val == '?' and e_val is not None:
+            hypothesis = self.space.as_hypothesis(hypothesis)
+            for i, (h_code, e_code) in enumerate(zip(hypothesis.codes, example.codes)):
+                if h_code == ANY and self.space.values[e_code] is not None:
                     # Create specialized versions
                     # Get all possible values for this attribute from training data
-                    possible_values = self.get_possible_values(i, e_val)
-                    for val in possible_values:
-                        new_h = copy.deepcopy(hypothesis)
-                        new_h[i] = val
-                        specialized.append(new_h)
-                elif h_val == e_val:
+                    for code in possible_ids[i]:
+                        if code != e_code:
+                            yield hypothesis.replace(i, code)
+                elif h_code == e_code:
                     # This hypothesis covers the negative example, remove it
                     break
             else:
                 # If we didn't break, keep the original hypothesis
-                specialized.append(hypothesis)
-        return specialized
+                yield hypothesis
     
     def get_possible_values(self, attribute_index, exclude_value):
         """Get possible values for an attribute excluding the given value"""
-        if not hasattr(self, 'training_data'):
+        if self.attribute_values is None:
             return []
-        
-        attribute_name = self.attributes[attribute_index]
-        unique_values = self.training_data[attribute_name].unique()
-        return [val for val in unique_values if val != exclude_value and pd.notna(val)]
+        return [val for val in self.attribute_values[attribute_index] if val != exclude_value]
+    
+    def get_possible_ids(self):
+        """Interned ids of the attribute values seen in training, per attribute"""
+        if self._possible_ids is None:
+            values = self.attribute_values or [{} for _ in self.attributes]
+            self._possible_ids = [
+                [self.space.intern(i, val) for val in attribute_values]
+                for i, attribute_values in enumerate(values)
+            ]
+        return self._possible_ids
+    
+    def add_attribute_values(self, examples):
+        """Record attribute values seen in training, in first-seen order"""
+        if self.attribute_values is None:
+            self.attribute_values = [{} for _ in self.attributes]
+        possible_ids = self.get_possible_ids()
+        for example, _ in examples:
+            for i, (values, val) in enumerate(zip(self.attribute_values, example)):
+                if val is not None and val not in values:
+                    values[val] = None
+                    possible_ids[i].append(self.space.intern(i, val))
     
     def remove_inconsistent_hypotheses(self, hypotheses, example, target):
         """Remove hypotheses that are inconsistent with the example"""
-        return [h for h in hypotheses if self.is_consistent(h, example, target)]
+        example = self.encode_example(example)
+        return [h for h in hypotheses if self.space.as_hypothesis(h).covers(example)]
     
     def remove_redundant_hypotheses(self, hypotheses):
         """Remove hypotheses that are more general than others"""
+        hypotheses = [self.space.as_hypothesis(h) for h in hypotheses]
+        if not any(h.empty for h in hypotheses):
+            boundary = GeneralBoundary()
+            for h in hypotheses:
+                boundary.add(h)
+            return boundary.hypotheses()
+        
+        # '∅' entries break the subset test the boundary index relies on; compare pairwise
         filtered = []
         for i, h1 in enumerate(hypotheses):
             is_redundant = False
             for j, h2 in enumerate(hypotheses):
-                if i != j and self.is_more_general(h1, h2):
+                if i != j and h1.more_general_than(h2):
                     is_redundant = True
                     break
             if not is_redundant:
@@ -123,94 +301,231 @@ class CandidateElimination:
         return filtered
     
     def train(self, csv_file_path):
-        """Train the Candidate Elimination algorithm on legal case data"""
+        """Train the Candidate Elimination algorithm on legal case data, streaming the CSV"""
+        self.training_data = None
+        return self.fit_examples(lambda: (
+            (self.to_example(example), self.to_target(target), case_num)
+            for example, target, case_num in iter_examples(csv_file_path, self.attributes)
+        ))
+    
+    def train_frame(self, data):
+        """Train the Candidate Elimination algorithm on a DataFrame of legal cases"""
+        self.training_data = data
+        return self.fit_examples(lambda: self.iter_frame_examples(data))
+    
+    def iter_frame_examples(self, data):
+        """Yield (example, target, case number) training triples from a DataFrame"""
+        columns = [data[attr].tolist() for attr in self.attributes]
+        targets = data['Legal Issue'].tolist()
+        for case_num, (values, target) in enumerate(zip(zip(*columns), targets), 1):
+            yield self.to_example(values), self.to_target(target), case_num
+    
+    def fit_examples(self, read_examples):
+        """Train from a re-readable source of (example, target, case number) triples
+        
+        The source is read twice: positives are learned on the first pass while the
+        attribute values are collected, negatives on the second, so memory stays
+        bounded by the vocabularies and boundaries rather than the dataset.
+        """
         try:
-            # Load training data
-            self.training_data = pd.read_csv(csv_file_path)
-            
             # Initialize hypotheses
             num_attributes = len(self.attributes)
             self.initialize_hypotheses(num_attributes)
+            self.attribute_values = None
+            self.pattern_scores.reset()
             
-            print("🎯 Training Candidate Elimination Algorithm...")
-            print(f"📊 Training on {len(self.training_data)} legal cases")
-            print("-" * 60)
-            
-            # Separate positive and negative examples for better processing
-            positive_examples = []
-            negative_examples = []
-            
-            for index, row in self.training_data.iterrows():
-                example = [
-                    row['Case Type'], row['Sub-Type'], row['Value Involved'],
-                    row['Agreement Signed'], row['Notice Given'],
-                    row['Consumer Complaint'], row['Matrimonial Issue']
-                ]
-                
-                # Convert NaN to None for easier handling
-                example = [None if pd.isna(val) else str(val) for val in example]
-                target = str(row['Legal Issue']) if pd.notna(row['Legal Issue']) else 'No'
-                
-                if target == 'Yes':
-                    positive_examples.append((example, index + 1))
-                else:
-                    negative_examples.append((example, index + 1))
-            
-            print(f"📊 Found {len(positive_examples)} positive and {len(negative_examples)} negative examples")
-            print("-" * 60)
+            training_log.info("train_start", "🎯 Training Candidate Elimination Algorithm...")
+            tracing = training_log.tracing()
             
             # Process positive examples first
-            print("🟢 Processing positive examples...")
-            for example, case_num in positive_examples:
-                print(f"Processing case {case_num}: {example} -> Yes")
+            training_log.info("positive_pass", "🟢 Processing positive examples...")
+            started = time.perf_counter()
+            progress = training_log.Progress("positive pass")
+            num_positive = 0
+            num_negative = 0
+            for example, target, case_num in read_examples():
+                # Record values in row order, matching the order of the CSV columns' unique values
+                self.add_attribute_values([(example, case_num)])
+                self.pattern_scores.count(self.example_codes(example, add=True), target == 'Yes')
+                if target != 'Yes':
+                    num_negative += 1
+                    continue
+                num_positive += 1
                 
-                # Generalize specific hypothesis
-                self.specific_hypothesis = self.generalize_specific(self.specific_hypothesis, example)
+                self.learn_positive(example)
                 
-                # Remove inconsistent general hypotheses
-                self.general_hypotheses = self.remove_inconsistent_hypotheses(
-                    self.general_hypotheses, example, 'Yes'
-                )
-                
-                print(f"   Specific: {self.specific_hypothesis}")
-                print(f"   General:  {len(self.general_hypotheses)} hypotheses")
-                print()
+                if tracing:
+                    training_log.trace(f"Processing case {case_num}: {example} -> Yes\n"
+                                       f"   Specific: {self.specific_hypothesis}\n"
+                                       f"   General:  {len(self._general)} hypotheses\n")
+                if progress.due(num_positive + num_negative):
+                    progress.report(num_positive + num_negative, general_hypotheses=len(self._general))
+            
+            self.pattern_scores.flush()
+            observe_stage("train.positive_pass", started)
+            training_log.info("examples_found",
+                              f"📊 Found {num_positive} positive and {num_negative} negative examples "
+                              f"in {num_positive + num_negative} legal cases",
+                              positive=num_positive, negative=num_negative)
             
             # Process negative examples
-            print("🔴 Processing negative examples...")
-            for example, case_num in negative_examples:
-                print(f"Processing case {case_num}: {example} -> No")
+            training_log.info("negative_pass", "🔴 Processing negative examples...")
+            negatives_started = time.perf_counter()
+            progress = training_log.Progress("negative pass")
+            num_learned = 0
+            for example, target, case_num in read_examples():
+                if target == 'Yes':
+                    continue
+                num_learned += 1
                 
-                # Check if specific hypothesis is consistent
-                if not self.is_consistent(self.specific_hypothesis, example, 'No'):
-                    print(f"   ✅ Specific hypothesis correctly excludes this negative example")
-                else:
-                    print(f"   ⚠️  Specific hypothesis incorrectly covers this negative example")
+                if tracing:
+                    # Check if specific hypothesis is consistent
+                    if not self.is_consistent(self._specific, example, 'No'):
+                        check = "✅ Specific hypothesis correctly excludes this negative example"
+                    else:
+                        check = "⚠️  Specific hypothesis incorrectly covers this negative example"
+                    old_count = len(self._general)
                 
-                # Specialize general hypotheses
-                old_count = len(self.general_hypotheses)
-                self.general_hypotheses = self.specialize_general(self.general_hypotheses, example)
-                self.general_hypotheses = self.remove_redundant_hypotheses(self.general_hypotheses)
+                self.learn_negative(example)
                 
-                print(f"   General hypotheses: {old_count} -> {len(self.general_hypotheses)}")
-                print()
+                if tracing:
+                    training_log.trace(f"Processing case {case_num}: {example} -> No\n"
+                                       f"   {check}\n"
+                                       f"   General hypotheses: {old_count} -> {len(self._general)}\n")
+                if progress.due(num_learned):
+                    progress.report(num_learned, general_hypotheses=len(self._general),
+                                    peak_general_hypotheses=self.boundary_stats['peak_size'])
+            
+            observe_stage("train.negative_pass", negatives_started)
             
             # If we have no general hypotheses, create some basic ones based on the specific hypothesis
-            if len(self.general_hypotheses) == 0:
-                print("🔧 No general hypotheses remain. Creating fallback patterns...")
+            if len(self._general) == 0 and self.fallback_patterns:
+                training_log.info("fallback", "🔧 No general hypotheses remain. Creating fallback patterns...")
                 self.create_fallback_hypotheses()
             
             self.trained = True
-            print("✅ Training completed!")
-            print(f"📋 Final Specific Hypothesis: {self.specific_hypothesis}")
-            print(f"📋 Final General Hypotheses: {len(self.general_hypotheses)} patterns")
+            self.refresh_predictions()
+            observe_stage("train", started)
+            elapsed = time.perf_counter() - started
+            num_examples = num_positive + num_negative
+            training_log.info("train_complete",
+                              f"✅ Training completed in {elapsed:.2f}s "
+                              f"({num_examples / elapsed if elapsed else 0:,.0f} examples/s)",
+                              examples=num_examples, seconds=round(elapsed, 3))
+            training_log.info("specific_hypothesis", f"📋 Final Specific Hypothesis: {self.specific_hypothesis}",
+                              specific_hypothesis=self.specific_hypothesis)
+            training_log.info("general_hypotheses", f"📋 Final General Hypotheses: {len(self._general)} patterns",
+                              general_hypotheses=len(self._general))
+            training_log.info("general_boundary",
+                              f"📋 G Boundary: peak {self.boundary_stats['peak_size']}, "
+                              f"{self.boundary_stats['pruned']} pruned, {self.boundary_stats['capped']} capped",
+                              **self.boundary_stats)
             
             return True
             
         except Exception as e:
-            print(f"❌ Error during training: {str(e)}")
+            training_log.error("train_failed", f"❌ Error during training: {str(e)}", error=str(e))
             return False
     
+    def to_example(self, values):
+        """Convert raw training values to an example of canonical spellings, with None for missing"""
+        return [coder.spelling(val) for coder, val in zip(self.coders, values)]
+    
+    def to_target(self, target):
+        """Canonical Legal Issue label; missing labels count as 'No'"""
+        return self.target_coder.canonical(target) or 'No'
+    
+    def canonical_example(self, case_data):
+        """Canonical spellings of a case to predict; values never seen stay as given, uninterned"""
+        try:
+            # Fast path: every value already resolved, one dictionary hit each
+            return [coder.spellings[val] for coder, val in zip(self.coders, case_data)]
+        except (KeyError, TypeError):
+            return [coder.canonical(val) for coder, val in zip(self.coders, case_data)]
+    
+    def learn_positive(self, example):
+        """Fold a positive example into the boundaries"""
+        example = self.encode_example(example, add=True)
+        
+        # Generalize specific hypothesis
+        self._specific = self.generalize_specific(self._specific, example)
+        
+        # Remove inconsistent general hypotheses
+        self.general_hypotheses = self.remove_inconsistent_hypotheses(self._general, example, 'Yes')
+    
+    def learn_negative(self, example):
+        """Fold a negative example into the boundaries"""
+        if any(h.empty for h in self._general):
+            self.general_hypotheses = self.remove_redundant_hypotheses(self.specialize_general(self._general, example))
+            return
+        
+        # Specialize general hypotheses, pruning redundant ones as they are generated
+        boundary = GeneralBoundary(self.max_general_hypotheses)
+        for hypothesis in self.iter_specializations(self._general, example):
+            boundary.add(hypothesis)
+        self.general_hypotheses = boundary.hypotheses()
+        
+        stats = boundary.stats()
+        totals = self.boundary_stats
+        totals['negatives'] += 1
+        totals['candidates'] += stats['candidates']
+        totals['pruned'] += stats['pruned']
+        totals['capped'] += stats['capped']
+        totals['peak_size'] = max(totals['peak_size'], stats['peak_size'])
+        totals['size'] = stats['size']
+    
+    def empty_boundary_stats(self):
+        """Fresh G-boundary telemetry counters"""
+        return {'size': 0, 'peak_size': 0, 'negatives': 0, 'candidates': 0, 'pruned': 0, 'capped': 0}
+    
+    def update(self, examples):
+        """Incrementally learn new labelled examples without replaying the training set
+        
+        examples is a DataFrame with the attribute columns and 'Legal Issue', or an
+        iterable of (case_data, target) pairs. Returns (positive count, negative count).
+        """
+        if is_frame(examples):
+            triples = list(self.iter_frame_examples(examples))
+        else:
+            triples = [
+                (self.to_example(case_data), self.to_target(target), case_num)
+                for case_num, (case_data, target) in enumerate(examples, 1)
+            ]
+        positive_examples = [(example, n) for example, target, n in triples if target == 'Yes']
+        negative_examples = [(example, n) for example, target, n in triples if target != 'Yes']
+        
+        if self._specific is None:
+            self.initialize_hypotheses(len(self.attributes))
+        self.add_attribute_values([(example, n) for example, _, n in triples])
+        for example, target, _ in triples:
+            self.pattern_scores.add(self.example_codes(example, add=True), target == 'Yes')
+        
+        # Same order as train: positives first, then negatives
+        for example, _ in positive_examples:
+            self.learn_positive(example)
+        for example, _ in negative_examples:
+            self.learn_negative(example)
+        
+        if len(self._general) == 0 and self.fallback_patterns:
+            self.create_fallback_hypotheses()
+        
+        self.trained = True
+        self.refresh_predictions()
+        return len(positive_examples), len(negative_examples)
+    
+    def copy(self):
+        """An independent copy to update() while this one keeps serving predictions"""
+        model = copy.copy(self)
+        # The hypothesis space and value coders only ever grow, so the copy shares them
+        if self._attribute_values is not None:
+            model._attribute_values = [dict(values) for values in self._attribute_values]
+        model._possible_ids = None
+        model.pattern_scores = self.pattern_scores.copy()
+        model.boundary_stats = dict(self.boundary_stats)
+        if self.prediction_cache is not None:
+            model.prediction_cache = PredictionCache(self.prediction_cache.max_size, self.prediction_cache.precompute)
+        return model
+    
     def create_fallback_hypotheses(self):
         """Create fallback hypotheses when no general hypotheses remain"""
         # Create hypotheses based on common legal patterns observed in the data
@@ -230,162 +545,248 @@ class CandidateElimination:
         ]
         
         self.general_hypotheses = fallback_patterns
-        print(f"   Created {len(fallback_patterns)} fallback hypotheses based on legal patterns")
+        training_log.info("fallback_created",
+                          f"   Created {len(fallback_patterns)} fallback hypotheses based on legal patterns",
+                          general_hypotheses=len(fallback_patterns))
+    
+    def enable_prediction_cache(self, max_size=16384, precompute=False):
+        """Serve repeated cases from an LRU cache, optionally filled for every known combination"""
+        self.prediction_cache = PredictionCache(max_size, precompute)
+        self.refresh_predictions()
+    
+    def invalidate_predictions(self):
+        """Drop cached predictions after the boundaries or pattern weights change"""
+        cache = getattr(self, 'prediction_cache', None)
+        if cache is not None:
+            cache.clear()
+    
+    def refresh_predictions(self):
+        """Clear the cache and, in precompute mode, fill it for every combination of known values"""
+        cache = self.prediction_cache
+        if cache is None:
+            return
+        cache.clear()
+        if not (cache.precompute and self.trained and self.attribute_values):
+            return
+        combinations = 1
+        for values in self.attribute_values:
+            combinations *= max(len(values), 1)
+        if combinations > cache.max_size:
+            # Too many to hold at once; entries fill lazily instead
+            return
+        for case_data in itertools.product(*self.attribute_values):
+            cache.put(case_data, self.compute_prediction(list(case_data)))
     
     def predict(self, case_data):
         """Predict whether legal action is needed for a given case"""
+        cache = self.prediction_cache
+        if cache is None or not self.trained:
+            return self.compute_prediction(case_data)
+        try:
+            key = tuple(case_data)
+            result = cache.get(key)
+        except TypeError:
+            # Unhashable values can't be cached
+            return self.compute_prediction(case_data)
+        if result is None:
+            result = self.compute_prediction(case_data)
+            if not result.failed:
+                cache.put(key, result)
+        return result
+    
+    def compute_prediction(self, case_data):
+        """Score a case in one pass, without the cache; returns a PredictionResult"""
         if not self.trained:
-            return "Error: Model not trained", "Please train the model first."
+            return PredictionResult("Error: Model not trained", "Please train the model first.")
         
         try:
-            # Convert case data to the same format as training data
-            example = [str(val) if val is not None else None for val in case_data]
+            started = time.perf_counter()
+            # Convert case data to the same canonical spellings as the training data
+            example = self.canonical_example(case_data)
             
             # Check if specific hypothesis covers the example
-            specific_covers = self.is_consistent(self.specific_hypothesis, example, 'Yes')
+            encoded = self.encode_example(example)
+            specific_covers = self._specific.covers(encoded)
             
-            # Check how many general hypotheses cover the example
-            matching_general = [
-                h for h in self.general_hypotheses 
-                if self.is_consistent(h, example, 'Yes')
-            ]
+            # Count the general hypotheses that cover the example
+            general = self._general
+            matching_patterns = len([h for h in general if h.covers(encoded)])
             
-            general_coverage = len(matching_general) / len(self.general_hypotheses) if self.general_hypotheses else 0
+            general_coverage = matching_patterns / len(general) if general else 0
+            scored = time.perf_counter()
+            COVERAGE_TIMER.observe(scored - started)
             
             # Enhanced decision logic with pattern-based scoring
             pattern_score = self.calculate_pattern_score(example)
+            PATTERN_SCORE_TIMER.observe_since(scored)
             
-            # Combine different scoring methods
-            if specific_covers and general_coverage > 0.5 and pattern_score > 0.7:
-                prediction = "Yes"
-                confidence = "High"
-            elif (specific_covers and general_coverage > 0.3) or pattern_score > 0.6:
-                prediction = "Yes"
-                confidence = "Medium"
-            elif general_coverage > 0.2 or pattern_score > 0.4:
-                prediction = "Yes"
-                confidence = "Low"
-            elif general_coverage > 0.1 or pattern_score > 0.2:
-                prediction = "Maybe"
-                confidence = "Medium"
-            else:
-                prediction = "No"
-                confidence = "High"
+            prediction, confidence = self.decide(specific_covers, general_coverage, pattern_score)
             
             # Generate guidance based on case type and matching patterns
-            guidance = self.generate_guidance(case_data, prediction, confidence, matching_general)
+            guided = time.perf_counter()
+            guidance = self.guidance_templates.render(example, prediction, confidence, matching_patterns, pattern_score)
+            GUIDANCE_TIMER.observe_since(guided)
             
-            return prediction, guidance
+            return PredictionResult(prediction, guidance, confidence, pattern_score,
+                                    general_coverage, specific_covers, matching_patterns)
             
         except Exception as e:
-            return "Error", f"Prediction failed: {str(e)}"
+            return PredictionResult("Error", f"Prediction failed: {str(e)}")
+    
+    def decide(self, specific_covers, general_coverage, pattern_score):
+        """Combine the coverage and pattern scores into (prediction, confidence)"""
+        if specific_covers and general_coverage > 0.5 and pattern_score > 0.7:
+            return "Yes", "High"
+        if (specific_covers and general_coverage > 0.3) or pattern_score > 0.6:
+            return "Yes", "Medium"
+        if general_coverage > 0.2 or pattern_score > 0.4:
+            return "Yes", "Low"
+        if general_coverage > 0.1 or pattern_score > 0.2:
+            return "Maybe", "Medium"
+        return "No", "High"
     
     def calculate_pattern_score(self, example):
-        """Calculate a pattern-based score for legal action likelihood"""
-        score = 0.0
-        case_type = example[0] if example else None
-        sub_type = example[1] if len(example) > 1 else None
-        value = example[2] if len(example) > 2 else None
-        agreement = example[3] if len(example) > 3 else None
-        notice = example[4] if len(example) > 4 else None
-        consumer = example[5] if len(example) > 5 else None
-        matrimonial = example[6] if len(example) > 6 else None
-        
-        # Case type scoring (based on training data patterns)
-        case_type_scores = {
-            'Criminal': 0.9,  # Almost always legal action needed
-            'Environmental': 0.8,  # Usually legal action needed
-            'PIL': 0.8,  # Usually legal action needed
-            'Family': 0.7,  # Often legal action needed
-            'Civil': 0.4,  # Mixed results
-            'Consumer': 0.3  # Often resolved without legal action
-        }
-        
-        if case_type in case_type_scores:
-            score += case_type_scores[case_type] * 0.4
-        
-        # Sub-type specific patterns
-        high_action_subtypes = ['Domestic Violence', 'Dowry Harassment', 'Theft', 'Pollution', 'Illegal Mining']
-        if sub_type in high_action_subtypes:
-            score += 0.2
-        
-        # Value-based scoring
-        if value == '>50k' or value == '>1L':
-            score += 0.15
-        elif value == '10k-50k' or value == '10k–1L':
-            score += 0.1
-        elif value == '<10k':
-            score += 0.05
-        
-        # Agreement and notice patterns
-        if agreement == 'Yes':
-            score += 0.1
-        if notice == 'Yes':
-            score += 0.1
-        
-        # Consumer complaint factor
-        if consumer == 'Yes':
-            score += 0.05
-        
-        # Matrimonial issue factor
-        if matrimonial == 'Yes':
-            score += 0.1
-        
-        return min(score, 1.0)  # Cap at 1.0
+        """Calculate a pattern-based score for legal action likelihood from the training counts"""
+        return self.pattern_scores.score(self.example_codes(example))
     
-    def generate_guidance(self, case_data, prediction, confidence, matching_patterns=None):
-        """Generate personalized legal guidance"""
-        case_type = case_data[0] if case_data else "Unknown"
-        sub_type = case_data[1] if len(case_data) > 1 else "Unknown"
-        value = case_data[2] if len(case_data) > 2 else None
+    def encode_cases(self, cases):
+        """Encode a DataFrame or 2-D array of cases as integer codes per attribute"""
+        import pandas as pd
+        if isinstance(cases, pd.DataFrame):
+            if all(attr in cases.columns for attr in self.attributes):
+                cases = cases[self.attributes]
+            columns = [cases.iloc[:, i].to_numpy(dtype=object) for i in range(len(self.attributes))]
+        else:
+            rows = np.asarray(cases, dtype=object)
+            if rows.ndim != 2 or rows.shape[1] < len(self.attributes):
+                raise ValueError(f"Expected a 2-D array with {len(self.attributes)} attribute columns")
+            columns = [rows[:, i] for i in range(len(self.attributes))]
         
-        guidance_map = {
-            "Civil": "Consider consulting a civil lawyer and filing a suit in district court.",
-            "Criminal": "Approach the nearest police station to file an FIR immediately.",
-            "Consumer": "Submit a complaint online via the National Consumer Helpline.",
-            "Family": "Consult a family court advocate for divorce, custody, or maintenance matters.",
-            "Environmental": "File a complaint with State Pollution Board or National Green Tribunal.",
-            "PIL": "Consult a legal NGO or advocate to draft a public interest litigation."
-        }
+        # Values the boundary and pattern tables never mention share the UNKNOWN_CODE
+        codes = np.empty((len(columns[0]), len(self.attributes)), dtype=np.int32)
+        for i, column in enumerate(columns):
+            factor_codes, uniques = pd.factorize(column)
+            coder = self.coders[i]
+            vocabulary = self.vocabularies[i]
+            lookup = np.array([vocabulary.get(coder.canonical(u), UNKNOWN_CODE) for u in uniques]
+                              + [vocabulary.get(None, UNKNOWN_CODE)], dtype=np.int32)
+            codes[:, i] = lookup[factor_codes]  # factorize marks missing as -1, the last lookup slot
+        return codes
+    
+    def build_vocabularies(self):
+        """Assign integer codes to every value used by the hypotheses and pattern tables"""
+        self.vocabularies = [{} for _ in self.attributes]
+        hypotheses = [self.specific_hypothesis] + list(self.general_hypotheses)
+        for i, vocabulary in enumerate(self.vocabularies):
+            # Missing (None) gets a code too: it has a pattern weight of its own
+            values = [h[i] for h in hypotheses] + self.pattern_scores.values(i)
+            for value in values:
+                if value not in ('?', '∅') and value not in vocabulary:
+                    vocabulary[value] = len(vocabulary)
+        return self.vocabularies
+    
+    def encode_hypotheses(self, hypotheses):
+        """Encode hypotheses as an integer matrix, with WILDCARD_CODE for '?' and '∅'"""
+        encoded = np.full((len(hypotheses), len(self.attributes)), WILDCARD_CODE, dtype=np.int32)
+        for row, hypothesis in enumerate(hypotheses):
+            for i, value in enumerate(hypothesis):
+                if value not in ('?', '∅'):
+                    encoded[row, i] = self.vocabularies[i].get(value, UNKNOWN_CODE)
+        return encoded
+    
+    def predict_batch(self, cases, chunk_size=4096):
+        """Predict many cases at once; returns (predictions, confidences, pattern_scores) arrays"""
+        if not self.trained:
+            raise RuntimeError("Model not trained")
         
-        base_guidance = guidance_map.get(case_type, "Consult a legal advisor for next steps.")
+        started = time.perf_counter()
+        self.build_vocabularies()
+        codes = self.encode_cases(cases)
+        specific = self.encode_hypotheses([self.specific_hypothesis])[0]
+        general = self.encode_hypotheses(self.general_hypotheses)
         
-        # Add specific sub-type guidance
-        specific_guidance = ""
-        if case_type == "Criminal":
-            if sub_type in ["Domestic Violence", "Dowry Harassment"]:
-                specific_guidance = " Consider contacting women's helpline (1091) for immediate support."
-            elif sub_type == "Theft":
-                specific_guidance = " Gather evidence and witness statements before filing FIR."
-        elif case_type == "Consumer":
-            specific_guidance = " Keep all receipts and communication records as evidence."
-        elif case_type == "Environmental":
-            specific_guidance = " Document environmental damage with photos and videos."
+        # A case is covered when every attribute is a wildcard or equal to the case value
+        specific_covers = ((specific == WILDCARD_CODE) | (codes == specific)).all(axis=1)
+        matching = np.zeros(len(codes), dtype=np.int64)
+        for start in range(0, len(codes), chunk_size):
+            chunk = codes[start:start + chunk_size, None, :]
+            covers = ((general == WILDCARD_CODE) | (general == chunk)).all(axis=2)
+            matching[start:start + chunk_size] = covers.sum(axis=1)
+        general_coverage = matching / len(general) if len(general) else np.zeros(len(codes))
         
-        # Add value-based insights
-        value_insight = ""
-        if value == '>50k' or value == '>1L':
-            value_insight = " High-value case - consider hiring experienced counsel."
-        elif value == '10k-50k' or value == '10k–1L':
-            value_insight = " Medium-value case - cost-benefit analysis recommended."
+        # Pattern score: per-attribute weight lookup, summed in attribute order like calculate_pattern_score
+        pattern_scores = np.zeros(len(codes))
+        for i, vocabulary in enumerate(self.vocabularies):
+            default = self.pattern_scores.defaults[i]
+            # The two trailing defaults serve the negative codes
+            table = np.array([self.pattern_scores.weight(i, value) for value in vocabulary] + [default, default])
+            pattern_scores = pattern_scores + table[codes[:, i]]
+        pattern_scores = np.minimum(pattern_scores, 1.0)
         
-        # Add pattern-based insights
-        pattern_insight = ""
-        if matching_patterns:
-            pattern_count = len(matching_patterns)
-            if pattern_count > 0:
-                pattern_insight = f" (Matches {pattern_count} legal patterns)"
+        # Same decision ladder as predict
+        conditions = [
+            specific_covers & (general_coverage > 0.5) & (pattern_scores > 0.7),
+            (specific_covers & (general_coverage > 0.3)) | (pattern_scores > 0.6),
+            (general_coverage > 0.2) | (pattern_scores > 0.4),
+            (general_coverage > 0.1) | (pattern_scores > 0.2),
+        ]
+        predictions = np.select(conditions, ["Yes", "Yes", "Yes", "Maybe"], default="No")
+        confidences = np.select(conditions, ["High", "Medium", "Low", "Medium"], default="High")
+        observe_stage("predict.batch", started)
+        return predictions, confidences, pattern_scores
+    
+    def generate_guidance(self, case_data, prediction, confidence, matching_patterns=None, pattern_score=None):
+        """Generate personalized legal guidance for a case in canonical spellings"""
+        if pattern_score is None:
+            pattern_score = self.calculate_pattern_score(case_data)
+        if not isinstance(matching_patterns, int):
+            matching_patterns = len(matching_patterns) if matching_patterns else 0
+        return self.guidance_templates.render(case_data, prediction, confidence, matching_patterns, pattern_score)
+    
+    def save(self, path, source_hash=None):
+        """Save the learned state as a versioned snapshot"""
+        save_snapshot(self, path, source_hash if source_hash is not None else self.source_hash)
+    
+    def load(self, path, source_hash=None):
+        """Load a snapshot; returns False if it is missing, stale or from another format version"""
+        if not load_snapshot(self, path, source_hash):
+            return False
+        self.refresh_predictions()
+        return True
+    
+    def load_or_train(self, csv_file_path, snapshot_path=None):
+        """Load the snapshot for csv_file_path, retraining and re-saving only when the CSV has changed"""
+        snapshot_path = snapshot_path or snapshot_path_for(csv_file_path)
+        try:
+            source_hash = file_hash(csv_file_path)
+        except OSError as e:
+            training_log.error("read_failed", f"❌ Error reading training data: {str(e)}", error=str(e))
+            return False
         
-        # Calculate pattern score for additional context
-        pattern_score = self.calculate_pattern_score(case_data)
-        score_context = f" [Pattern Score: {pattern_score:.2f}]"
+        if self.load(snapshot_path, source_hash):
+            training_log.info("snapshot_loaded", f"📦 Loaded model snapshot {snapshot_path}", path=snapshot_path)
+            return True
         
-        if prediction == "Yes":
-            return f"Legal action recommended ({confidence} confidence){pattern_insight}{score_context}. {base_guidance}{specific_guidance}{value_insight}"
-        elif prediction == "Maybe":
-            return f"Legal action may be needed ({confidence} confidence){pattern_insight}{score_context}. {base_guidance} Consider getting a second opinion.{specific_guidance}{value_insight}"
-        else:
-            return f"Legal action may not be necessary ({confidence} confidence){score_context}. Try mediation or informal resolution first. If issues persist, {base_guidance.lower()}{specific_guidance}"
+        if not self.train(csv_file_path):
+            return False
+        self.source_hash = source_hash
+        try:
+            self.save(snapshot_path)
+        except OSError as e:
+            training_log.warning("snapshot_failed", f"⚠️  Could not save model snapshot: {str(e)}", error=str(e))
+        return True
+    
+    def approximate_bytes(self):
+        """Rough memory held by the boundaries and prediction cache, for budgeting loaded models"""
+        general = self._general or ()
+        size = sys.getsizeof(general)
+        if general:
+            sample = general[0]
+            size += len(general) * (sys.getsizeof(sample) + sys.getsizeof(sample.codes))
+        if self.prediction_cache is not None:
+            # A key tuple, a result tuple and the guidance string per entry
+            size += len(self.prediction_cache) * 400
+        return size
     
     def get_model_summary(self):
         """Get a summary of the trained model"""
@@ -398,6 +799,7 @@ class CandidateElimination:
 📊 Attributes: {len(self.attributes)}
 📋 Specific Hypothesis: {self.specific_hypothesis}
 📋 General Hypotheses: {len(self.general_hypotheses)} patterns learned
+📈 G Boundary: peak {self.boundary_stats['peak_size']}, {self.boundary_stats['candidates']} candidates, {self.boundary_stats['pruned']} pruned, {self.boundary_stats['capped']} capped
 
 🔍 Attribute Mapping:
 """
@@ -406,20 +808,63 @@ class CandidateElimination:
         
         return summary
 
-# Global instance for the Flask app
+# Global instance for the Flask app; empty until train_model() or get_model() fills it.
+# Reloads replace it with a new instance, so servers should go through get_model()
 ce_model = CandidateElimination()
 
-def train_model():
-    """Train the candidate elimination model"""
-    return ce_model.train('d:/Legal-assistance/minimal_legal_cases.csv')
+def train_model(csv_file_path=DEFAULT_DATASET, snapshot_path=None):
+    """Train the candidate elimination model, or load it from its snapshot if the CSV is unchanged"""
+    return ce_model.load_or_train(csv_file_path, snapshot_path)
+
+def train_snapshot_in_subprocess(csv_file_path, snapshot_path):
+    """Retrain for a CSV in a fresh interpreter, leaving the snapshot on disk; returns success"""
+    # A plain child interpreter rather than multiprocessing, which would re-import the server's main module
+    code = ("import sys, training_log; from candidate_elimination import CandidateElimination; "
+            "training_log.set_level('warning'); "
+            "sys.exit(0 if CandidateElimination().load_or_train(sys.argv[1], sys.argv[2]) else 1)")
+    result = subprocess.run([sys.executable, "-c", code, csv_file_path, snapshot_path],
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    return result.returncode == 0
+
+def load_dataset_model(csv_file_path, previous=None):
+    """Registry loader for a dataset's model: a new instance from the snapshot, retrained when stale"""
+    snapshot_path = snapshot_path_for(csv_file_path)
+    model = CandidateElimination(previous.max_general_hypotheses if previous is not None else None)
+    if previous is not None and previous.prediction_cache is not None:
+        model.prediction_cache = PredictionCache(previous.prediction_cache.max_size, previous.prediction_cache.precompute)
+    source_hash = file_hash(csv_file_path)
+    if not model.load(snapshot_path, source_hash):
+        # Retrain in a child process so the serving threads keep the GIL, then load its snapshot
+        train_snapshot_in_subprocess(csv_file_path, snapshot_path)
+        if not model.load(snapshot_path, source_hash) and not model.load_or_train(csv_file_path, snapshot_path):
+            raise RuntimeError("Model training failed")
+    return model
+
+def load_global_model(previous):
+    """Registry loader: the first load fills ce_model, later ones build a replacement"""
+    if previous is None or not previous.trained:
+        if not (previous or ce_model).load_or_train(DEFAULT_DATASET, snapshot_path_for(DEFAULT_DATASET)):
+            raise RuntimeError("Model training failed")
+        return previous or ce_model
+    return load_dataset_model(DEFAULT_DATASET, previous)
+
+model_registry = ModelRegistry("model", load_global_model,
+                               [DEFAULT_DATASET, snapshot_path_for(DEFAULT_DATASET)], current=ce_model)
+
+def get_model():
+    """The active global model, loaded (or trained) on first use; safe to call from many threads"""
+    model = model_registry.current
+    if model.trained:
+        return model
+    return model_registry.get()
 
 def predict(case_data):
     """Make prediction using the trained model"""
-    return ce_model.predict(case_data)
+    return get_model().predict(case_data)
 
 def get_model_info():
     """Get information about the trained model"""
-    return ce_model.get_model_summary()
+    return model_registry.current.get_model_summary()
 
 if __name__ == "__main__":
     # Train and test the model
@@ -0,0 +1,319 @@
+"""
+Hash index over the legal case dataset
+Built once from the loaded DataFrame (or streamed from the CSV, or read from the
+columns of a case store) so that matching a case against the dataset is a
+dictionary hit (all attributes given) or a few bitset ANDs (some attributes given)
+instead of a scan over every row on every request. Cells and request values
+are keyed by their vocabulary codes, so every spelling of a value matches.
+"""
+
+import sys
+import weakref
+
+from vocabulary import VOCABULARY
+
+TARGET_COLUMN = 'Legal Issue'
+CASE_TYPE_COLUMN = 'Case Type'
+POSITIVE_LABEL = 'Yes'
+# Rows added after the build collect in small per-code tail bitsets, folded into the
+# corpus-sized ones once the tail reaches TAIL_MIN_ROWS or 1/TAIL_FRACTION of the index
+TAIL_MIN_ROWS = 4096
+TAIL_FRACTION = 8
+
+
+class CaseIndex:
+    """Exact and partial-key lookup of the first dataset row matching a case"""
+
+    def __init__(self, dataset):
+        columns = list(dataset.columns)
+        self._build(columns, zip(*(dataset[c].tolist() for c in columns)))
+
+    @classmethod
+    def from_rows(cls, columns, rows):
+        """Build an index from a header and an iterable of row tuples, one row at a time"""
+        index = cls.__new__(cls)
+        index._build(list(columns), rows)
+        return index
+
+    @classmethod
+    def from_store(cls, store):
+        """Build an index from a CaseStore's coded columns, a few array passes per column"""
+        index = cls.__new__(cls)
+        index._build_from_store(store)
+        return index
+
+    def _setup(self, columns, vocabulary):
+        self.columns = columns
+        self.vocabulary = vocabulary
+        self.coders = [vocabulary.column(c) for c in self.columns]
+        self._coder_by_column = dict(zip(self.columns, self.coders))
+        target_coder = vocabulary.column(TARGET_COLUMN)
+        self._positive_code = target_coder.code(POSITIVE_LABEL)
+        self.key_columns = [c for c in self.columns if c != TARGET_COLUMN]
+        self._column_set = set(self.columns)
+        self._key_column_set = set(self.key_columns)
+        self._key_positions = [self.columns.index(c) for c in self.key_columns]
+        self._target_position = self.columns.index(TARGET_COLUMN) if TARGET_COLUMN in self._column_set else None
+        self._case_type_position = (self.columns.index(CASE_TYPE_COLUMN) if CASE_TYPE_COLUMN in self._column_set
+                                    else None)
+        self.legal_issues = []
+        self.case_types = []
+        # Attribute code tuple -> first row with those values
+        self.exact = {}
+        # Attribute code tuple -> [rows, rows labelled Yes], for nearest-case voting
+        self.key_stats = {}
+        self._neighbors = None
+        # (first tail row, column -> code -> little-endian bit buffer) of rows added since
+        self._tail = (0, {c: {} for c in columns})
+
+    def _build(self, columns, rows, vocabulary=VOCABULARY):
+        self._setup(columns, vocabulary)
+        target_position = self._target_position
+        case_type_position = self._case_type_position
+        # Per-attribute inverted posting lists, built as little-endian bit buffers
+        buffers = {c: {} for c in self.columns}
+        num_rows = 0
+        for i, row in enumerate(rows):
+            codes = [coder.code(v) for coder, v in zip(self.coders, row)]
+            self._count_key(tuple(codes[p] for p in self._key_positions), i,
+                            target_position is not None and codes[target_position] == self._positive_code)
+            byte, bit = i >> 3, 1 << (i & 7)
+            for column, code in zip(self.columns, codes):
+                buf = buffers[column].get(code)
+                if buf is None:
+                    buf = buffers[column][code] = bytearray()
+                if len(buf) <= byte:
+                    buf.extend(bytes(byte + 1 - len(buf)))
+                buf[byte] |= bit
+            self._append_labels(codes, target_position, case_type_position)
+            num_rows = i + 1
+        self.num_rows = num_rows
+        self._tail = (num_rows, self._tail[1])
+
+        # Packed as int bitsets for fast intersection
+        self.bitsets = {
+            column: {code: int.from_bytes(buf, 'little') for code, buf in codes.items()}
+            for column, codes in buffers.items()
+        }
+
+    def _build_from_store(self, store, vocabulary=VOCABULARY):
+        import numpy as np
+        self._setup(list(store.columns), vocabulary)
+        self.num_rows = len(store)
+        self._tail = (self.num_rows, self._tail[1])
+        # Store codes -> shared vocabulary codes, per column
+        translations = [np.array([coder.code(value) for value in values], dtype=np.int64)
+                        for coder, values in zip(self.coders, store.values)]
+
+        self.bitsets = {}
+        for column, codes, values, translation in zip(self.columns, store.codes, store.values, translations):
+            postings = self.bitsets[column] = {}
+            for stored, code in enumerate(translation.tolist()):
+                bits = np.packbits(codes == stored, bitorder='little')
+                bits = int.from_bytes(bits.tobytes(), 'little')
+                if bits:
+                    postings[code] = postings.get(code, 0) | bits
+
+        # Distinct attribute combinations: one mixed-radix key per row, grouped by np.unique
+        radix = 1
+        for p in self._key_positions:
+            radix *= len(store.values[p])
+        if radix < 2 ** 63:
+            keys = np.zeros(self.num_rows, dtype=np.int64)
+            for p in self._key_positions:
+                keys = keys * len(store.values[p]) + store.codes[p]
+            unique_options = {}
+        else:
+            keys = np.stack([store.codes[p].astype(np.int64) for p in self._key_positions], axis=1)
+            unique_options = {'axis': 0}
+        combinations, first_rows, inverse, counts = np.unique(
+            keys, return_index=True, return_inverse=True, return_counts=True, **unique_options)
+        inverse = inverse.reshape(-1)
+        if self._target_position is not None:
+            target_codes = translations[self._target_position][store.codes[self._target_position]]
+            positives = np.bincount(inverse, weights=target_codes == self._positive_code,
+                                    minlength=len(combinations)).astype(np.int64)
+        else:
+            positives = np.zeros(len(combinations), dtype=np.int64)
+        # Rows in order of first appearance, like the row-by-row build
+        order = np.argsort(first_rows, kind='stable')
+        for position in order.tolist():
+            row = int(first_rows[position])
+            key = tuple(int(translations[p][store.codes[p][row]]) for p in self._key_positions)
+            stats = self.key_stats.get(key)
+            if stats is None:
+                self.exact[key] = row
+                self.key_stats[key] = [int(counts[position]), int(positives[position])]
+            else:
+                # Two stored values with one canonical spelling
+                stats[0] += int(counts[position])
+                stats[1] += int(positives[position])
+
+        # Labels stay in the mapped columns and are decoded per lookup
+        self.legal_issues = (store.decoded(self.columns[self._target_position])
+                             if self._target_position is not None else [None] * self.num_rows)
+        self.case_types = (store.decoded(self.columns[self._case_type_position])
+                           if self._case_type_position is not None else [None] * self.num_rows)
+
+    def _append_labels(self, codes, target_position, case_type_position):
+        """Record a row's Legal Issue and Case Type in their canonical spellings"""
+        self.legal_issues.append(self.coders[target_position].value(codes[target_position])
+                                 if target_position is not None else None)
+        self.case_types.append(self.coders[case_type_position].value(codes[case_type_position])
+                               if case_type_position is not None else None)
+
+    def _count_key(self, key, row, positive):
+        """Record a row under its attribute tuple"""
+        stats = self.key_stats.get(key)
+        if stats is None:
+            # Stats before the exact entry: readers go from exact keys to their stats
+            self.key_stats[key] = [1, int(positive)]
+            self.exact[key] = row
+        else:
+            stats[0] += 1
+            stats[1] += positive
+
+    def add_cases(self, cases):
+        """Append case dicts (column -> value) as new rows after the existing ones
+        
+        Costs O(len(cases)) amortized: rows are set in the tail bitsets, and the
+        corpus-sized ones are only rebuilt when the tail has grown to a fraction of
+        the index. Lookups may run alongside one writer; each row's labels are
+        recorded before any lookup can find it.
+        """
+        target_coder = self.vocabulary.column(TARGET_COLUMN)
+        start, tails = self._tail
+        for case in cases:
+            i = self.num_rows
+            # Missing columns code like empty CSV fields
+            codes = [coder.code(case.get(c)) for c, coder in zip(self.columns, self.coders)]
+            self._append_labels(codes, self._target_position, self._case_type_position)
+            byte, bit = (i - start) >> 3, 1 << ((i - start) & 7)
+            for column, code in zip(self.columns, codes):
+                buf = tails[column].get(code)
+                if buf is None:
+                    buf = tails[column][code] = bytearray()
+                if len(buf) <= byte:
+                    buf.extend(bytes(byte + 1 - len(buf)))
+                buf[byte] |= bit
+            self._count_key(tuple(codes[p] for p in self._key_positions), i,
+                            target_coder.code(case.get(TARGET_COLUMN)) == self._positive_code)
+            self.num_rows += 1
+        if self.num_rows - start >= max(TAIL_MIN_ROWS, start // TAIL_FRACTION):
+            self._merge_tail()
+
+    def _merge_tail(self):
+        """Fold the tail bitsets into the main ones and start an empty tail"""
+        start, tails = self._tail
+        for column, codes in tails.items():
+            postings = self.bitsets[column]
+            for code, buf in codes.items():
+                postings[code] = postings.get(code, 0) | (int.from_bytes(buf, 'little') << start)
+        # Until this swap a lookup may find tail rows in both places, which gives the same answer
+        self._tail = (self.num_rows, {c: {} for c in self.columns})
+
+    def __len__(self):
+        return self.num_rows
+
+    def approximate_bytes(self):
+        """Rough memory held by the index, for budgeting how many a process keeps loaded"""
+        key_size = sys.getsizeof((0,) * len(self.key_columns)) + sys.getsizeof([0, 0])
+        size = sys.getsizeof(self.exact) + sys.getsizeof(self.key_stats) + len(self.exact) * key_size
+        size += sum(sys.getsizeof(bits) for postings in self.bitsets.values() for bits in postings.values())
+        size += sum(sys.getsizeof(buf) for codes in self._tail[1].values() for buf in codes.values())
+        # Label lists hold references to the shared canonical strings
+        size += sys.getsizeof(self.legal_issues) + sys.getsizeof(self.case_types)
+        if self._neighbors is not None:
+            size += self._neighbors.codes.nbytes + 3 * 8 * len(self._neighbors)
+        return size
+
+    def encode(self, case_dict):
+        """Vocabulary codes of the known columns in case_dict; unseen values get UNSEEN_CODE"""
+        coders = self._coder_by_column
+        return {k: coders[k].code(v, add=False) for k, v in case_dict.items() if k in coders}
+
+    def find_row(self, case_dict):
+        """Return the position of the first row matching every known column in case_dict, or None"""
+        query = self.encode(case_dict)
+        if self.num_rows == 0:
+            return None
+        if not query:
+            return 0
+
+        if query.keys() == self._key_column_set:
+            return self.exact.get(tuple(query[c] for c in self.key_columns))
+
+        # Partial key: intersect the posting bitsets; rows added since the build are in the tail
+        start, tails = self._tail
+        row = first_common_row([self.bitsets[column].get(code) for column, code in query.items()])
+        if row is None and start < self.num_rows:
+            buffers = [tails[column].get(code) for column, code in query.items()]
+            row = first_common_row([int.from_bytes(buf, 'little') if buf is not None else None for buf in buffers])
+            if row is not None:
+                row += start
+        return row
+
+    def lookup(self, case_dict):
+        """Return (Legal Issue, Case Type) of the first matching row, or None"""
+        row = self.find_row(case_dict)
+        if row is None:
+            return None
+        return self.legal_issues[row], self.case_types[row]
+
+    def nearest(self, case_dict, k=5):
+        """The k most similar distinct cases by weighted Hamming distance, closest first
+        
+        Each neighbor stands for every row with the same attributes: 'cases' counts
+        them and 'legal_issue_rate' is the share labelled Yes.
+        """
+        neighbors = self._neighbors
+        if neighbors is None or neighbors.num_rows != self.num_rows:
+            # Rebuilt after cases are added
+            from neighbors import CaseNeighbors
+            neighbors = self._neighbors = CaseNeighbors(self)
+        found, total_weight = neighbors.nearest(self.encode(case_dict), k)
+        results = []
+        for position, distance in found:
+            key = neighbors.keys[position]
+            row = int(neighbors.first_rows[position])
+            count = int(neighbors.counts[position])
+            results.append({
+                "case": {c: self._coder_by_column[c].value(code) for c, code in zip(self.key_columns, key)},
+                "legal_issue": self.legal_issues[row],
+                "case_type": self.case_types[row],
+                "distance": distance,
+                "similarity": 1.0 - distance / total_weight if total_weight else 0.0,
+                "cases": count,
+                "legal_issue_rate": int(neighbors.positives[position]) / count,
+            })
+        return results
+
+
+def first_common_row(postings):
+    """Lowest row set in every posting bitset, or None; intersects rarest first so misses exit early"""
+    if None in postings:
+        return None
+    postings = sorted(postings, key=int.bit_count)
+    mask = postings[0]
+    for bits in postings[1:]:
+        mask &= bits
+        if not mask:
+            return None
+    return (mask & -mask).bit_length() - 1 if mask else None
+
+
+# DataFrame id -> (weakref to DataFrame, CaseIndex)
+_index_cache = {}
+
+
+def get_case_index(dataset):
+    """Return the CaseIndex for a DataFrame, building it on first use"""
+    if isinstance(dataset, CaseIndex):
+        return dataset
+    key = id(dataset)
+    cached = _index_cache.get(key)
+    if cached is not None and cached[0]() is dataset:
+        return cached[1]
+    index = CaseIndex(dataset)
+    _index_cache[key] = (weakref.ref(dataset, lambda _, key=key: _index_cache.pop(key, None)), index)
+    return index
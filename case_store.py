@@ -0,0 +1,223 @@
+"""
+Columnar binary case store
+A case CSV converted once into a single file: a JSON header with each column's
+table of canonical values, then each column as an array of small-integer codes
+into that table (one or two bytes per cell). Opening a store memory-maps the file
+and parses only the header, so a large archive opens in milliseconds. The column
+arrays are never copied into the heap, and worker processes reading the same
+store share its pages through the OS page cache.
+
+    python case_store.py synthetic_legal_cases.csv     # writes synthetic_legal_cases.cases
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+import tempfile
+
+import numpy as np
+
+from ingest import STORE_EXTENSION, iter_chunks
+from vocabulary import VOCABULARY
+
+STORE_VERSION = 1
+MAGIC = b'LCSTORE\x00'
+# Column arrays start on cache-line boundaries
+ALIGNMENT = 64
+
+
+def is_case_store(path):
+    return os.path.splitext(path)[1].lower() == STORE_EXTENSION
+
+
+def store_path_for(csv_path):
+    """Default store location next to a case CSV"""
+    return os.path.splitext(csv_path)[0] + STORE_EXTENSION
+
+
+def code_dtype(num_values):
+    """Narrowest unsigned dtype that holds every code of a column"""
+    return np.uint8 if num_values <= 1 << 8 else np.uint16 if num_values <= 1 << 16 else np.uint32
+
+
+class DecodedColumn:
+    """A stored column read as values, decoded on access; rows appended later are kept aside"""
+
+    def __init__(self, codes, values):
+        self.codes = codes
+        self.values = values
+        self.appended = []
+
+    def __len__(self):
+        return len(self.codes) + len(self.appended)
+
+    def __getitem__(self, row):
+        if row < len(self.codes):
+            return self.values[self.codes[row]]
+        return self.appended[row - len(self.codes)]
+
+    def append(self, value):
+        self.appended.append(value)
+
+
+class CaseStore:
+    """A memory-mapped case store: per column, a code array and its value table"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a case store: {path}")
+            header_size, = struct.unpack('<Q', f.read(8))
+            header = json.loads(f.read(header_size).decode('utf-8'))
+        if header.get('version') != STORE_VERSION:
+            raise ValueError(f"Unsupported case store version {header.get('version')} in {path}")
+        self.header = header
+        self.num_rows = header['num_rows']
+        self.source_hash = header.get('source_hash')
+        self.columns = [column['name'] for column in header['columns']]
+        # Table values in this process's canonical spellings; code 0 is always missing
+        self.values = [
+            [VOCABULARY.column(name).spelling(value) if value is not None else None for value in column['values']]
+            for name, column in zip(self.columns, header['columns'])
+        ]
+        data = np.memmap(path, dtype=np.uint8, mode='r') if self.num_rows else None
+        self.codes = []
+        for column in header['columns']:
+            dtype = np.dtype(column['dtype'])
+            if data is None:
+                self.codes.append(np.zeros(0, dtype=dtype))
+                continue
+            end = column['offset'] + self.num_rows * dtype.itemsize
+            self.codes.append(data[column['offset']:end].view(dtype))
+
+    def __len__(self):
+        return self.num_rows
+
+    def column(self, name):
+        """(codes, value table) of a column"""
+        position = self.columns.index(name)
+        return self.codes[position], self.values[position]
+
+    def decoded(self, name):
+        """A column as a sequence of values, without materializing it"""
+        return DecodedColumn(*self.column(name))
+
+    def iter_rows(self, chunk_size=65536):
+        """Yield the header, then each row as a tuple of values, like ingest.iter_rows"""
+        yield tuple(self.columns)
+        tables = [np.asarray(values, dtype=object) for values in self.values]
+        for start in range(0, self.num_rows, chunk_size):
+            yield from zip(*(table[codes[start:start + chunk_size]].tolist()
+                             for codes, table in zip(self.codes, tables)))
+
+    def to_frame(self):
+        """The cases as a DataFrame, like pandas.read_csv of the source CSV but in canonical spellings"""
+        import pandas as pd
+        return pd.DataFrame({
+            name: np.asarray(values, dtype=object)[codes]
+            for name, codes, values in zip(self.columns, self.codes, self.values)
+        }, columns=self.columns)
+
+
+def convert_csv(csv_path, store_path=None, chunk_size=65536):
+    """Write the case store of a CSV (next to it by default); returns the store path"""
+    from model_store import default_file_mode, file_hash
+    store_path = store_path or store_path_for(csv_path)
+    chunks = iter_chunks(csv_path, chunk_size)
+    columns = list(next(chunks, ()))
+    if not columns:
+        raise ValueError(f"No header in {csv_path}")
+    coders = [VOCABULARY.column(name) for name in columns]
+    # Per column, shared vocabulary code -> code in this store, in first-seen order
+    local_codes = [{0: 0} for _ in columns]
+    values = [[None] for _ in columns]
+    # Per column, raw cell -> code in this store
+    cells = [{None: 0} for _ in columns]
+    num_rows = 0
+    directory = os.path.dirname(os.path.abspath(store_path))
+    spools = [tempfile.TemporaryFile(dir=directory) for _ in columns]
+    try:
+        # Codes are spooled as uint32 until the table sizes, and so the narrow dtypes, are known
+        for chunk in chunks:
+            for i, column in enumerate(zip(*chunk)):
+                coder, local, table, stored = coders[i], local_codes[i], values[i], cells[i]
+                for value in set(column).difference(stored):
+                    code = coder.code(value)
+                    if code not in local:
+                        local[code] = len(table)
+                        table.append(coder.value(code))
+                    stored[value] = local[code]
+                spools[i].write(np.array([stored[value] for value in column], dtype=np.uint32).tobytes())
+            num_rows += len(chunk)
+
+        dtypes = [np.dtype(code_dtype(len(table))) for table in values]
+        header = {'version': STORE_VERSION, 'num_rows': num_rows, 'source_hash': file_hash(csv_path), 'columns': []}
+        # Offsets depend on the header's size, which depends on the offsets; pad until they agree
+        offsets = [0] * len(columns)
+        while True:
+            header['columns'] = [
+                {'name': name, 'dtype': dtype.name, 'offset': offset, 'values': table}
+                for name, dtype, offset, table in zip(columns, dtypes, offsets, values)
+            ]
+            header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+            position = _align(len(MAGIC) + 8 + len(header_bytes))
+            layout = []
+            for dtype in dtypes:
+                layout.append(position)
+                position = _align(position + num_rows * dtype.itemsize)
+            if layout == offsets:
+                break
+            offsets = layout
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(MAGIC + struct.pack('<Q', len(header_bytes)) + header_bytes)
+                for spool, dtype, offset in zip(spools, dtypes, offsets):
+                    f.write(bytes(offset - f.tell()))
+                    spool.seek(0)
+                    while True:
+                        block = spool.read(4 * chunk_size)
+                        if not block:
+                            break
+                        f.write(np.frombuffer(block, dtype=np.uint32).astype(dtype).tobytes())
+            # mkstemp creates 0600 files; readable like any other file once in place
+            os.chmod(tmp_path, default_file_mode())
+            os.replace(tmp_path, store_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    finally:
+        for spool in spools:
+            spool.close()
+    return store_path
+
+
+def _align(position):
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", nargs="+", help="case CSVs to convert")
+    parser.add_argument("-o", "--output", help="store path, for a single CSV (default: next to the CSV)")
+    args = parser.parse_args()
+    if args.output and len(args.csv) > 1:
+        parser.error("--output needs exactly one CSV")
+
+    for csv_path in args.csv:
+        try:
+            store_path = convert_csv(csv_path, args.output)
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not convert {csv_path}: {str(e)}", file=sys.stderr)
+            sys.exit(1)
+        store = CaseStore(store_path)
+        print(f"✅ Wrote {len(store):,} cases from {csv_path} to {store_path} "
+              f"({os.path.getsize(store_path):,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
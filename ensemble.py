@@ -0,0 +1,162 @@
+"""
+Partitioned Candidate Elimination ensemble
+Trains an independent version space per value of a partition column (Case Type by
+default) across a process pool, plus a global model for cases whose partition was
+never seen in training. Predictions are routed to the model of the case's partition.
+A partition whose G boundary collapses keeps no model of its own: the hand-written
+fallback patterns span every case type, so its cases go to the global model instead.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from candidate_elimination import CandidateElimination, load_cases
+from prediction_result import PredictionResult
+import training_log
+from vocabulary import VOCABULARY
+
+GLOBAL_PARTITION = None
+
+
+def _train_partition(task):
+    """Process-pool worker: train one partition's model and return it"""
+    key, data, max_general_hypotheses = task
+    model = CandidateElimination(max_general_hypotheses, fallback_patterns=key is GLOBAL_PARTITION)
+    # Progress from many workers would interleave unreadably; warnings and errors still show
+    level = training_log.logger.level
+    training_log.set_level(max(level, training_log.LEVELS['warning']))
+    try:
+        ok = model.train_frame(data)
+    finally:
+        training_log.set_level(level)
+    model.training_data = None  # Not needed after training; keeps the result small to ship back
+    return key, model if ok else None
+
+
+class PartitionedCandidateElimination:
+    def __init__(self, partition_column='Case Type', processes=None, max_general_hypotheses=None):
+        self.partition_column = partition_column
+        self.processes = processes
+        self.max_general_hypotheses = max_general_hypotheses
+        self.attributes = CandidateElimination().attributes
+        if partition_column not in self.attributes:
+            raise ValueError(f"Partition column must be one of {self.attributes}")
+        self.partition_index = self.attributes.index(partition_column)
+        self.partition_coder = VOCABULARY.column(partition_column)
+        self.models = {}
+        self.global_model = None
+        # Partitions whose G boundary collapsed; they are served by the global model
+        self.collapsed = []
+        self.trained = False
+
+    def train(self, csv_file_path):
+        """Train one model per partition value, in parallel"""
+        try:
+            data = load_cases(csv_file_path)
+        except Exception as e:
+            training_log.error("train_failed", f"❌ Error during training: {str(e)}", error=str(e))
+            return False
+        return self.train_frame(data)
+
+    def train_frame(self, data):
+        """Train one model per partition value of a DataFrame, in parallel"""
+        tasks = [(GLOBAL_PARTITION, data, self.max_general_hypotheses)]
+        # Partitions by canonical spelling, so 'civil' and 'Civil' rows train one model
+        partitions = data[self.partition_column].map(self.partition_coder.canonical)
+        for key, group in data.groupby(partitions, sort=False):
+            tasks.append((key, group, self.max_general_hypotheses))
+
+        training_log.info("ensemble_start",
+                          f"🎯 Training {len(tasks) - 1} partitions by '{self.partition_column}' plus a global model...",
+                          partitions=len(tasks) - 1, partition_column=self.partition_column)
+        if self.processes == 1:
+            results = map(_train_partition, tasks)
+        else:
+            executor = ProcessPoolExecutor(max_workers=self.processes)
+            # Largest partitions first so one big partition doesn't start last
+            results = executor.map(_train_partition, sorted(tasks, key=lambda t: -len(t[1])))
+
+        models = {}
+        global_model = None
+        collapsed = []
+        try:
+            for key, model in results:
+                if model is None:
+                    training_log.error("partition_failed", f"❌ Training failed for partition {key!r}", partition=key)
+                    return False
+                if key is GLOBAL_PARTITION:
+                    global_model = model
+                elif not model.general_hypotheses:
+                    collapsed.append(key)
+                    training_log.info("partition_collapsed",
+                                      f"   {key}: no general hypotheses remain, served by the global model",
+                                      partition=key)
+                else:
+                    models[key] = model
+                    training_log.info("partition_trained", f"   {key}: {len(model.general_hypotheses)} general hypotheses",
+                                      partition=key, general_hypotheses=len(model.general_hypotheses))
+        finally:
+            if self.processes != 1:
+                executor.shutdown()
+
+        self.models = models
+        self.global_model = global_model
+        self.collapsed = collapsed
+        self.trained = True
+        training_log.info("ensemble_complete", f"✅ Trained {len(models)} partition models", partitions=len(models))
+        return True
+
+    def enable_prediction_cache(self, max_size=16384):
+        """Give every partition model, and the global one, its own prediction cache"""
+        for model in [self.global_model, *self.models.values()]:
+            model.enable_prediction_cache(max_size)
+
+    def model_for(self, case_data):
+        """Model responsible for a case: its partition's, else the global one"""
+        key = case_data[self.partition_index] if len(case_data) > self.partition_index else None
+        return self.models.get(self.partition_coder.canonical(key), self.global_model)
+
+    def predict(self, case_data):
+        """Predict whether legal action is needed, using the case's partition model"""
+        if not self.trained:
+            return PredictionResult("Error: Model not trained", "Please train the model first.")
+        return self.model_for(case_data).predict(case_data)
+
+    def predict_batch(self, cases):
+        """Predict many cases at once; returns (predictions, confidences, pattern_scores) arrays"""
+        if not self.trained:
+            raise RuntimeError("Model not trained")
+        if isinstance(cases, pd.DataFrame):
+            if all(attr in cases.columns for attr in self.attributes):
+                cases = cases[self.attributes]
+            rows = cases.to_numpy(dtype=object)
+        else:
+            rows = np.asarray(cases, dtype=object)
+
+        predictions = np.empty(len(rows), dtype=object)
+        confidences = np.empty(len(rows), dtype=object)
+        scores = np.zeros(len(rows))
+        keys = pd.Series(rows[:, self.partition_index] if len(rows) else [], dtype=object)
+        keys = keys.map(self.partition_coder.canonical).fillna('')
+        for key, positions in keys.groupby(keys).indices.items():
+            model = self.models.get(key, self.global_model)
+            p, c, s = model.predict_batch(rows[positions])
+            predictions[positions] = p
+            confidences[positions] = c
+            scores[positions] = s
+        return predictions.astype(str), confidences.astype(str), scores
+
+    def get_model_summary(self):
+        """Get a summary of the partition models"""
+        if not self.trained:
+            return "Model not trained yet."
+        summary = f"\n🎯 Partitioned Candidate Elimination ({self.partition_column})\n"
+        summary += "=" * 50 + "\n"
+        for key, model in self.models.items():
+            summary += f"   {key}: {len(model.general_hypotheses)} general hypotheses\n"
+        for key in self.collapsed:
+            summary += f"   {key}: collapsed, served by the global model\n"
+        summary += f"   (global): {len(self.global_model.general_hypotheses)} general hypotheses\n"
+        return summary
@@ -0,0 +1,91 @@
+"""
+Precompiled guidance templates
+The advice for a prediction depends on the case type, sub-type and value bucket
+plus a few numbers from scoring. Every fixed piece of text is assembled once per
+case type when the model is built, so a prediction only looks up its pieces and
+joins them with its confidence, pattern count and score.
+"""
+
+from vocabulary import VOCABULARY
+
+CASE_TYPE_GUIDANCE = {
+    "Civil": "Consider consulting a civil lawyer and filing a suit in district court.",
+    "Criminal": "Approach the nearest police station to file an FIR immediately.",
+    "Consumer": "Submit a complaint online via the National Consumer Helpline.",
+    "Family": "Consult a family court advocate for divorce, custody, or maintenance matters.",
+    "Environmental": "File a complaint with State Pollution Board or National Green Tribunal.",
+    "PIL": "Consult a legal NGO or advocate to draft a public interest litigation."
+}
+DEFAULT_GUIDANCE = "Consult a legal advisor for next steps."
+
+# Extra advice by case type and sub-type; the None entry applies to every sub-type
+SUB_TYPE_GUIDANCE = {
+    "Criminal": {
+        "Domestic Violence": " Consider contacting women's helpline (1091) for immediate support.",
+        "Dowry Harassment": " Consider contacting women's helpline (1091) for immediate support.",
+        "Theft": " Gather evidence and witness statements before filing FIR.",
+    },
+    "Consumer": {None: " Keep all receipts and communication records as evidence."},
+    "Environmental": {None: " Document environmental damage with photos and videos."},
+}
+
+VALUE_INSIGHTS = {
+    ">50k": " High-value case - consider hiring experienced counsel.",
+    "10k-50k": " Medium-value case - cost-benefit analysis recommended.",
+}
+
+
+class CaseTypeTemplate:
+    """Fixed guidance text of one case type, per prediction outcome"""
+    __slots__ = ('yes', 'maybe', 'no', 'sub_types', 'any_sub_type')
+
+    def __init__(self, base, sub_types):
+        self.yes = f". {base}"
+        self.maybe = f". {base} Consider getting a second opinion."
+        self.no = f". Try mediation or informal resolution first. If issues persist, {base.lower()}"
+        self.any_sub_type = sub_types.get(None, "")
+        coder = VOCABULARY.column('Sub-Type')
+        # Keyed by canonical spelling, which is how cases arrive
+        self.sub_types = {coder.spelling(name): text for name, text in sub_types.items() if name is not None}
+
+
+class GuidanceTemplates:
+    def __init__(self, case_types=CASE_TYPE_GUIDANCE, sub_types=SUB_TYPE_GUIDANCE,
+                 value_insights=VALUE_INSIGHTS, default=DEFAULT_GUIDANCE):
+        case_type_coder = VOCABULARY.column('Case Type')
+        value_coder = VOCABULARY.column('Value Involved')
+        self.templates = {
+            case_type_coder.spelling(case_type): CaseTypeTemplate(base, sub_types.get(case_type, {}))
+            for case_type, base in case_types.items()
+        }
+        self.default = CaseTypeTemplate(default, {})
+        self.value_insights = {value_coder.spelling(value): text for value, text in value_insights.items()}
+        # Pattern-count insights are shared by every prediction with the same count
+        self._pattern_insights = {}
+
+    def pattern_insight(self, matching_patterns):
+        text = self._pattern_insights.get(matching_patterns)
+        if text is None:
+            text = f" (Matches {matching_patterns} legal patterns)" if matching_patterns else ""
+            if len(self._pattern_insights) < 4096:
+                self._pattern_insights[matching_patterns] = text
+        return text
+
+    def render(self, example, prediction, confidence, matching_patterns, pattern_score):
+        """Guidance for a case given in canonical spellings, in attribute order"""
+        template = self.templates.get(example[0] if example else None, self.default)
+        specific = template.sub_types.get(example[1], template.any_sub_type) if len(example) > 1 \
+            else template.any_sub_type
+        score_context = f" [Pattern Score: {pattern_score:.2f}]"
+        if prediction == "Yes":
+            value_insight = self.value_insights.get(example[2], "") if len(example) > 2 else ""
+            return (f"Legal action recommended ({confidence} confidence){self.pattern_insight(matching_patterns)}"
+                    f"{score_context}{template.yes}{specific}{value_insight}")
+        if prediction == "Maybe":
+            value_insight = self.value_insights.get(example[2], "") if len(example) > 2 else ""
+            return (f"Legal action may be needed ({confidence} confidence){self.pattern_insight(matching_patterns)}"
+                    f"{score_context}{template.maybe}{specific}{value_insight}")
+        return f"Legal action may not be necessary ({confidence} confidence){score_context}{template.no}{specific}"
+
+
+GUIDANCE_TEMPLATES = GuidanceTemplates()
@@ -0,0 +1,111 @@
+"""
+Compact integer-encoded hypotheses for Candidate Elimination
+Every (attribute, value) pair is interned to a small integer id, and a hypothesis
+keeps the ids of its constrained values OR-ed into a single int bitmask. Coverage
+and generality checks then reduce to a couple of integer AND/compare operations,
+and hypotheses are immutable so specializing one never needs a deep copy.
+"""
+
+# Per-attribute codes for the hypothesis sentinels
+ANY = -1  # '?'
+EMPTY = -2  # '∅'
+UNKNOWN = -3  # value never interned; matches nothing
+
+_SENTINEL_CODES = {'?': ANY, '∅': EMPTY}
+
+
+class Hypothesis:
+    """Immutable hypothesis: a tuple of value ids plus precomputed bitmasks"""
+
+    __slots__ = ('codes', 'values', 'empty')
+
+    def __init__(self, codes):
+        self.codes = tuple(codes)
+        values = 0
+        empty = 0
+        for i, code in enumerate(self.codes):
+            if code >= 0:
+                values |= 1 << code
+            elif code == EMPTY:
+                empty |= 1 << i
+        # Bits of the constrained value ids, and a per-attribute mask of '∅' entries
+        self.values = values
+        self.empty = empty
+
+    def covers(self, example):
+        """True if every constrained value of this hypothesis appears in example"""
+        # '?' and '∅' entries contribute no bits, so they match any value
+        required = self.values
+        if len(example.codes) < len(self.codes):
+            # Like zip() over the list form, attributes past the end of a short example are not checked
+            for code in self.codes[len(example.codes):]:
+                if code >= 0:
+                    required &= ~(1 << code)
+        return required & example.values == required
+
+    def more_general_than(self, other):
+        """Same test as CandidateElimination.is_more_general on the list form"""
+        if self.empty & ~other.empty:
+            return False
+        required = self.values
+        if other.empty:
+            # Attributes where other is '∅' place no requirement
+            for i, code in enumerate(self.codes):
+                if code >= 0 and other.empty >> i & 1:
+                    required &= ~(1 << code)
+        return required & other.values == required
+
+    def replace(self, index, code):
+        """Copy of this hypothesis with one attribute set to code"""
+        codes = list(self.codes)
+        codes[index] = code
+        return Hypothesis(codes)
+
+    def __eq__(self, other):
+        return isinstance(other, Hypothesis) and self.codes == other.codes
+
+    def __hash__(self):
+        return hash(self.codes)
+
+    def __repr__(self):
+        return f"Hypothesis({list(self.codes)})"
+
+
+class HypothesisSpace:
+    """Interns attribute values to ids and converts hypotheses to and from list form"""
+
+    def __init__(self, num_attributes):
+        self.num_attributes = num_attributes
+        self.ids = [{} for _ in range(num_attributes)]
+        self.values = []
+
+    def intern(self, attribute_index, value):
+        """Return the id of a value, assigning the next free id if it is new"""
+        ids = self.ids[attribute_index]
+        code = ids.get(value)
+        if code is None:
+            code = ids[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def encode(self, values, add=True):
+        """Encode a hypothesis or example given as a list of values"""
+        codes = []
+        for i, value in enumerate(values[:self.num_attributes]):
+            if value in _SENTINEL_CODES:
+                codes.append(_SENTINEL_CODES[value])
+            elif add:
+                codes.append(self.intern(i, value))
+            else:
+                codes.append(self.ids[i].get(value, UNKNOWN))
+        return Hypothesis(codes)
+
+    def decode(self, hypothesis):
+        """Return the list form of a hypothesis"""
+        return ['?' if code == ANY else '∅' if code == EMPTY else self.values[code] for code in hypothesis.codes]
+
+    def as_hypothesis(self, hypothesis, add=True):
+        """Accept either form and return a Hypothesis"""
+        if isinstance(hypothesis, Hypothesis):
+            return hypothesis
+        return self.encode(hypothesis, add)
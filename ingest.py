@@ -0,0 +1,79 @@
+"""
+Streaming CSV ingestion for training and lookup datasets
+Reads case files row by row with the csv module instead of materializing a
+DataFrame. Values are normalized while reading (whitespace trimmed, the same
+missing-value markers pandas recognizes mapped to None) and interned per column,
+so peak memory is bounded by the vocabularies rather than the number of rows.
+Converted case stores (case_store.py) are read through the same iterators.
+"""
+
+import csv
+from itertools import islice
+
+# Strings pandas.read_csv treats as missing by default
+MISSING_VALUES = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+])
+
+TARGET_COLUMN = 'Legal Issue'
+STORE_EXTENSION = '.cases'
+
+
+def iter_rows(path):
+    """Yield the header, then each row as a tuple of normalized values"""
+    if path.lower().endswith(STORE_EXTENSION):
+        # Already normalized when the store was converted
+        from case_store import CaseStore
+        yield from CaseStore(path).iter_rows()
+        return
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        header = [name.strip() for name in header]
+        yield tuple(header)
+        # One intern table per column, so repeated values share a single string
+        interned = [{} for _ in header]
+        for row in reader:
+            if not row:
+                continue
+            values = []
+            for i, table in enumerate(interned):
+                value = row[i].strip() if i < len(row) else ''
+                if value in MISSING_VALUES:
+                    values.append(None)
+                else:
+                    values.append(table.setdefault(value, value))
+            yield tuple(values)
+
+
+def iter_chunks(path, chunksize=10000):
+    """Yield the header, then lists of up to chunksize normalized rows"""
+    rows = iter_rows(path)
+    header = next(rows, None)
+    if header is None:
+        return
+    yield header
+    while True:
+        chunk = list(islice(rows, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_examples(path, attributes):
+    """Yield (example, target, case number) training triples from a CSV"""
+    rows = iter_rows(path)
+    header = next(rows, None)
+    if header is None:
+        return
+    missing = [name for name in list(attributes) + [TARGET_COLUMN] if name not in header]
+    if missing:
+        raise KeyError(f"Missing columns: {missing}")
+    positions = [header.index(name) for name in attributes]
+    target_position = header.index(TARGET_COLUMN)
+    for case_num, row in enumerate(rows, 1):
+        target = row[target_position]
+        yield [row[p] for p in positions], target if target is not None else 'No', case_num
@@ -0,0 +1,115 @@
+"""
+Load-test harness for the Legal Assistant endpoints
+Drives a running server with a fixed number of concurrent clients while holding
+extra idle "slow client" connections open, then prints a JSON summary (throughput,
+latency percentiles, errors). Run it against the WSGI dev server and the ASGI app to
+compare how many concurrent connections each keeps serving:
+
+    python app.py                               # WSGI, port 5000
+    uvicorn asgi:app --port 8000                # ASGI
+    python loadtest.py http://127.0.0.1:5000 --concurrency 200 --idle 500
+    python loadtest.py http://127.0.0.1:8000 --concurrency 200 --idle 500
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_CASE = {
+    "Case Type": "Civil", "Sub-Type": "Property Dispute", "Value Involved": ">50k",
+    "Agreement Signed": "Yes", "Notice Given": "Yes", "Consumer Complaint": "No", "Matrimonial Issue": "No",
+}
+
+
+async def request(host, port, method, path, body, timeout):
+    """One HTTP/1.1 request on a fresh connection; returns the status code"""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: close\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+        return int(response.split(b' ', 2)[1])
+    finally:
+        writer.close()
+
+
+async def idle_client(host, port, stop):
+    """Open a connection and send a request line without finishing it, like a slow client"""
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        return False
+    writer.write(b"POST /predict HTTP/1.1\r\nHost: x\r\n")
+    await stop.wait()
+    writer.close()
+    return True
+
+
+async def run(args):
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    body = json.dumps(DEFAULT_CASE).encode('utf-8')
+    stop = asyncio.Event()
+    idle = [asyncio.create_task(idle_client(host, port, stop)) for _ in range(args.idle)]
+    await asyncio.sleep(0.5)
+
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + args.duration
+
+    async def client():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                status = await request(host, port, args.method, args.path, body, args.timeout)
+                if status >= 400:
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - start)
+            except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    held = sum(await asyncio.gather(*idle))
+
+    latencies.sort()
+
+    def percentile(p):
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2) if latencies else None
+
+    return {
+        "target": args.url + args.path,
+        "concurrency": args.concurrency,
+        "idle_connections": held,
+        "duration_s": round(elapsed, 2),
+        "completed": len(latencies),
+        "errors": errors,
+        "requests_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0,
+        "latency_ms": {"p50": percentile(0.5), "p90": percentile(0.9), "p99": percentile(0.99),
+                       "max": percentile(1.0)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("url", help="server base URL, e.g. http://127.0.0.1:5000")
+    parser.add_argument("--path", default="/predict")
+    parser.add_argument("--method", default="POST")
+    parser.add_argument("--concurrency", type=int, default=50, help="active clients")
+    parser.add_argument("--idle", type=int, default=0, help="idle slow-client connections held open")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-request timeout in seconds")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
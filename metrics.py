@@ -0,0 +1,301 @@
+"""
+In-process metrics and an optional sampling profiler
+Counters, gauges, fixed-bucket histograms and sum/count summaries kept in plain
+dicts behind one lock each, rendered on demand in the Prometheus text exposition format. Values that
+already live elsewhere (cache hit counts, G-boundary sizes) are read by collector
+callbacks at scrape time instead of being mirrored on every request.
+"""
+
+import bisect
+import collections
+import math
+import sys
+import threading
+import time
+
+# Seconds; spans a dictionary hit (microseconds) up to a full retrain
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def format_labels(labelnames, labels, extra=()):
+    pairs = list(zip(labelnames, labels)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set(self, value, *labels):
+        """Mirror a monotonically increasing count kept by another object"""
+        with self._lock:
+            self._values[labels] = value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        """Record one observation; a bucket count plus running sum and count"""
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[position] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._values.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series):
+                cumulative += count
+                le = format_labels(self.labelnames, labels, [("le", format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            label_text = format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {format_value(series[-2])}")
+            lines.append(f"{self.name}_count{label_text} {series[-1]}")
+        return lines
+
+
+class SummarySeries:
+    """Running sum and count of one labelled summary series"""
+    __slots__ = ('sum', 'count')
+
+    def __init__(self):
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        # Unlocked: this sits on the per-prediction path, and a rare lost update
+        # under thread contention is an acceptable price for telemetry
+        self.sum += value
+        self.count += 1
+
+    def observe_since(self, start):
+        """Record the time since start, a perf_counter reading"""
+        self.sum += time.perf_counter() - start
+        self.count += 1
+
+
+class Summary(Metric):
+    """Sum and count only (no quantiles), for timers too hot for histogram buckets"""
+    kind = "summary"
+
+    def labels(self, *labels):
+        """The series for these label values; bind it once and observe it directly"""
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = SummarySeries()
+            return series
+
+    def observe(self, value, *labels):
+        self.labels(*labels).observe(value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted((labels, series.sum, series.count) for labels, series in self._values.items())
+        for labels, total, count in items:
+            label_text = format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class Registry:
+    """Named metrics plus callbacks that refresh gauges just before a scrape"""
+
+    def __init__(self):
+        self._metrics = collections.OrderedDict()
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets)
+
+    def summary(self, name, documentation, labelnames=()):
+        return self._register(Summary, name, documentation, labelnames)
+
+    def add_collector(self, collect):
+        """Call collect() before every render, e.g. to copy counters kept by another object"""
+        with self._lock:
+            self._collectors.append(collect)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = list(self._metrics.values())
+        for collect in collectors:
+            collect()
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Time spent in each named stage of prediction and training
+STAGE_SECONDS = REGISTRY.summary(
+    "legal_model_stage_seconds", "Time spent in each model stage", ("stage",))
+
+
+def stage_timer(stage):
+    """Bound timer for a model stage: call .observe_since(perf_counter reading)"""
+    return STAGE_SECONDS.labels(stage)
+
+
+def observe_stage(stage, start):
+    """Record the time since start (a perf_counter reading) against a model stage"""
+    STAGE_SECONDS.labels(stage).observe_since(start)
+
+
+class SamplingProfiler:
+    """Background thread that samples every thread's stack at a fixed interval
+
+    Samples are kept as collapsed stacks (outermost frame first, ';'-separated)
+    with a count each, the input format of flame graph tools.
+    """
+
+    def __init__(self, interval=0.005, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = collections.Counter()
+        self.total = 0
+        self.started_at = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval=None):
+        """Start sampling (restarting with a fresh profile if already running)"""
+        self.stop()
+        if interval is not None:
+            self.interval = interval
+        with self._lock:
+            self.samples.clear()
+            self.total = 0
+        self.started_at = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        thread = self._thread
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+            self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            stacks = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                names = []
+                while frame is not None and len(names) < self.max_depth:
+                    code = frame.f_code
+                    names.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+                    frame = frame.f_back
+                stacks.append(";".join(reversed(names)))
+            with self._lock:
+                self.samples.update(stacks)
+                self.total += len(stacks)
+
+    def report(self, limit=50):
+        """Profile summary with the most frequently sampled stacks"""
+        with self._lock:
+            top = self.samples.most_common(limit)
+            total = self.total
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "started_at": self.started_at,
+            "samples": total,
+            "stacks": [{"stack": stack, "count": count} for stack, count in top],
+        }
+
+    def collapsed(self):
+        """Every sampled stack as 'frame;frame;frame count' lines"""
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,154 @@
+"""
+Hot-swappable holder for the served model and case index
+A registry owns the active version of something expensive to build. Reloads build
+the new version in the background and publish it with a single reference swap, so
+requests that already fetched the old version finish on it while new requests get
+the new one. A watcher thread polls the source files and reloads when they change.
+"""
+
+import os
+import threading
+import time
+
+import training_log
+
+
+def fingerprint(paths):
+    """(mtime, size) of each watched file, or None where a file is missing"""
+    result = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            result.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            result.append(None)
+    return tuple(result)
+
+
+class ModelRegistry:
+    def __init__(self, name, load, watch_paths=(), current=None):
+        """load(previous) builds and returns a new version, raising on failure"""
+        self.name = name
+        self.load = load
+        self.watch_paths = list(watch_paths)
+        # Held for the swap; callers that mutate the current version in place take it too
+        self.lock = threading.RLock()
+        self._current = current
+        self._loaded = False
+        self._version = 0
+        self._loaded_at = None
+        self._fingerprint = None
+        self._last_error = None
+        self._failed_fingerprint = None
+        self._reload_thread = None
+        self._watch_thread = None
+        self._stop = threading.Event()
+
+    @property
+    def current(self):
+        """The active version as it stands, loaded or not"""
+        return self._current
+
+    def get(self):
+        """The active version, loading the first one on first use"""
+        if not self._loaded:
+            with self.lock:
+                if not self._loaded:
+                    self._build()
+        return self._current
+
+    def _build(self):
+        """Build a version and swap it in; returns True on success"""
+        started = time.perf_counter()
+        sources = fingerprint(self.watch_paths)
+        try:
+            candidate = self.load(self._current)
+        except Exception as e:
+            self._last_error = str(e)
+            # Don't retry the same broken files on every poll
+            self._failed_fingerprint = sources
+            training_log.error("reload_failed", f"❌ Reloading {self.name} failed: {str(e)}",
+                               target=self.name, error=str(e))
+            return False
+        with self.lock:
+            self.swap(candidate)
+            # Taken after the build, which may itself rewrite a watched snapshot
+            self._fingerprint = fingerprint(self.watch_paths)
+            self._last_error = None
+        training_log.info("reloaded", f"🔄 {self.name} version {self._version} active "
+                          f"({time.perf_counter() - started:.2f}s)", target=self.name, version=self._version)
+        return True
+
+    def swap(self, candidate):
+        """Publish a version built outside load(), such as an updated copy of the current one"""
+        with self.lock:
+            self._current = candidate
+            self._loaded = True
+            self._version += 1
+            self._loaded_at = time.time()
+
+    @property
+    def reloading(self):
+        thread = self._reload_thread
+        return thread is not None and thread.is_alive()
+
+    def reload(self, wait=False):
+        """Build a new version in the background; returns False if a reload is already running"""
+        with self.lock:
+            if self.reloading:
+                started = False
+            else:
+                self._reload_thread = threading.Thread(target=self._build, name=f"reload-{self.name}", daemon=True)
+                self._reload_thread.start()
+                started = True
+            thread = self._reload_thread
+        if wait:
+            thread.join()
+        return started
+
+    def changed(self):
+        """Whether a watched file differs from when the active version was built"""
+        current = fingerprint(self.watch_paths)
+        return self._loaded and current != self._fingerprint and current != self._failed_fingerprint
+
+    def watch(self, interval=2.0):
+        """Poll the watched files and reload when they change"""
+        if self._watch_thread is not None and self._watch_thread.is_alive():
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                before = fingerprint(self.watch_paths)
+                if not self.changed():
+                    continue
+                # Wait one more interval for a file that is still being written to settle
+                if self._stop.wait(interval) or fingerprint(self.watch_paths) != before:
+                    continue
+                if not self.reloading:
+                    self.reload(wait=True)
+
+        self._watch_thread = threading.Thread(target=run, name=f"watch-{self.name}", daemon=True)
+        self._watch_thread.start()
+
+    def stop(self):
+        self._stop.set()
+        thread = self._watch_thread
+        if thread is not None:
+            thread.join()
+            self._watch_thread = None
+
+    def status(self):
+        """Version information for the admin endpoint"""
+        current = self._current
+        return {
+            "name": self.name,
+            "version": self._version,
+            "loaded": self._loaded,
+            "loaded_at": self._loaded_at,
+            "source_hash": getattr(current, 'source_hash', None),
+            "reloading": self.reloading,
+            "watching": self._watch_thread is not None and self._watch_thread.is_alive(),
+            "watch_paths": self.watch_paths,
+            "last_error": self._last_error,
+        }
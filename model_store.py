@@ -0,0 +1,151 @@
+"""
+Versioned on-disk snapshots of a trained CandidateElimination model
+A snapshot is an uncompressed .npz holding the hypotheses as integer-coded arrays
+plus a small JSON header with the format version, the attribute vocabularies, the
+pattern-score counts and the SHA-256 of the source CSV. Workers load it instead of
+retraining, and it is rebuilt only when the CSV changes.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+import training_log
+
+# 2: values are stored in their canonical vocabulary spellings
+# 3: per-value training counts replace the hand-set pattern weights
+SNAPSHOT_VERSION = 3
+
+# Codes for hypothesis entries that are not attribute values
+ANY_CODE = -1  # '?'
+EMPTY_CODE = -2  # '∅'
+NONE_CODE = -3  # missing value
+
+_SENTINELS = {'?': ANY_CODE, '∅': EMPTY_CODE, None: NONE_CODE}
+_SENTINEL_VALUES = {code: value for value, code in _SENTINELS.items()}
+# What reading a truncated, corrupt or foreign snapshot raises
+READ_ERRORS = (OSError, EOFError, ValueError, KeyError, IndexError, TypeError, zipfile.BadZipFile,
+               json.JSONDecodeError)
+
+
+def file_hash(path):
+    """SHA-256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def snapshot_path_for(csv_path):
+    """Default snapshot location next to the training CSV"""
+    return os.path.splitext(csv_path)[0] + '.model.npz'
+
+
+def default_file_mode():
+    """Mode a plain open() would create files with under the current umask"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def _encode(hypotheses, vocabularies, num_attributes):
+    """Encode hypotheses as an int32 matrix, extending vocabularies with unseen values"""
+    encoded = np.empty((len(hypotheses), num_attributes), dtype=np.int32)
+    for row, hypothesis in enumerate(hypotheses):
+        for i, value in enumerate(hypothesis):
+            if value in _SENTINELS:
+                encoded[row, i] = _SENTINELS[value]
+            else:
+                encoded[row, i] = vocabularies[i].setdefault(value, len(vocabularies[i]))
+    return encoded
+
+
+def _decode(encoded, vocabularies):
+    """Decode an int32 hypothesis matrix back to lists of values"""
+    return [
+        [_SENTINEL_VALUES[code] if code < 0 else vocabularies[i][code] for i, code in enumerate(row)]
+        for row in encoded.tolist()
+    ]
+
+
+def save_snapshot(model, path, source_hash=None):
+    """Write the model's learned state to path atomically"""
+    num_attributes = len(model.attributes)
+    attribute_values = model.attribute_values or [{} for _ in model.attributes]
+    # Code each value by its position in the attribute's first-seen order
+    vocabularies = [{value: code for code, value in enumerate(values)} for values in attribute_values]
+    num_seen = [len(v) for v in vocabularies]
+    specific = _encode([model.specific_hypothesis], vocabularies, num_attributes)
+    general = _encode(model.general_hypotheses, vocabularies, num_attributes)
+
+    header = {
+        'version': SNAPSHOT_VERSION,
+        'source_hash': source_hash,
+        'attributes': model.attributes,
+        'vocabularies': [list(v) for v in vocabularies],
+        'num_seen': num_seen,
+        'pattern_counts': model.pattern_scores.state(),
+    }
+    header_bytes = np.frombuffer(json.dumps(header, ensure_ascii=False).encode('utf-8'), dtype=np.uint8)
+
+    # Write to a temp file and rename so concurrent workers never read a partial snapshot
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, header=header_bytes, specific=specific, general=general)
+        # mkstemp creates 0600 files; readable like any other file once in place
+        os.chmod(tmp_path, default_file_mode())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_header(path):
+    """Return the JSON header of a snapshot"""
+    with np.load(path, allow_pickle=False) as data:
+        return json.loads(data['header'].tobytes().decode('utf-8'))
+
+
+def load_snapshot(model, path, source_hash=None):
+    """Restore learned state into model; False if missing, stale, another version or unreadable"""
+    if not os.path.exists(path):
+        return False
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            header = json.loads(data['header'].tobytes().decode('utf-8'))
+            if header.get('version') != SNAPSHOT_VERSION or header.get('attributes') != model.attributes:
+                return False
+            if source_hash is not None and header.get('source_hash') != source_hash:
+                return False
+            specific = data['specific']
+            general = data['general']
+
+        # Respelled as this process's shared vocabularies spell them, which requests are matched against
+        vocabularies = [model.intern_spellings(i, values) for i, values in enumerate(header['vocabularies'])]
+        specific_hypothesis = _decode(specific, vocabularies)[0]
+        general_hypotheses = _decode(general, vocabularies)
+        attribute_values = [
+            dict.fromkeys(values[:seen]) for values, seen in zip(vocabularies, header['num_seen'])
+        ]
+        pattern_scores = model.pattern_scores.copy()
+        pattern_scores.load_state(header['pattern_counts'])
+    except READ_ERRORS as e:
+        training_log.warning("snapshot_unreadable", f"⚠️  Ignoring unreadable model snapshot {path}: {str(e)}",
+                             path=path, error=str(e))
+        return False
+
+    # Nothing is applied until the whole snapshot has been read
+    model.specific_hypothesis = specific_hypothesis
+    model.general_hypotheses = general_hypotheses
+    model.attribute_values = attribute_values
+    model.pattern_scores = pattern_scores
+    model.source_hash = header.get('source_hash')
+    model.trained = True
+    return True
@@ -0,0 +1,83 @@
+"""
+Nearest-case retrieval over the case index
+When a case has no exact match, the most similar historical cases are found by
+weighted Hamming distance over the attribute columns. Rows with identical
+attributes are collapsed first (a million-row archive has only a few thousand
+distinct attribute combinations), and each distinct combination is stored as a
+row of its vocabulary codes, so a query is one vectorized comparison per column.
+"""
+
+import numpy as np
+
+from vocabulary import UNSEEN_CODE
+
+# Relative importance of a mismatch on each attribute; unlisted columns weigh 1
+ATTRIBUTE_WEIGHTS = {
+    'Case Type': 3.0,
+    'Sub-Type': 2.0,
+    'Value Involved': 1.0,
+    'Agreement Signed': 1.0,
+    'Notice Given': 1.0,
+    'Consumer Complaint': 1.0,
+    'Matrimonial Issue': 1.0,
+}
+
+
+class CaseNeighbors:
+    """Integer-coded distinct attribute combinations of a CaseIndex"""
+
+    def __init__(self, index, weights=None):
+        weights = dict(ATTRIBUTE_WEIGHTS, **(weights or {}))
+        self.index = index
+        # Rows covered; taken first, so rows added during the build only make it look stale
+        self.num_rows = index.num_rows
+        self.columns = list(index.key_columns)
+        self.weights = np.array([weights.get(c, 1.0) for c in self.columns], dtype=np.float32)
+
+        keys = list(index.exact)
+        # Index keys are already tuples of vocabulary codes
+        codes = np.array(keys, dtype=np.int64).reshape(len(keys), len(self.columns))
+        # Narrowest dtype that holds every code keeps the per-column scans cache-friendly
+        largest = self.largest_code = int(codes.max()) if codes.size else 0
+        self.codes = np.ascontiguousarray(codes.T.astype(np.uint8 if largest < 255 else np.uint16
+                                                         if largest < 65535 else np.int32))
+
+        stats = [index.key_stats[key] for key in keys]
+        self.keys = keys
+        self.first_rows = np.array([index.exact[key] for key in keys], dtype=np.int64)
+        self.counts = np.array([s[0] for s in stats], dtype=np.int64)
+        self.positives = np.array([s[1] for s in stats], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def encode_query(self, query):
+        """Per-column query codes and weights; columns absent from the query weigh nothing"""
+        codes = []
+        weights = self.weights.copy()
+        for i, column in enumerate(self.columns):
+            if column in query:
+                code = query[column]
+                # Codes interned after the build occur in no row either
+                codes.append(code if code <= self.largest_code else UNSEEN_CODE)
+            else:
+                codes.append(UNSEEN_CODE)
+                weights[i] = 0.0
+        return codes, weights
+
+    def nearest(self, query, k):
+        """(position, distance) of the k closest combinations to a column -> code query"""
+        if not len(self.keys) or k <= 0:
+            return [], 0.0
+        codes, weights = self.encode_query(query)
+        distances = np.zeros(len(self.keys), dtype=np.float32)
+        for column, code, weight in zip(self.codes, codes, weights):
+            if weight:
+                distances += weight * (column != code) if code != UNSEEN_CODE else weight
+        if len(distances) > k:
+            candidates = np.argpartition(distances, k - 1)[:k]
+        else:
+            candidates = np.arange(len(distances))
+        # Closest first; among equally close combinations the better attested one wins
+        order = candidates[np.lexsort((-self.counts[candidates], distances[candidates]))]
+        return [(int(p), float(distances[p])) for p in order], float(weights.sum())
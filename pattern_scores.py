@@ -0,0 +1,153 @@
+"""
+Pattern scores derived from the training data
+A case's pattern score adds up, attribute by attribute, how often past cases with
+the same value needed legal action. The counts behind those rates live in dense
+arrays indexed by the shared vocabulary codes: training counts each chunk of
+examples with one bincount per attribute, a later example adds to one slot per
+attribute, and scoring a case is one list lookup per attribute.
+"""
+
+from array import array
+
+import numpy as np
+
+# Most each attribute can add to the score, on the scale of the hand-set weights these replace
+ATTRIBUTE_WEIGHTS = [0.4, 0.2, 0.15, 0.1, 0.1, 0.05, 0.1]
+# Pseudo-counts pulling the rates of rarely seen values toward one half
+SMOOTHING = 1.0
+# Examples queued by count() before they are added in bulk
+CHUNK_SIZE = 65536
+
+
+class PatternScores:
+    """Cases and positive cases per attribute value, and the score weight of each value"""
+
+    def __init__(self, coders, attribute_weights=ATTRIBUTE_WEIGHTS, smoothing=SMOOTHING):
+        self.coders = list(coders)
+        self.attribute_weights = list(attribute_weights)
+        self.smoothing = smoothing
+        # Weight of a value with no counts: its attribute's weight at a rate of one half
+        self.defaults = [weight * 0.5 for weight in self.attribute_weights]
+        self.reset()
+
+    def __getstate__(self):
+        # Codes are per process; ship the counts by value so they re-code on arrival
+        return {'attribute_weights': self.attribute_weights, 'smoothing': self.smoothing,
+                'coders': self.coders, 'counts': self.state()}
+
+    def __setstate__(self, state):
+        self.__init__(state['coders'], state['attribute_weights'], state['smoothing'])
+        self.load_state(state['counts'])
+
+    def copy(self):
+        """An independent copy sharing the coders, to update while this one keeps scoring"""
+        scores = PatternScores(self.coders, self.attribute_weights, self.smoothing)
+        self.flush()
+        scores.counts = [counts.copy() for counts in self.counts]
+        scores.positives = [positives.copy() for positives in self.positives]
+        scores.tables = [list(table) for table in self.tables]
+        return scores
+
+    def reset(self):
+        """Forget every count"""
+        self.counts = [np.zeros(len(coder), dtype=np.int64) for coder in self.coders]
+        self.positives = [np.zeros(len(coder), dtype=np.int64) for coder in self.coders]
+        # Per attribute, the weight of each code plus a trailing default that UNSEEN_CODE (-1)
+        # and codes interned after the table was sized land on
+        self.tables = [self._table(i) for i in range(len(self.coders))]
+        self._pending = array('q')
+        self._pending_positive = array('b')
+
+    def _table(self, i):
+        weights = (self.positives[i] + self.smoothing * 0.5) / (self.counts[i] + self.smoothing)
+        return (weights * self.attribute_weights[i]).tolist() + [self.defaults[i]]
+
+    def _grow(self, i, size):
+        if size > len(self.counts[i]):
+            size = max(size, len(self.coders[i]), 2 * len(self.counts[i]))
+            for arrays in (self.counts, self.positives):
+                grown = np.zeros(size, dtype=np.int64)
+                grown[:len(arrays[i])] = arrays[i]
+                arrays[i] = grown
+
+    def add(self, codes, positive):
+        """Count one example; updates one slot per attribute"""
+        for i, code in enumerate(codes):
+            if code >= len(self.counts[i]):
+                self._grow(i, code + 1)
+                self.tables[i] = self._table(i)
+            self.counts[i][code] += 1
+            if positive:
+                self.positives[i][code] += 1
+            rate = (self.positives[i][code] + self.smoothing * 0.5) / (self.counts[i][code] + self.smoothing)
+            self.tables[i][code] = float(rate * self.attribute_weights[i])
+
+    def add_many(self, codes, positive):
+        """Count an (examples, attributes) array of codes with one bincount per attribute"""
+        codes = np.asarray(codes, dtype=np.int64).reshape(-1, len(self.coders))
+        positive = np.asarray(positive, dtype=bool)
+        if not len(codes):
+            return
+        for i in range(len(self.coders)):
+            column = codes[:, i]
+            size = int(column.max()) + 1
+            self._grow(i, size)
+            self.counts[i][:size] += np.bincount(column, minlength=size)
+            self.positives[i][:size] += np.bincount(column[positive], minlength=size)
+            self.tables[i] = self._table(i)
+
+    def count(self, codes, positive):
+        """Queue one example for the next flush(); for streaming many examples"""
+        self._pending.extend(codes)
+        self._pending_positive.append(bool(positive))
+        if len(self._pending_positive) >= CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Add the queued examples"""
+        if self._pending_positive:
+            self.add_many(np.frombuffer(self._pending, dtype=np.int64),
+                          np.frombuffer(self._pending_positive, dtype=np.int8))
+            self._pending = array('q')
+            self._pending_positive = array('b')
+
+    def score(self, codes):
+        """Pattern score of a case given as codes, capped at 1.0"""
+        try:
+            score = sum(map(list.__getitem__, self.tables, codes))
+        except IndexError:
+            # A code interned after its table was sized; it has no counts yet
+            score = sum(table[code] if code < len(table) else default
+                        for table, default, code in zip(self.tables, self.defaults, codes))
+        return min(score, 1.0)
+
+    def weight(self, i, value):
+        """Score weight of one attribute value"""
+        code = self.coders[i].code(value, add=False)
+        table = self.tables[i]
+        return table[code] if code < len(table) else self.defaults[i]
+
+    def values(self, i):
+        """Canonical spellings of an attribute's counted values"""
+        return [self.coders[i].value(code) for code in np.flatnonzero(self.counts[i]).tolist()]
+
+    def state(self):
+        """Per attribute, [value, cases, positive cases] of each counted value"""
+        self.flush()
+        return [
+            [[self.coders[i].value(code), int(self.counts[i][code]), int(self.positives[i][code])]
+             for code in np.flatnonzero(self.counts[i]).tolist()]
+            for i in range(len(self.coders))
+        ]
+
+    def load_state(self, state):
+        """Replace the counts with those of state(), coded by this process's vocabularies"""
+        self.reset()
+        for i, entries in enumerate(state):
+            coder = self.coders[i]
+            codes = [coder.code(value) for value, _, _ in entries]
+            self._grow(i, max(codes, default=-1) + 1)
+            for code, (_, cases, positive_cases) in zip(codes, entries):
+                self.counts[i][code] += cases
+                self.positives[i][code] += positive_cases
+            self.tables[i] = self._table(i)
@@ -0,0 +1,48 @@
+"""
+Bounded LRU cache of (prediction, guidance) results
+The seven case attributes have small vocabularies, so most requests repeat a
+combination already answered. The model keeps one of these caches, clears it when
+its boundaries change and can fill it eagerly for every combination of known values.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class PredictionCache:
+    def __init__(self, max_size=16384, precompute=False):
+        self.max_size = max_size
+        self.precompute = precompute
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the cached result for key, or None"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        """Store a result, evicting the least recently used entry when full"""
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {'size': len(self._entries), 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses}
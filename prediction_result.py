@@ -0,0 +1,58 @@
+"""
+Structured result of one prediction
+Scoring a case produces the prediction, its confidence, the guidance text and the
+numbers behind them in one pass; this object carries them to the routes, which
+serialize it directly. It still unpacks as the old (prediction, guidance) pair.
+"""
+
+
+class PredictionResult:
+    __slots__ = ('prediction', 'confidence', 'guidance', 'pattern_score',
+                 'general_coverage', 'specific_covers', 'matching_patterns')
+
+    def __init__(self, prediction, guidance, confidence=None, pattern_score=None,
+                 general_coverage=None, specific_covers=None, matching_patterns=None):
+        self.prediction = prediction
+        self.guidance = guidance
+        self.confidence = confidence
+        self.pattern_score = pattern_score
+        self.general_coverage = general_coverage
+        self.specific_covers = specific_covers
+        self.matching_patterns = matching_patterns
+
+    def __iter__(self):
+        # prediction, guidance = model.predict(case)
+        yield self.prediction
+        yield self.guidance
+
+    def __getitem__(self, position):
+        return (self.prediction, self.guidance)[position]
+
+    def __len__(self):
+        return 2
+
+    def __eq__(self, other):
+        if isinstance(other, PredictionResult):
+            return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+        if isinstance(other, tuple):
+            return (self.prediction, self.guidance) == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"PredictionResult({self.prediction!r}, confidence={self.confidence!r}, guidance={self.guidance!r})"
+
+    @property
+    def failed(self):
+        return str(self.prediction).startswith("Error")
+
+    def to_dict(self, **extra):
+        """JSON-ready fields, leaving out the scores a result doesn't have"""
+        result = {"prediction": self.prediction, "confidence": self.confidence, "guidance": self.guidance}
+        for name in ('pattern_score', 'general_coverage', 'specific_covers', 'matching_patterns'):
+            value = getattr(self, name)
+            if value is not None:
+                result[name] = value
+        result.update(extra)
+        return result
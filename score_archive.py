@@ -0,0 +1,224 @@
+"""
+Offline batch scoring of case archives
+Scores every case of a CSV with the Candidate Elimination model and writes one
+result per case, in input order, as CSV or JSON lines. The parent only splits the
+file into chunks of rows; a pool of worker processes, each holding the model
+loaded once from its snapshot, predicts, renders the guidance and serializes its
+chunk. A few chunks per worker are in flight at a time, so memory stays bounded
+however large the archive is. With --partition-by, cases are scored by a
+partitioned ensemble (ensemble.py) trained once in the parent and shipped to
+each worker instead.
+
+    python score_archive.py cases_1m.csv -o scored.jsonl --processes 8
+    python score_archive.py cases_1m.csv --model synthetic_legal_cases.csv --partition-by "Case Type"
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from candidate_elimination import DEFAULT_DATASET, CandidateElimination
+from model_store import file_hash, snapshot_path_for
+import training_log
+
+FORMATS = ('csv', 'jsonl')
+# Result columns appended to each input row in CSV output
+RESULT_FIELDS = ('prediction', 'confidence', 'pattern_score', 'general_coverage', 'matching_patterns', 'guidance')
+# Chunks queued per worker; enough to keep every worker busy without reading ahead further
+CHUNKS_PER_PROCESS = 2
+
+
+def output_format(path, requested=None):
+    """The requested format, else the one the output's extension implies"""
+    if requested:
+        return requested
+    return 'jsonl' if os.path.splitext(path)[1].lower() in ('.jsonl', '.ndjson', '.json') else 'csv'
+
+
+class ChunkScorer:
+    """Scores chunks of raw CSV rows and returns them serialized in the output format"""
+
+    def __init__(self, model, header, fmt):
+        self.model = model
+        self.header = list(header)
+        self.format = fmt
+        missing = [name for name in model.attributes if name not in self.header]
+        if missing:
+            raise KeyError(f"Missing columns: {missing}")
+        self.positions = [self.header.index(name) for name in model.attributes]
+
+    def output_header(self):
+        """The CSV header line, or '' for JSON lines"""
+        if self.format != 'csv':
+            return ''
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(self.header + list(RESULT_FIELDS))
+        return buffer.getvalue()
+
+    def __call__(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if self.format == 'csv' else None
+        width = len(self.header)
+        for row in rows:
+            if not row:
+                continue
+            if len(row) < width:
+                row = row + [''] * (width - len(row))
+            result = self.model.predict([row[p] for p in self.positions])
+            if writer is not None:
+                writer.writerow(row[:width] + [getattr(result, name) for name in RESULT_FIELDS])
+            else:
+                record = dict(zip(self.header, row))
+                record.update(result.to_dict())
+                buffer.write(json.dumps(record, ensure_ascii=False))
+                buffer.write("\n")
+        return buffer.getvalue()
+
+
+def load_model(model_path, cache_size=0):
+    """The model for a training CSV, from its snapshot when that is current"""
+    model = CandidateElimination(cache_size=cache_size or None)
+    if not model.load_or_train(model_path, snapshot_path_for(model_path)):
+        raise RuntimeError("Model training failed")
+    return model
+
+
+def load_ensemble(model_path, partition_column, processes=None, cache_size=0):
+    """A partitioned ensemble trained on model_path, one model per value of partition_column"""
+    # Imported here: the ensemble needs pandas, which plain snapshot scoring never loads
+    from ensemble import PartitionedCandidateElimination
+    model = PartitionedCandidateElimination(partition_column, processes)
+    if not model.train(model_path):
+        raise RuntimeError("Model training failed")
+    if cache_size:
+        model.enable_prediction_cache(cache_size)
+    return model
+
+
+# Per-worker scorer, built once by the pool initializer
+_scorer = None
+
+
+def _init_worker(model_path, snapshot_path, source_hash, header, fmt, cache_size, ensemble=None):
+    global _scorer
+    training_log.set_level('warning')
+    if ensemble is not None:
+        if cache_size:
+            ensemble.enable_prediction_cache(cache_size)
+        _scorer = ChunkScorer(ensemble, header, fmt)
+        return
+    model = CandidateElimination(cache_size=cache_size or None)
+    # The parent has already brought the snapshot up to date
+    if not model.load(snapshot_path, source_hash):
+        model = load_model(model_path, cache_size)
+    _scorer = ChunkScorer(model, header, fmt)
+
+
+def _score_chunk(rows):
+    return len(rows), _scorer(rows)
+
+
+def iter_chunks(reader, chunk_size):
+    while True:
+        chunk = list(islice(reader, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def score_archive(input_path, output_path, model_path=DEFAULT_DATASET, fmt=None, processes=None,
+                  chunk_size=10000, cache_size=16384, partition_by=None):
+    """Score every case of input_path into output_path; returns the number of rows scored"""
+    fmt = output_format(output_path, fmt)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}")
+    processes = processes or os.cpu_count() or 1
+
+    # Train (or load) once here so the workers only ever read the snapshot
+    if partition_by:
+        # Workers get the ensemble pickled, and prediction caches don't pickle; they start their own
+        model = load_ensemble(model_path, partition_by, processes, cache_size if processes == 1 else 0)
+    else:
+        model = load_model(model_path, cache_size)
+    started = time.perf_counter()
+    progress = training_log.Progress("scoring")
+    done = 0
+    with open(input_path, newline='', encoding='utf-8') as source, \
+            open(output_path, 'w', newline='', encoding='utf-8') as sink:
+        reader = csv.reader(source)
+        header = [name.strip() for name in next(reader, [])]
+        scorer = ChunkScorer(model, header, fmt)
+        sink.write(scorer.output_header())
+        training_log.info("score_start",
+                          f"🚀 Scoring {input_path} with {processes} process{'es' if processes > 1 else ''}...",
+                          input=input_path, output=output_path, processes=processes)
+
+        if processes == 1:
+            results = ((len(chunk), scorer(chunk)) for chunk in iter_chunks(reader, chunk_size))
+        else:
+            results = _score_in_pool(reader, header, fmt, model_path, cache_size, processes, chunk_size,
+                                     model if partition_by else None)
+        for num_rows, text in results:
+            sink.write(text)
+            done += num_rows
+            if progress.due(done):
+                progress.report(done)
+
+    elapsed = time.perf_counter() - started
+    training_log.info("score_complete",
+                      f"✅ Scored {done:,} cases in {elapsed:.2f}s ({done / elapsed if elapsed else 0:,.0f} cases/s)",
+                      cases=done, seconds=round(elapsed, 3), output=output_path)
+    return done
+
+
+def _score_in_pool(reader, header, fmt, model_path, cache_size, processes, chunk_size, ensemble=None):
+    """Yield (rows, text) per chunk in input order, with a bounded number of chunks in flight"""
+    snapshot_path = snapshot_path_for(model_path)
+    executor = ProcessPoolExecutor(
+        max_workers=processes, initializer=_init_worker,
+        initargs=(model_path, snapshot_path, file_hash(model_path), header, fmt, cache_size, ensemble))
+    pending = deque()
+    try:
+        for chunk in iter_chunks(reader, chunk_size):
+            pending.append(executor.submit(_score_chunk, chunk))
+            if len(pending) >= processes * CHUNKS_PER_PROCESS:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="CSV of cases with the model's attribute columns")
+    parser.add_argument("-o", "--output", help="output file (default: <input>.scored.csv)")
+    parser.add_argument("--format", choices=FORMATS, help="output format (default: from the output's extension)")
+    parser.add_argument("--model", default=DEFAULT_DATASET, help="training CSV of the model to score with")
+    parser.add_argument("--processes", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="rows per unit of work")
+    parser.add_argument("--cache-size", type=int, default=16384, help="predictions cached per worker (0 disables)")
+    parser.add_argument("--partition-by", metavar="COLUMN",
+                        help="score with a partitioned ensemble, one model per value of COLUMN (e.g. 'Case Type')")
+    args = parser.parse_args()
+
+    output = args.output or f"{os.path.splitext(args.input)[0]}.scored.{args.format or 'csv'}"
+    try:
+        score_archive(args.input, output, args.model, args.format, args.processes, args.chunk_size, args.cache_size,
+                      args.partition_by)
+    except (OSError, KeyError, RuntimeError, ValueError) as e:
+        training_log.error("score_failed", f"❌ Scoring failed: {str(e)}", error=str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
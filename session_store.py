@@ -0,0 +1,121 @@
+"""
+Server-side conversation state for the chat endpoint
+The browser only holds an opaque conversation id cookie; the step and answers live
+here. MemorySessionStore is a bounded in-process LRU for a single worker, and
+SQLiteSessionStore shares conversations between worker processes on one host.
+Both expire idle conversations after a TTL.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = 30 * 60
+
+
+class MemorySessionStore:
+    """In-process LRU of conversation records with TTL eviction"""
+
+    def __init__(self, max_entries=10000, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # conversation id -> (expires at, step, answers)
+        self._records = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._records)
+
+    def load(self, conversation_id):
+        """Return (step, answers) for a live conversation, or None"""
+        with self._lock:
+            record = self._records.get(conversation_id)
+            if record is None:
+                return None
+            if record[0] < time.monotonic():
+                del self._records[conversation_id]
+                return None
+            self._records.move_to_end(conversation_id)
+            return record[1], list(record[2])
+
+    def save(self, conversation_id, step, answers):
+        with self._lock:
+            now = time.monotonic()
+            self._records[conversation_id] = (now + self.ttl, step, tuple(answers))
+            self._records.move_to_end(conversation_id)
+            # Least recently used first, so expired and overflow entries come off the front
+            while self._records:
+                oldest_id, oldest = next(iter(self._records.items()))
+                if len(self._records) <= self.max_entries and oldest[0] >= now:
+                    break
+                del self._records[oldest_id]
+
+    def delete(self, conversation_id):
+        with self._lock:
+            self._records.pop(conversation_id, None)
+
+
+class SQLiteSessionStore:
+    """Conversation records in a SQLite file shared by every worker on the host"""
+
+    def __init__(self, path, ttl=DEFAULT_TTL, purge_every=500):
+        self.path = path
+        self.ttl = ttl
+        self.purge_every = purge_every
+        self._writes = 0
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS conversations ("
+                "id TEXT PRIMARY KEY, step INTEGER NOT NULL, answers TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS conversations_expires ON conversations (expires)")
+
+    def _connect(self):
+        """One connection per thread; WAL lets worker processes read while another writes"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, conversation_id):
+        """Return (step, answers) for a live conversation, or None"""
+        row = self._connect().execute(
+            "SELECT step, answers FROM conversations WHERE id = ? AND expires >= ?",
+            (conversation_id, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def save(self, conversation_id, step, answers):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO conversations (id, step, answers, expires) VALUES (?, ?, ?, ?)",
+                (conversation_id, step, json.dumps(answers, separators=(',', ':')), now + self.ttl),
+            )
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                conn.execute("DELETE FROM conversations WHERE expires < ?", (now,))
+
+    def delete(self, conversation_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+
+
+def create_session_store(spec=None):
+    """Build a store from a spec: 'memory' (default) or 'sqlite:///path/to/sessions.db'"""
+    spec = spec or os.environ.get("SESSION_STORE", "memory")
+    ttl = float(os.environ.get("SESSION_TTL", DEFAULT_TTL))
+    if spec == "memory":
+        return MemorySessionStore(int(os.environ.get("SESSION_MAX_ENTRIES", 10000)), ttl)
+    if spec.startswith("sqlite:///"):
+        return SQLiteSessionStore(spec[len("sqlite:///"):], ttl)
+    raise ValueError(f"Unknown session store: {spec}")
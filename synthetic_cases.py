@@ -0,0 +1,96 @@
+"""
+Synthetic legal case generator
+Scales a seed case CSV (synthetic_legal_cases.csv by default) to any number of rows
+while keeping its attribute distributions: the case type follows the seed's marginal
+distribution, and every other attribute and the 'Legal Issue' label are drawn from
+their distribution within that case type. Rows are written in chunks, so 10^7 rows
+need no more memory than 10^3.
+
+    python synthetic_cases.py 1000000 -o cases_1m.csv --seed 7
+"""
+
+import argparse
+import csv
+import os
+
+import numpy as np
+
+from ingest import iter_rows
+
+SEED_DATASET = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'synthetic_legal_cases.csv')
+GROUP_COLUMN = 'Case Type'
+
+
+class CaseDistribution:
+    """Per-column value frequencies of a seed dataset, conditioned on the case type"""
+
+    def __init__(self, path=SEED_DATASET):
+        rows = iter_rows(path)
+        self.header = list(next(rows, ()))
+        if GROUP_COLUMN not in self.header:
+            raise KeyError(f"Missing column: {GROUP_COLUMN}")
+        group_position = self.header.index(GROUP_COLUMN)
+        counts = {}
+        for row in rows:
+            group = counts.setdefault(row[group_position], [{} for _ in self.header])
+            for column_counts, value in zip(group, row):
+                column_counts[value] = column_counts.get(value, 0) + 1
+
+        self.group_position = group_position
+        self.groups = list(counts)
+        sizes = np.array([sum(group[group_position].values()) for group in counts.values()], dtype=float)
+        self.group_probabilities = sizes / sizes.sum()
+        # (values, probabilities) per column, per case type
+        self.columns = [
+            [(list(column_counts), np.array(list(column_counts.values()), dtype=float) / size)
+             for column_counts in group]
+            for group, size in zip(counts.values(), sizes)
+        ]
+
+    def sample(self, n, rng):
+        """Draw n rows as a list of column lists"""
+        groups = rng.choice(len(self.groups), size=n, p=self.group_probabilities)
+        columns = [np.empty(n, dtype=object) for _ in self.header]
+        columns[self.group_position][:] = np.array(self.groups, dtype=object)[groups]
+        for g, group_columns in enumerate(self.columns):
+            rows = np.flatnonzero(groups == g)
+            if not len(rows):
+                continue
+            for i, (values, probabilities) in enumerate(group_columns):
+                if i == self.group_position:
+                    continue
+                picks = rng.choice(len(values), size=len(rows), p=probabilities)
+                columns[i][rows] = np.array(values, dtype=object)[picks]
+        return [column.tolist() for column in columns]
+
+
+def generate_cases(path, num_rows, seed_path=SEED_DATASET, seed=0, chunk_size=100000):
+    """Write num_rows synthetic cases to path; returns the path"""
+    distribution = CaseDistribution(seed_path)
+    rng = np.random.default_rng(seed)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(distribution.header)
+        for start in range(0, num_rows, chunk_size):
+            columns = distribution.sample(min(chunk_size, num_rows - start), rng)
+            # Missing seed cells stay empty, which every loader reads back as missing
+            writer.writerows(zip(*columns))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("rows", type=float, help="number of rows to generate, e.g. 1e6")
+    parser.add_argument("-o", "--output", help="output CSV (default: synthetic_cases_<rows>.csv)")
+    parser.add_argument("--from", dest="seed_path", default=SEED_DATASET, help="seed dataset to imitate")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    num_rows = int(args.rows)
+    output = args.output or f"synthetic_cases_{num_rows}.csv"
+    generate_cases(output, num_rows, args.seed_path, args.seed)
+    print(f"✅ Wrote {num_rows} cases to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Named datasets served side by side
+Each jurisdiction's case CSV is a tenant with its own case index and model, built
+on its first request and kept in a least-recently-used pool. When the pool holds
+more tenants than allowed, or more memory than budgeted, the idle tenants used
+longest ago are dropped and rebuilt on their next request (the model from its
+snapshot, so cheaply). Attribute vocabularies are process-wide (vocabulary.py),
+so tenants share their value tables and canonical strings.
+"""
+
+import collections
+import contextlib
+import glob
+import os
+import threading
+import time
+
+from candidate_elimination import load_case_index, load_dataset_model
+from ingest import STORE_EXTENSION
+from model_registry import ModelRegistry
+from model_store import snapshot_path_for
+import training_log
+
+DEFAULT_TENANT = "default"
+
+
+class UnknownDataset(KeyError):
+    """Raised for a dataset name the pool was not configured with"""
+
+    def __str__(self):
+        return f"Unknown dataset: {self.args[0]}"
+
+
+def parse_datasets(spec="", directory=None):
+    """Dataset name -> path from 'name=path,name=path' plus every *.csv or *.cases in directory (named by stem)"""
+    datasets = {}
+    if directory:
+        # A converted case store is served in place of the CSV it came from
+        for pattern in ("*.csv", "*" + STORE_EXTENSION):
+            for path in sorted(glob.glob(os.path.join(directory, pattern))):
+                datasets[os.path.splitext(os.path.basename(path))[0]] = path
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, separator, path = entry.partition("=")
+        if not separator or not name.strip() or not path.strip():
+            raise ValueError(f"Expected name=path in DATASETS, got {entry!r}")
+        datasets[name.strip()] = path.strip()
+    return datasets
+
+
+class Tenant:
+    """One dataset's case index and model, each loaded on first use"""
+
+    def __init__(self, name, cases_path, case_registry=None, model_registry=None):
+        self.name = name
+        self.cases_path = cases_path
+        self.case_registry = case_registry or ModelRegistry(
+            f"case index ({name})", lambda previous: load_case_index(cases_path), [cases_path])
+        self.model_registry = model_registry or ModelRegistry(
+            f"model ({name})", lambda previous: load_dataset_model(cases_path, previous),
+            [cases_path, snapshot_path_for(cases_path)])
+        # Requests currently using the tenant; only idle tenants are evicted
+        self.active = 0
+        self.last_used = time.monotonic()
+        self._size = (None, 0)  # (loaded versions, their approximate bytes)
+
+    @property
+    def registries(self):
+        return {"model": self.model_registry, "cases": self.case_registry}
+
+    def get_case_index(self):
+        return self.case_registry.get()
+
+    def get_model(self):
+        model = self.model_registry.current
+        if model is not None and model.trained:
+            return model
+        return self.model_registry.get()
+
+    def approximate_bytes(self):
+        """Rough memory held by whatever is loaded so far, re-measured when a version changes"""
+        loaded = [registry.current for registry in self.registries.values()]
+        versions = tuple(id(current) for current in loaded)
+        if self._size[0] != versions:
+            size = sum(current.approximate_bytes() for current in loaded
+                       if current is not None and hasattr(current, 'approximate_bytes'))
+            self._size = (versions, size)
+        return self._size[1]
+
+    def watch(self, interval):
+        for registry in self.registries.values():
+            registry.watch(interval)
+
+    def unload(self):
+        """Stop watching the tenant's files; the pool has already dropped its reference"""
+        for registry in self.registries.values():
+            registry.stop()
+
+    def status(self):
+        return {
+            "path": self.cases_path,
+            "active": self.active,
+            "idle_seconds": round(time.monotonic() - self.last_used, 3),
+            "approximate_bytes": self.approximate_bytes(),
+            **{name: registry.status() for name, registry in self.registries.items()},
+        }
+
+
+class TenantPool:
+    """Tenants by name, loaded on demand and evicted least recently used first"""
+
+    def __init__(self, datasets, max_loaded=None, max_bytes=None, pinned=(), watch_interval=0):
+        self.datasets = dict(datasets)
+        self.max_loaded = max_loaded
+        self.max_bytes = max_bytes
+        self.watch_interval = watch_interval
+        self._tenants = collections.OrderedDict()  # least recently used first
+        self._pinned = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+        for tenant in pinned:
+            # Pinned tenants (the default dataset) are never evicted
+            self.datasets[tenant.name] = tenant.cases_path
+            self._pinned[tenant.name] = tenant
+
+    def __contains__(self, name):
+        return name in self.datasets
+
+    def names(self):
+        return sorted(self.datasets)
+
+    def get(self, name):
+        """The tenant for a dataset name, created on first use; raises UnknownDataset"""
+        with self._lock:
+            return self._get(name)
+
+    def _get(self, name):
+        tenant = self._pinned.get(name)
+        if tenant is not None:
+            return tenant
+        tenant = self._tenants.get(name)
+        if tenant is None:
+            if name not in self.datasets:
+                raise UnknownDataset(name)
+            tenant = self._tenants[name] = Tenant(name, self.datasets[name])
+            self.loads += 1
+            if self.watch_interval > 0:
+                tenant.watch(self.watch_interval)
+        else:
+            self._tenants.move_to_end(name)
+        return tenant
+
+    @contextlib.contextmanager
+    def use(self, name):
+        """Hold a tenant for the length of a request so it isn't evicted mid-use"""
+        with self._lock:
+            tenant = self._get(name)
+            tenant.active += 1
+        try:
+            yield tenant
+        finally:
+            with self._lock:
+                tenant.active -= 1
+                tenant.last_used = time.monotonic()
+            self.trim()
+
+    def loaded(self):
+        """Tenants currently held, pinned ones included"""
+        with self._lock:
+            return list(self._pinned.values()) + list(self._tenants.values())
+
+    def trim(self):
+        """Evict idle tenants, least recently used first, until within the count and memory limits"""
+        evicted = []
+        with self._lock:
+            if self.max_loaded is not None and len(self._tenants) > self.max_loaded:
+                excess = len(self._tenants) - self.max_loaded
+                for name, tenant in list(self._tenants.items()):
+                    if excess <= 0:
+                        break
+                    if tenant.active == 0:
+                        evicted.append(self._tenants.pop(name))
+                        excess -= 1
+            if self.max_bytes is not None:
+                sizes = {name: tenant.approximate_bytes() for name, tenant in self._tenants.items()}
+                total = sum(sizes.values()) + sum(t.approximate_bytes() for t in self._pinned.values())
+                for name, tenant in list(self._tenants.items()):
+                    if total <= self.max_bytes:
+                        break
+                    if tenant.active == 0:
+                        evicted.append(self._tenants.pop(name))
+                        total -= sizes[name]
+            self.evictions += len(evicted)
+        for tenant in evicted:
+            tenant.unload()
+            training_log.info("tenant_evicted", f"♻️  Evicted idle dataset {tenant.name}", dataset=tenant.name)
+        return [tenant.name for tenant in evicted]
+
+    def status(self):
+        """Configured datasets and the state of the loaded ones, for the admin endpoint"""
+        return {
+            "datasets": self.names(),
+            "max_loaded": self.max_loaded,
+            "max_bytes": self.max_bytes,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "loaded": {tenant.name: tenant.status() for tenant in self.loaded()},
+        }
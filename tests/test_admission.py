@@ -0,0 +1,160 @@
+import asyncio
+import threading
+import time
+import uuid
+
+import pytest
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+import app as app_module
+from admission import (CLIENT_HEADER, AdmissionController, AsyncAdmissionController, ClientLimits, Rejected,
+                       TokenBucket, forwarded_address, parse_client_limits)
+
+
+def test_token_bucket_refills_at_its_rate():
+    bucket = TokenBucket(rate=2.0, burst=3)
+    now = bucket.updated
+    assert [bucket.take(now) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take(now) == pytest.approx(0.5)
+    # Half a second buys one token back
+    assert bucket.take(now + 0.5) == 0.0
+    assert bucket.take(now + 0.5) > 0
+    # Refills stop at the burst size
+    assert [bucket.take(now + 100) for _ in range(4)][-1] > 0
+
+
+def test_parse_client_limits():
+    assert parse_client_limits("a=5:10, b=2") == {"a": (5.0, 10.0), "b": (2.0, 4.0)}
+    with pytest.raises(ValueError):
+        parse_client_limits("a")
+
+
+def test_client_buckets_are_bounded():
+    limits = ClientLimits(rate=1, burst=1, max_clients=3)
+    for address in range(10):
+        limits.check(f"10.0.0.{address}")
+    assert len(limits) == 3
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=1.5)
+    controller.acquire()
+    waiter = threading.Thread(target=controller.acquire)
+    waiter.start()
+    while controller.waiting < 1:
+        time.sleep(0.001)
+
+    with pytest.raises(Rejected) as rejected:
+        controller.acquire()
+    assert (rejected.value.status, rejected.value.reason) == (503, "queue_full")
+    assert rejected.value.headers == {"Retry-After": "2"}
+
+    # A released slot goes to the queued request
+    controller.release()
+    waiter.join(1)
+    assert not waiter.is_alive()
+    assert (controller.active, controller.waiting, controller.admitted) == (1, 0, 2)
+    assert controller.rejections["queue_full"] == 1
+
+
+def test_queued_request_times_out():
+    controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=0.05)
+    controller.acquire()
+    started = time.monotonic()
+    with pytest.raises(Rejected) as rejected:
+        controller.acquire()
+    assert rejected.value.reason == "queue_timeout"
+    assert time.monotonic() - started >= 0.05
+    assert (controller.active, controller.waiting) == (1, 0)
+
+
+def test_async_release_hands_the_slot_to_the_first_waiter():
+    async def scenario():
+        controller = AsyncAdmissionController(max_concurrent=1, max_queue=1, queue_timeout=1)
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        assert controller.waiting == 1
+        with pytest.raises(Rejected) as rejected:
+            await controller.acquire()
+        assert rejected.value.reason == "queue_full"
+        controller.release()
+        await waiter
+        assert (controller.active, controller.waiting) == (1, 0)
+
+        # A cancelled waiter gives up its place without leaking a slot
+        cancelled = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        controller.release()
+        assert (controller.active, controller.waiting) == (0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_async_queued_request_times_out():
+    async def scenario():
+        controller = AsyncAdmissionController(max_concurrent=1, max_queue=4, queue_timeout=0.05)
+        async with controller.admit():
+            with pytest.raises(Rejected) as rejected:
+                await controller.acquire()
+        assert rejected.value.reason == "queue_timeout"
+        assert (controller.active, controller.waiting) == (0, 0)
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # One request per client, refilling too slowly to matter within a test
+    limits = ClientLimits(rate=0.001, burst=1, overrides={"partner": (0.001, 2)})
+    monkeypatch.setattr(app_module, "admission", AdmissionController(limits=limits))
+    return app_module.app.test_client()
+
+
+def post_predict(client, headers=None, address="10.0.0.1"):
+    return client.post("/predict", json={}, headers=headers or {},
+                       environ_base={"REMOTE_ADDR": address}).status_code
+
+
+def test_rate_limit_keys_on_address(client):
+    statuses = [post_predict(client) for _ in range(4)]
+    assert statuses[0] != 429
+    assert statuses[1:] == [429, 429, 429]
+    response = client.post("/predict", json={}, environ_base={"REMOTE_ADDR": "10.0.0.1"})
+    assert int(response.headers["Retry-After"]) >= 1
+    assert post_predict(client, address="10.0.0.2") != 429
+
+
+def test_unconfigured_client_id_is_ignored(client):
+    statuses = [post_predict(client, {CLIENT_HEADER: uuid.uuid4().hex}) for _ in range(4)]
+    assert statuses[1:] == [429, 429, 429]
+    # Spoofed ids don't take up bucket slots either
+    assert len(app_module.admission.limits) == 1
+
+
+def test_configured_client_id_has_its_own_bucket(client):
+    assert post_predict(client) != 429
+    assert post_predict(client) == 429
+    # The same address naming a configured client draws from that client's bucket
+    statuses = [post_predict(client, {CLIENT_HEADER: "partner"}) for _ in range(3)]
+    assert statuses[0] != 429 and statuses[1] != 429
+    assert statuses[2] == 429
+
+
+def test_forwarded_address_matches_proxy_fix():
+    def proxy_fix_address(forwarded_for, hops):
+        seen = {}
+        wrapped = ProxyFix(lambda environ, start_response: seen.update(environ) or [], x_for=hops)
+        environ = {"REMOTE_ADDR": "10.0.0.1"}
+        if forwarded_for is not None:
+            environ["HTTP_X_FORWARDED_FOR"] = forwarded_for
+        wrapped(environ, None)
+        return seen["REMOTE_ADDR"]
+
+    for forwarded_for in [None, "", "203.0.113.7", "198.51.100.2, 203.0.113.7", " a ,b,  c "]:
+        for hops in (1, 2, 3):
+            assert forwarded_address(forwarded_for, "10.0.0.1", hops) == proxy_fix_address(forwarded_for, hops)
+    # Without trusted proxies the header is ignored
+    assert forwarded_address("203.0.113.7", "10.0.0.1", 0) == "10.0.0.1"
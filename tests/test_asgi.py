@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+import asgi
+from admission import AsyncAdmissionController, ClientLimits
+from app import REQUESTS_TOTAL
+
+
+def call(path, body=b"{}", client=("10.0.0.9", 1234), headers=()):
+    """Run one request through the ASGI app; returns the response status"""
+    scope = {"type": "http", "method": "POST", "path": path, "client": client,
+             "headers": [(b"content-type", b"application/json"), *headers]}
+    messages = [{"type": "http.request", "body": body}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi.app(scope, receive, send))
+    return sent[0]["status"]
+
+
+def requests_total(route, status):
+    return REQUESTS_TOTAL._values.get(("POST", route, status), 0)
+
+
+def test_native_routes_count_requests_by_status(monkeypatch):
+    limits = ClientLimits(rate=0.001, burst=1)
+    monkeypatch.setattr(asgi, "admission", AsyncAdmissionController(limits=limits))
+    before = {key: requests_total(*key) for key in [("/predict", "200"), ("/predict", "429"),
+                                                    ("/datasets/<dataset>/predict", "404")]}
+
+    case = json.dumps({"case_type": "Civil"}).encode()
+    assert call("/predict", case) == 200
+    assert call("/predict", case) == 429
+    assert call("/datasets/nowhere/predict", case) == 404
+
+    for key, count in before.items():
+        assert requests_total(*key) == count + 1
+
+
+def test_lifespan_startup_starts_the_watchers(monkeypatch):
+    started = []
+    monkeypatch.setattr(asgi, "start_watchers", lambda: started.append(True))
+    monkeypatch.setattr(asgi, "PRELOAD", True)
+    monkeypatch.setattr(asgi, "preload", lambda: started.append("preload"))
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    monkeypatch.setattr(asgi.executor, "shutdown", lambda wait=True: None)
+    asyncio.run(asgi.app({"type": "lifespan"}, receive, send))
+    assert started == [True, "preload"]
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+
+
+def test_trusted_proxy_hops_key_buckets_on_the_forwarded_address(monkeypatch):
+    limits = ClientLimits(rate=0.001, burst=1)
+    monkeypatch.setattr(asgi, "admission", AsyncAdmissionController(limits=limits))
+    case = json.dumps({"case_type": "Civil"}).encode()
+    proxy = ("10.0.0.50", 443)
+
+    def forwarded(address):
+        return [(b"x-forwarded-for", f"{address}, 10.0.0.40".encode())]
+
+    # Not trusted by default: the header is ignored and everything behind the proxy shares its bucket
+    assert call("/predict", case, proxy, forwarded("203.0.113.1")) == 200
+    assert call("/predict", case, proxy, forwarded("203.0.113.2")) == 429
+
+    monkeypatch.setattr(asgi, "TRUSTED_PROXY_HOPS", 2)
+    assert call("/predict", case, proxy, forwarded("203.0.113.1")) == 200
+    assert call("/predict", case, proxy, forwarded("203.0.113.2")) == 200
+    assert call("/predict", case, proxy, forwarded("203.0.113.1")) == 429
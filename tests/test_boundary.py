@@ -0,0 +1,59 @@
+import os
+import random
+
+from boundary import GeneralBoundary
+from candidate_elimination import CandidateElimination
+from hypothesis import ANY, Hypothesis
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "synthetic_legal_cases.csv")
+
+
+def pairwise_filter(hypotheses):
+    """The list implementation: drop every hypothesis more general than another"""
+    return [h1 for i, h1 in enumerate(hypotheses)
+            if not any(i != j and h1.more_general_than(h2) for j, h2 in enumerate(hypotheses))]
+
+
+def random_hypothesis(rng, attributes=7, values=3):
+    # Attribute i's values get ids i * values .. i * values + values - 1, like an interned space
+    return Hypothesis([ANY if rng.random() < 0.5 else i * values + rng.randrange(values)
+                       for i in range(attributes)])
+
+
+def test_pruning_matches_the_pairwise_filter():
+    rng = random.Random(7)
+    for _ in range(300):
+        candidates = [random_hypothesis(rng) for _ in range(rng.randrange(1, 40))]
+        boundary = GeneralBoundary()
+        for h in candidates:
+            boundary.add(h)
+        assert boundary.hypotheses() == pairwise_filter(candidates)
+        stats = boundary.stats()
+        assert stats["candidates"] == len(candidates)
+        assert stats["size"] == len(boundary)
+
+
+def test_capped_boundary_keeps_at_most_max_size():
+    rng = random.Random(3)
+    boundary = GeneralBoundary(max_size=5)
+    for _ in range(200):
+        boundary.add(random_hypothesis(rng))
+    assert len(boundary) <= 5
+    assert boundary.stats()["capped"] > 0
+
+
+def test_training_matches_the_list_implementation():
+    model = CandidateElimination()
+    learn_negative = model.learn_negative
+    steps = []
+
+    def checked_learn_negative(example):
+        expected = pairwise_filter(model.specialize_general(model._general, example))
+        learn_negative(example)
+        assert model._general == expected
+        steps.append(len(expected))
+
+    model.learn_negative = checked_learn_negative
+    assert model.train(DATASET)
+    # The boundary grew large before the data drove it empty
+    assert len(steps) == model.boundary_stats["negatives"] and max(steps) > 100
@@ -0,0 +1,65 @@
+import csv
+import os
+
+import pytest
+
+from candidate_elimination import LOOKUP_CONFIDENCE, get_guidance, predict_legal_issue
+from case_index import CaseIndex
+from vocabulary import VOCABULARY
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The synthetic dataset spells the middle bucket '10k–1L', the minimal one '10k-50k'
+RESPELLINGS = {"10k-50k": "10k–1L", "10k–1L": "10k-50k", ">50k": ">1L", ">1L": ">50k"}
+
+
+def read_csv(name):
+    with open(os.path.join(ROOT, name), newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    return rows[0], rows[1:]
+
+
+def scan(header, rows, case_dict):
+    """First row matching every given column, the way predict_legal_issue used to iterate the table"""
+    for row in rows:
+        record = dict(zip(header, row))
+        if all(VOCABULARY.canonical(k, record[k]) == VOCABULARY.canonical(k, v)
+               for k, v in case_dict.items() if k in record):
+            return VOCABULARY.canonical("Legal Issue", record["Legal Issue"]), \
+                VOCABULARY.canonical("Case Type", record["Case Type"])
+    return None
+
+
+def respell(value):
+    return f"  {RESPELLINGS.get(value, value).upper()} "
+
+
+def queries(header, rows):
+    attributes = header[:-1]
+    for row in rows[:40]:
+        case = dict(zip(header, row))
+        yield {c: case[c] for c in attributes}
+        yield {c: respell(case[c]) for c in attributes}
+        yield {c: case[c] for c in attributes[::3]}
+        yield {"Case Type": respell(case["Case Type"]), "Value Involved": respell(case["Value Involved"])}
+        yield {"Sub-Type": case["Sub-Type"], "Legal Issue": case["Legal Issue"]}
+    yield {}
+    yield {"Case Type": "Tax"}
+    yield {"Case Type": "Civil", "Sub-Type": "Theft", "Matrimonial Issue": "Yes"}
+    yield {"Case Type": "civil", "Not A Column": "ignored"}
+
+
+@pytest.mark.parametrize("name", ["minimal_legal_cases.csv", "synthetic_legal_cases.csv"])
+def test_lookup_matches_a_first_match_scan(name):
+    header, rows = read_csv(name)
+    # Repeated attributes with a different label: the earlier row wins
+    flipped = [row[:-1] + ["No" if row[-1] == "Yes" else "Yes"] for row in rows[:10]]
+    rows = rows + flipped + rows
+    index = CaseIndex.from_rows(header, rows)
+
+    for case_dict in queries(header, rows):
+        expected = scan(header, rows, case_dict)
+        assert index.lookup(case_dict) == expected, case_dict
+        if expected is not None and case_dict:
+            result = predict_legal_issue(case_dict, index)
+            assert (result.prediction, result.guidance, result.confidence) == \
+                (expected[0], get_guidance(expected[1]), LOOKUP_CONFIDENCE)
@@ -0,0 +1,59 @@
+import itertools
+import os
+import stat
+
+import pytest
+
+from candidate_elimination import CandidateElimination, load_case_index
+from case_store import CaseStore, convert_csv
+from ingest import iter_rows
+from model_store import default_file_mode
+from vocabulary import VOCABULARY
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET = os.path.join(ROOT, "synthetic_legal_cases.csv")
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return convert_csv(DATASET, str(tmp_path / "cases.cases"))
+
+
+def test_store_round_trips_the_csv(store_path):
+    store = CaseStore(store_path)
+    header, *rows = iter_rows(DATASET)
+    # Cells come back in their canonical spellings
+    canonical = [tuple(VOCABULARY.canonical(c, value) or None for c, value in zip(header, row)) for row in rows]
+    stored = store.iter_rows()
+    assert next(stored) == tuple(header)
+    assert list(stored) == canonical
+    assert stat.S_IMODE(os.stat(store_path).st_mode) == default_file_mode()
+
+
+def test_store_index_matches_the_csv_index(store_path):
+    from_csv = load_case_index(DATASET)
+    from_store = load_case_index(store_path)
+    assert len(from_store) == len(from_csv)
+    assert from_store.exact == from_csv.exact
+    assert from_store.key_stats == from_csv.key_stats
+
+    header, *rows = iter_rows(DATASET)
+    columns = list(header[:-1])
+    for row in rows[:15]:
+        case = dict(zip(header, row))
+        for size in (1, 2, len(columns)):
+            for subset in itertools.islice(itertools.combinations(columns, size), 10):
+                query = {c: case[c] for c in subset}
+                assert from_store.lookup(query) == from_csv.lookup(query)
+        assert from_store.nearest(case) == from_csv.nearest(case)
+
+
+def test_training_on_the_store_matches_the_csv(store_path):
+    from_csv = CandidateElimination()
+    from_store = CandidateElimination()
+    assert from_csv.train(DATASET)
+    assert from_store.train(store_path)
+    assert from_store.specific_hypothesis == from_csv.specific_hypothesis
+    assert from_store.general_hypotheses == from_csv.general_hypotheses
+    assert from_store.boundary_stats == from_csv.boundary_stats
+    assert from_store.pattern_scores.state() == from_csv.pattern_scores.state()
@@ -0,0 +1,21 @@
+import app as app_module
+
+
+def test_planted_conversation_id_is_replaced():
+    client = app_module.app.test_client()
+    client.set_cookie(app_module.CONVERSATION_COOKIE, "attacker-chosen")
+    response = client.post("/chat", json={"message": "start"})
+    assert response.status_code == 200
+    issued = client.get_cookie(app_module.CONVERSATION_COOKIE).value
+    assert issued != "attacker-chosen"
+    assert app_module.session_store.load("attacker-chosen") is None
+    assert app_module.session_store.load(issued) == (1, [])
+
+
+def test_live_conversation_keeps_its_id():
+    client = app_module.app.test_client()
+    client.post("/chat", json={"message": "start"})
+    issued = client.get_cookie(app_module.CONVERSATION_COOKIE).value
+    client.post("/chat", json={"message": "Civil"})
+    assert client.get_cookie(app_module.CONVERSATION_COOKIE).value == issued
+    assert app_module.session_store.load(issued) == (2, ["Civil"])
@@ -0,0 +1,28 @@
+import os
+
+from candidate_elimination import load_cases
+from ensemble import PartitionedCandidateElimination
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "synthetic_legal_cases.csv")
+
+
+def test_collapsed_partitions_use_the_global_model():
+    model = PartitionedCandidateElimination(processes=1)
+    assert model.train(DATASET)
+    # Civil and Consumer cases contradict each other within their partitions
+    assert set(model.collapsed) == {"Civil", "Consumer"}
+    assert not set(model.collapsed) & set(model.models)
+    civil = ["Civil", "Eviction", "<10k", "Yes", "No", "No", "No"]
+    assert model.model_for(civil) is model.global_model
+    for key, partition in model.models.items():
+        assert partition.general_hypotheses
+        # No partition model carries the cross-type fallback patterns
+        assert all(h[0] in ("?", key) for h in partition.general_hypotheses)
+
+
+def test_batch_matches_single_predictions():
+    model = PartitionedCandidateElimination(processes=1)
+    assert model.train(DATASET)
+    cases = load_cases(DATASET)[model.attributes]
+    predictions, _, _ = model.predict_batch(cases)
+    assert list(predictions) == [model.predict(list(row)).prediction for row in cases.itertuples(index=False)]
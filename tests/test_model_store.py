@@ -0,0 +1,36 @@
+import os
+import shutil
+import stat
+
+import pytest
+
+from candidate_elimination import CandidateElimination
+from model_store import default_file_mode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = tmp_path / "cases.csv"
+    shutil.copy(os.path.join(ROOT, "minimal_legal_cases.csv"), path)
+    return str(path)
+
+
+@pytest.mark.parametrize("contents", [b"not a zip file", b"PK\x03\x04truncated", b""])
+def test_unreadable_snapshot_is_retrained(dataset, contents):
+    snapshot = dataset.replace(".csv", ".model.npz")
+    with open(snapshot, "wb") as f:
+        f.write(contents)
+    model = CandidateElimination()
+    assert not model.load(snapshot)
+    assert not model.trained
+    assert model.load_or_train(dataset, snapshot)
+    # Retraining replaced the broken snapshot with a loadable one
+    assert CandidateElimination().load(snapshot)
+
+
+def test_snapshot_gets_the_default_file_mode(dataset):
+    snapshot = dataset.replace(".csv", ".model.npz")
+    assert CandidateElimination().load_or_train(dataset, snapshot)
+    assert stat.S_IMODE(os.stat(snapshot).st_mode) == default_file_mode()
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from candidate_elimination import CandidateElimination
+from pattern_scores import ATTRIBUTE_WEIGHTS, PatternScores
+from vocabulary import UNSEEN_CODE, AttributeVocabulary
+
+ATTRIBUTES = ["Case Type", "Notice Given"]
+WEIGHTS = [0.4, 0.1]
+
+
+def make_scores(coders=None):
+    return PatternScores(coders or [AttributeVocabulary(name) for name in ATTRIBUTES], WEIGHTS)
+
+
+def encode(scores, rows):
+    return [[coder.code(value) for coder, value in zip(scores.coders, row)] for row in rows]
+
+
+ROWS = [("Civil", "Yes"), ("Civil", "No"), ("Criminal", "Yes"), ("Civil", "Yes"), ("Family", "No")]
+LABELS = [True, False, True, True, False]
+
+
+def test_bincount_fill_matches_counting_one_at_a_time():
+    bulk = make_scores()
+    single, queued = make_scores(bulk.coders), make_scores(bulk.coders)
+    codes = encode(bulk, ROWS)
+    bulk.add_many(codes, LABELS)
+    for codes, positive in zip(codes, LABELS):
+        single.add(codes, positive)
+        queued.count(codes, positive)
+    assert bulk.state() == single.state() == queued.state()
+    for row in ROWS + [("Tax", "Yes")]:
+        for i, value in enumerate(row):
+            assert bulk.weight(i, value) == pytest.approx(single.weight(i, value)) == queued.weight(i, value)
+    assert bulk.state()[0] == [["Civil", 3, 2], ["Criminal", 1, 1], ["Family", 1, 0]]
+
+
+def test_rates_are_smoothed_toward_one_half():
+    scores = make_scores()
+    scores.add_many(encode(scores, ROWS), LABELS)
+    # (positives + 0.5) / (cases + 1), times the attribute's weight
+    assert scores.weight(0, "Civil") == pytest.approx(0.4 * 2.5 / 4)
+    assert scores.weight(0, "Criminal") == pytest.approx(0.4 * 0.75)
+    assert scores.weight(0, "Family") == pytest.approx(0.4 * 0.25)
+    # Never-seen values score as a rate of one half
+    assert scores.weight(0, "Tax") == pytest.approx(0.4 * 0.5)
+    assert scores.score([UNSEEN_CODE, UNSEEN_CODE]) == pytest.approx(0.5 * sum(WEIGHTS))
+
+    many = make_scores()
+    many.add_many(encode(many, [("Civil", "Yes")] * 1000), np.arange(1000) < 900)
+    assert many.weight(0, "Civil") == pytest.approx(0.4 * 0.9, abs=1e-3)
+
+
+def test_model_update_adds_to_the_scores_in_place():
+    cases = [
+        (["Civil", "Property", ">50k", "Yes", "Yes", "No", "No"], "Yes"),
+        (["Family", "Divorce", "<10k", "No", "No", "No", "Yes"], "No"),
+        (["Civil", "Contract", "10k-50k", "Yes", "No", "No", "No"], "No"),
+    ]
+    model = CandidateElimination()
+    model.update(cases[:2])
+    scores = model.pattern_scores
+    before = scores.weight(0, "Civil")
+    model.update(cases[2:])
+    assert model.pattern_scores is scores
+    assert scores.weight(0, "Civil") < before
+
+    fresh = CandidateElimination()
+    fresh.update(cases)
+    assert scores.state() == fresh.pattern_scores.state()
+    assert scores.attribute_weights == ATTRIBUTE_WEIGHTS
@@ -0,0 +1,37 @@
+from candidate_elimination import CandidateElimination
+from prediction_result import PredictionResult
+
+
+def test_result_unpacks_as_prediction_and_guidance():
+    result = PredictionResult("Yes", "File an FIR.", "High", pattern_score=0.8)
+    prediction, guidance = result
+    assert (prediction, guidance) == ("Yes", "File an FIR.")
+    assert (len(result), result[0], result[1]) == (2, "Yes", "File an FIR.")
+    assert result == ("Yes", "File an FIR.")
+    assert result != PredictionResult("Yes", "File an FIR.", "Low", pattern_score=0.8)
+    assert not result.failed and PredictionResult("Error: no model", "").failed
+
+
+def test_to_dict_leaves_out_missing_scores():
+    assert PredictionResult("No", "Try mediation.").to_dict() == \
+        {"prediction": "No", "confidence": None, "guidance": "Try mediation."}
+    result = PredictionResult("Yes", "Consult a lawyer.", "Medium", pattern_score=0.55, general_coverage=0.5,
+                              specific_covers=False, matching_patterns=["Civil"])
+    assert result.to_dict(dataset="delhi") == {
+        "prediction": "Yes", "confidence": "Medium", "guidance": "Consult a lawyer.", "pattern_score": 0.55,
+        "general_coverage": 0.5, "specific_covers": False, "matching_patterns": ["Civil"], "dataset": "delhi",
+    }
+
+
+def test_model_predictions_carry_their_scores():
+    model = CandidateElimination()
+    model.update([
+        (["Civil", "Property", ">50k", "Yes", "Yes", "No", "No"], "Yes"),
+        (["Family", "Divorce", "<10k", "No", "No", "No", "Yes"], "No"),
+    ])
+    result = model.predict(["Civil", "Property", ">50k", "Yes", "Yes", "No", "No"])
+    assert isinstance(result, PredictionResult)
+    fields = result.to_dict()
+    assert fields["prediction"] in ("Yes", "No") and fields["confidence"] is not None
+    assert 0.0 <= fields["pattern_score"] <= 1.0
+    assert fields["specific_covers"] is True
@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+import app as app_module
+from candidate_elimination import CandidateElimination
+from case_index import CaseIndex
+from ingest import iter_rows
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET = os.path.join(ROOT, "synthetic_legal_cases.csv")
+
+
+def read_rows():
+    rows = iter_rows(DATASET)
+    return list(next(rows)), list(rows)
+
+
+def test_added_cases_match_a_full_build():
+    header, rows = read_rows()
+    rows = rows * 3
+    full = CaseIndex.from_rows(header, rows)
+    index = CaseIndex.from_rows(header, rows[:10])
+    for start in range(10, len(rows), 7):
+        index.add_cases([dict(zip(header, row)) for row in rows[start:start + 7]])
+    assert len(index) == len(full)
+    for row in rows[:20]:
+        case = dict(zip(header, row))
+        for columns in (["Case Type"], ["Sub-Type", "Notice Given"], header[:-1]):
+            query = {c: case[c] for c in columns}
+            assert index.find_row(query) == full.find_row(query)
+    assert index.nearest({"Case Type": "Civil"}) == full.nearest({"Case Type": "Civil"})
+
+
+def test_added_cases_are_found_before_and_after_the_tail_merges(monkeypatch):
+    header, rows = read_rows()
+    index = CaseIndex.from_rows(header, rows)
+    new_case = dict(zip(header, ["Tax", "Audit", "<10k", "No", "No", "No", "No", "Yes"]))
+    index.add_cases([new_case])
+    assert index.lookup({"Case Type": "Tax"}) == ("Yes", "Tax")
+    monkeypatch.setattr("case_index.TAIL_MIN_ROWS", 1)
+    monkeypatch.setattr("case_index.TAIL_FRACTION", len(rows) + 1)
+    index.add_cases([dict(new_case, **{"Sub-Type": "Refund"})])
+    assert index._tail == (len(rows) + 2, {c: {} for c in header})
+    assert index.find_row({"Case Type": "Tax"}) == len(rows)
+    assert index.find_row({"Sub-Type": "Refund"}) == len(rows) + 1
+
+
+def test_update_on_a_copy_leaves_the_served_model_alone():
+    model = CandidateElimination(cache_size=64)
+    assert model.train(DATASET)
+    case = ["Civil", "Eviction", "<10k", "Yes", "No", "No", "No"]
+    before = model.predict(case)
+    general = list(model.general_hypotheses)
+    counts = [c.copy() for c in model.pattern_scores.counts]
+
+    updated = model.copy()
+    updated.update([(case, "Yes")] * 20)
+    assert model.general_hypotheses == general
+    assert all((a == b).all() for a, b in zip(model.pattern_scores.counts, counts))
+    assert model.predict(case) == before
+    assert updated.calculate_pattern_score(case) > model.calculate_pattern_score(case)
+
+
+@pytest.fixture
+def admin_client(monkeypatch):
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", "secret")
+    return app_module.app.test_client()
+
+
+def test_admin_cases_swaps_in_an_updated_model(admin_client):
+    registry = app_module.default_tenant.model_registry
+    served = app_module.default_tenant.get_model()
+    version = registry.status()["version"]
+    case = {"Case Type": "Civil", "Sub-Type": "Eviction", "Value Involved": "<10k", "Agreement Signed": "Yes",
+            "Notice Given": "No", "Consumer Complaint": "No", "Matrimonial Issue": "No", "Legal Issue": "Yes"}
+    response = admin_client.post("/admin/cases", json=[case], headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert registry.current is not served
+    assert registry.status()["version"] == version + 1
@@ -0,0 +1,44 @@
+import pickle
+
+from vocabulary import MISSING_CODE, UNSEEN_CODE, VOCABULARY, AttributeVocabulary, CANONICAL_VALUES, fold
+
+
+def test_fold_unifies_case_dashes_and_spacing():
+    assert fold("  10K – 1L ") == "10k-1l"
+    assert fold("Public   Interest Litigation") == "public interest litigation"
+
+
+def test_spellings_share_a_code_and_canonical_value():
+    values = AttributeVocabulary("Value Involved", CANONICAL_VALUES["Value Involved"])
+    code = values.code("10k-50k")
+    for spelling in ("10k–1L", " 10K - 1l", "10k to 50k"):
+        assert values.code(spelling) == code
+        assert values.canonical(spelling) == "10k-50k"
+    assert values.code(">1L") == values.code(">50k") != code
+
+
+def test_missing_spellings_code_as_missing():
+    answers = AttributeVocabulary("Notice Given", CANONICAL_VALUES["Notice Given"])
+    for missing in (None, "", "N/A", " na ", "Not specified", float("nan")):
+        assert answers.code(missing) == MISSING_CODE
+        assert answers.canonical(missing) is None
+    assert answers.canonical("true") == "Yes"
+    assert answers.canonical(0) == "No"
+
+
+def test_unseen_values_are_only_interned_when_adding():
+    sub_types = AttributeVocabulary("Sub-Type")
+    assert sub_types.code("Eviction", add=False) == UNSEEN_CODE
+    assert sub_types.canonical(" Eviction ") == "Eviction"
+    # A remembered miss resolves once the value is interned
+    code = sub_types.code("eviction")
+    assert code > MISSING_CODE
+    assert sub_types.code("Eviction", add=False) == code
+    assert sub_types.canonical("EVICTION") == "eviction"
+    assert sub_types.value(code) == "eviction"
+
+
+def test_columns_pickle_as_the_shared_vocabulary():
+    column = VOCABULARY.column("Case Type")
+    assert pickle.loads(pickle.dumps(column)) is column
+    assert column.canonical(" civil ") == "Civil"
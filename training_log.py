@@ -0,0 +1,170 @@
+"""
+Training output: levelled console messages, throttled progress and opt-in traces
+Training used to print several lines per example, which dominated run time on
+large corpora. It now reports through the 'legal_assistant.training' logger: a
+handful of messages per run plus a progress line every few seconds (examples/sec
+and boundary sizes). Records can also go to a JSON-lines file, and the full
+per-example trace is written only when a trace file is configured.
+
+Settings come from configure() or, by default, the environment:
+    TRAIN_LOG_LEVEL   silent | error | warning | info (default) | debug
+    TRAIN_LOG_JSON    path of a JSON-lines log file
+    TRAIN_TRACE_FILE  path of the per-example trace dump
+    TRAIN_PROGRESS_INTERVAL  seconds between progress lines (default 2)
+"""
+
+import json
+import logging
+import os
+import sys
+import time
+
+SILENT = logging.CRITICAL + 10
+LEVELS = {
+    'silent': SILENT,
+    'error': logging.ERROR,
+    'warning': logging.WARNING,
+    'info': logging.INFO,
+    'debug': logging.DEBUG,
+}
+
+logger = logging.getLogger("legal_assistant.training")
+trace_logger = logging.getLogger("legal_assistant.training.trace")
+logger.propagate = False
+trace_logger.propagate = False
+
+progress_interval = 2.0
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with the record's structured fields merged in"""
+
+    def format(self, record):
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "event": getattr(record, 'event', None),
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class ConsoleHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is at emit time, so redirect_stdout still captures it"""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def _reset(target):
+    for handler in list(target.handlers):
+        target.removeHandler(handler)
+        handler.close()
+
+
+def configure(level=None, json_path=None, trace_path=None, stream=None, interval=None):
+    """(Re)configure training output; options left as None are read from the environment"""
+    global progress_interval
+    level = level or os.environ.get("TRAIN_LOG_LEVEL", "info")
+    json_path = json_path or os.environ.get("TRAIN_LOG_JSON")
+    trace_path = trace_path or os.environ.get("TRAIN_TRACE_FILE")
+    progress_interval = float(interval if interval is not None else os.environ.get("TRAIN_PROGRESS_INTERVAL", 2.0))
+    if isinstance(level, str):
+        if level.lower() not in LEVELS:
+            raise ValueError(f"Unknown log level {level!r}; expected one of {sorted(LEVELS)}")
+        level = LEVELS[level.lower()]
+
+    _reset(logger)
+    logger.setLevel(level)
+    console = logging.StreamHandler(stream) if stream is not None else ConsoleHandler()
+    console.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(console)
+    if json_path:
+        sink = logging.FileHandler(json_path, encoding='utf-8')
+        sink.setFormatter(JsonFormatter())
+        logger.addHandler(sink)
+
+    _reset(trace_logger)
+    if trace_path:
+        dump = logging.FileHandler(trace_path, mode='w', encoding='utf-8')
+        dump.setFormatter(logging.Formatter("%(message)s"))
+        trace_logger.addHandler(dump)
+        trace_logger.setLevel(logging.DEBUG)
+    else:
+        trace_logger.setLevel(SILENT)
+
+
+def set_level(level):
+    """Change the console/JSON level without touching the sinks"""
+    logger.setLevel(LEVELS[level] if isinstance(level, str) else level)
+
+
+def log(level, event, message, **fields):
+    if logger.isEnabledFor(level):
+        logger.log(level, message, extra={'event': event, 'fields': fields})
+
+
+def debug(event, message, **fields):
+    log(logging.DEBUG, event, message, **fields)
+
+
+def info(event, message, **fields):
+    log(logging.INFO, event, message, **fields)
+
+
+def warning(event, message, **fields):
+    log(logging.WARNING, event, message, **fields)
+
+
+def error(event, message, **fields):
+    log(logging.ERROR, event, message, **fields)
+
+
+def tracing():
+    """Whether per-example traces are being written; check once per pass, not per example"""
+    return trace_logger.isEnabledFor(logging.DEBUG)
+
+
+def trace(message):
+    trace_logger.debug(message)
+
+
+class Progress:
+    """Throttled progress reporting for one training pass"""
+
+    # Examples between clock reads; keeps the per-example cost to an integer compare
+    CHECK_EVERY = 256
+
+    def __init__(self, phase, interval=None):
+        self.phase = phase
+        self.interval = progress_interval if interval is None else interval
+        self.started = time.perf_counter()
+        self._last = self.started
+        self._next_check = self.CHECK_EVERY
+
+    def due(self, done):
+        """True when a progress line should be reported for done examples"""
+        if done < self._next_check:
+            return False
+        self._next_check = done + self.CHECK_EVERY
+        return time.perf_counter() - self._last >= self.interval
+
+    def report(self, done, **fields):
+        now = time.perf_counter()
+        self._last = now
+        rate = done / (now - self.started) if now > self.started else 0.0
+        details = "".join(f", {name.replace('_', ' ')} {value}" for name, value in fields.items())
+        info("progress", f"⏳ {self.phase}: {done:,} examples ({rate:,.0f}/s){details}",
+             phase=self.phase, examples=done, examples_per_second=round(rate, 1), **fields)
+
+
+configure()
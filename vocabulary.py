@@ -0,0 +1,184 @@
+"""
+Canonical attribute vocabularies
+The datasets and the forms spell the same value differently ('10k-50k' and
+'10k–1L', 'Civil' and ' civil', 'N/A' and an empty cell). Every attribute value is
+mapped once to a canonical spelling and a small integer code, at load time and at
+request time, so lookups and comparisons downstream work on ints and agree across
+datasets. Raw strings already seen are remembered, so a repeated request value
+costs one dictionary hit.
+"""
+
+import re
+import threading
+
+# Code shared by every spelling of a missing value; codes of real values start at 1
+MISSING_CODE = 0
+# Returned for values never seen when not interning; matches nothing
+UNSEEN_CODE = -1
+
+MISSING_SPELLINGS = frozenset([
+    '', 'n/a', 'na', 'nan', 'nat', 'none', 'null', '<na>', '#n/a', '-', 'not specified', 'unknown',
+])
+
+YES_NO = {
+    'Yes': ['y', 'true', '1'],
+    'No': ['n', 'false', '0'],
+}
+
+# Canonical spelling -> other accepted spellings, per attribute (matched case-insensitively)
+CANONICAL_VALUES = {
+    'Case Type': {
+        'Civil': [],
+        'Criminal': [],
+        'Consumer': [],
+        'Family': [],
+        'Environmental': ['environment'],
+        'PIL': ['public interest litigation'],
+    },
+    'Value Involved': {
+        # The synthetic dataset buckets by lakh (1L = 100k); both scales mean low/medium/high
+        '<10k': ['below 10k', 'under 10k', 'less than 10k'],
+        '10k-50k': ['10k-1l', '10k to 50k', '10k to 1l'],
+        '>50k': ['>1l', 'above 50k', 'over 50k', 'above 1l', 'over 1l'],
+    },
+    'Agreement Signed': YES_NO,
+    'Notice Given': YES_NO,
+    'Consumer Complaint': YES_NO,
+    'Matrimonial Issue': YES_NO,
+    'Legal Issue': YES_NO,
+}
+
+# Dashes and spacing that vary between spellings of the same bucket
+_FOLD_TABLE = str.maketrans({'–': '-', '—': '-', '‐': '-', '−': '-'})
+_OPERATOR_SPACING = re.compile(r'\s*([-<>])\s*')
+
+# Raw strings remembered per attribute; beyond this, unseen request strings aren't cached
+RAW_CACHE_LIMIT = 65536
+
+
+def fold(text):
+    """Comparison key of a spelling: trimmed, case-folded, dashes unified, spaces collapsed"""
+    return _OPERATOR_SPACING.sub(r'\1', ' '.join(text.translate(_FOLD_TABLE).casefold().split()))
+
+
+class AttributeVocabulary:
+    """Codes and canonical spellings of one attribute's values"""
+
+    def __init__(self, name, canonical_values=None):
+        self.name = name
+        self.values = [None]  # code -> canonical spelling
+        self.codes = {}  # folded spelling -> code
+        # Raw value -> code and raw value -> canonical spelling, for values already resolved
+        self.raw_codes = {None: MISSING_CODE}
+        self.spellings = {None: None}
+        self._num_unseen = 0
+        self._lock = threading.Lock()
+        for canonical, aliases in (canonical_values or {}).items():
+            code = self._intern(fold(canonical), canonical)
+            for alias in aliases:
+                self.codes[fold(alias)] = code
+
+    def __len__(self):
+        return len(self.values)
+
+    def __reduce__(self):
+        # Models pickled across processes bind to the receiving process's shared vocabulary
+        return (column, (self.name,))
+
+    def _intern(self, key, spelling):
+        code = self.codes.get(key)
+        if code is None:
+            code = self.codes[key] = len(self.values)
+            self.values.append(spelling)
+            if self._num_unseen:
+                # A remembered miss may be a spelling of the new value; forget them all
+                self.raw_codes = {r: c for r, c in list(self.raw_codes.items()) if c != UNSEEN_CODE}
+                self.spellings = {r: self.values[c] for r, c in self.raw_codes.items()}
+                self._num_unseen = 0
+        return code
+
+    def code(self, value, add=True):
+        """Code of a raw value; unseen values are interned when add, else UNSEEN_CODE"""
+        try:
+            code = self.raw_codes[value]
+        except (KeyError, TypeError):
+            return self._resolve(value, add)
+        if code == UNSEEN_CODE and add:
+            return self._resolve(value, add)
+        return code
+
+    def _resolve(self, value, add):
+        raw = value
+        if not isinstance(value, str):
+            if isinstance(value, float) and value != value:
+                return MISSING_CODE
+            try:
+                hash(value)
+            except TypeError:
+                raw = None
+            value = str(value)
+        key = fold(value)
+        if key in MISSING_SPELLINGS:
+            code = MISSING_CODE
+        else:
+            code = self.codes.get(key)
+            if code is None and add:
+                with self._lock:
+                    code = self._intern(key, value.strip())
+            elif code is None:
+                code = UNSEEN_CODE
+        if raw is not None and len(self.raw_codes) < RAW_CACHE_LIMIT:
+            # Unseen values are remembered too, as themselves, until something interns them
+            self.spellings[raw] = self.values[code] if code != UNSEEN_CODE else value.strip()
+            self.raw_codes[raw] = code
+            if code == UNSEEN_CODE:
+                self._num_unseen += 1
+        return code
+
+    def value(self, code):
+        """Canonical spelling of a code (None for missing)"""
+        return self.values[code] if code >= 0 else None
+
+    def spelling(self, value):
+        """Canonical spelling of a raw value, interning it if unseen"""
+        code = self.code(value)
+        return self.values[code]
+
+    def canonical(self, value):
+        """Canonical spelling of a raw value; unseen values come back trimmed, not interned"""
+        try:
+            return self.spellings[value]
+        except (KeyError, TypeError):
+            code = self.code(value, add=False)
+        if code == UNSEEN_CODE:
+            return str(value).strip()
+        return self.values[code]
+
+
+class Vocabulary:
+    """Attribute vocabularies by column name, shared by every index and model in the process"""
+
+    def __init__(self, canonical_values=CANONICAL_VALUES):
+        self._canonical_values = canonical_values
+        self._columns = {}
+        self._lock = threading.Lock()
+
+    def column(self, name):
+        vocabulary = self._columns.get(name)
+        if vocabulary is None:
+            with self._lock:
+                vocabulary = self._columns.get(name)
+                if vocabulary is None:
+                    vocabulary = self._columns[name] = AttributeVocabulary(name, self._canonical_values.get(name))
+        return vocabulary
+
+    def canonical(self, name, value):
+        return self.column(name).canonical(value)
+
+
+VOCABULARY = Vocabulary()
+
+
+def column(name):
+    """The shared vocabulary of an attribute"""
+    return VOCABULARY.column(name)